@@ -1,16 +1,30 @@
 from flask import Flask, request, jsonify
 from sagar.my_object.object import Environment
-from sagar.lexer.Lexer import new_lexer
-from sagar.my_parser.parser import Parser
-from sagar.my_evaluator.evaluator import eval, is_error
+from sagar.my_ast.hashing import fingerprint
+from sagar.my_parser.cache import ParseCache, DiskCache, ResultCache, DEFAULT_RESULT_MAX_BYTES
+from sagar.my_evaluator.backends import get_backend, TREE_BACKEND
+from sagar.my_evaluator.evaluator import is_error
 from waitress import serve
 from flask_cors import CORS
 import requests
+import os
 import threading
 import time
 
 app = Flask(__name__)
 CORS(app)
+# AST_CACHE_DIR lets all waitress workers share parsed programs through the disk
+ast_cache_dir = os.environ.get('AST_CACHE_DIR')
+# OPTIMIZE_AST=0 turns off the optimizer passes (sagar/my_optimizer/passes.py)
+optimize = os.environ.get('OPTIMIZE_AST', '1') != '0'
+# LAZY_FUNCTIONS=1 parses function bodies on their first call
+lazy_functions = os.environ.get('LAZY_FUNCTIONS', '0') == '1'
+parse_cache = ParseCache(disk_cache=DiskCache(ast_cache_dir) if ast_cache_dir else None, optimize=optimize, lazy_functions=lazy_functions)
+# RESULT_CACHE_SIZE=0 turns off caching of responses by program fingerprint;
+# RESULT_CACHE_BYTES bounds the estimated memory the cached responses take
+result_cache = ResultCache(int(os.environ.get('RESULT_CACHE_SIZE', '1024')), int(os.environ.get('RESULT_CACHE_BYTES', str(DEFAULT_RESULT_MAX_BYTES))))
+# EVAL_BACKEND picks how programs run (sagar/my_evaluator/backends.py): tree, closures, vm or python
+evaluate = get_backend(os.environ.get('EVAL_BACKEND', TREE_BACKEND))
 
 @app.route("/", methods=['GET'])
 def welcome():
@@ -23,23 +37,31 @@ def receive_data():
     if not code or not len(code):
         return jsonify({'Error': "Code cannot be empty"})
     env = Environment(print_statements=[])
-    l = new_lexer(code)
-    p = Parser(l)
-    program = p.parse_program()
+    program, errors = parse_cache.parse(code)
 
-    if len(p.errors):
-        return jsonify({'Error':p.errors})
+    if len(errors):
+        return jsonify({'Error':errors})
+
+    key = fingerprint(program)
+    cached = result_cache.get(key)
+    if cached is not None:
+        return jsonify(cached)
     
     try:
-        evaluated = eval(program, env)
+        evaluated = evaluate(program, env)
         if is_error(evaluated):
-            return jsonify({'Error': evaluated.message, 'Output': env.print_statements})
-        return jsonify({
-            'Output': env.print_statements
-        })
+            result = {'Error': evaluated.message, 'Output': env.print_statements}
+        else:
+            result = {'Output': env.print_statements}
+        result_cache.put(key, result)
+        return jsonify(result)
     except Exception as e:
         return jsonify({'Cannot evaluated code (probably an internal error)': e})
 
+@app.route("/cache-stats", methods=["GET"])
+def cache_stats():
+    return jsonify({**parse_cache.stats(), 'results': result_cache.stats()})
+
 @app.route("/ping", methods=["GET"])
 def ping():
     print("Someone pinged")
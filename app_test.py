@@ -0,0 +1,37 @@
+import importlib.util
+import unittest
+from unittest import mock
+
+# app.py needs the server dependencies in requirements.txt
+server_dependencies = all(importlib.util.find_spec(name) is not None for name in ['flask', 'flask_cors', 'waitress', 'requests'])
+
+
+@unittest.skipUnless(server_dependencies, 'flask, flask_cors, waitress or requests is not installed')
+class TestEvaluate(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # without the thread that pings the node server
+        with mock.patch('threading.Thread'):
+            import app
+        cls.client = app.app.test_client()
+
+    def evaluate(self, code: str) -> dict:
+        return self.client.post('/evaluate', json={'code': code}).get_json()
+
+    def test_cached_results(self):
+        inps = [
+            ('maan_le a = [1, 2]; print(len(a) * 2);', ['4']),
+            ('maan_le a = [ 1, 2 ]\n// doubled\nprint( len(a)*2 )', ['4']),
+            # the same values, printed differently as part of a function
+            ('print(golmaal() { 007 });', ['golmaal (  ) { 007 }']),
+            ('print(golmaal() { 7 });', ['golmaal (  ) { 7 }']),
+        ]
+        for _ in range(2):
+            for i, (code, exp) in enumerate(inps):
+                res = self.evaluate(code)
+                self.assertTrue(res == {'Output': exp}, f'{i}: res = {res}')
+
+
+if __name__ == '__main__':
+    unittest.main()
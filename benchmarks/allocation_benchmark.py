@@ -0,0 +1,64 @@
+"""Memory allocated per loop iteration on every backend in sagar/my_evaluator/backends.py,
+measured with tracemalloc.
+
+tracemalloc only sees blocks that are still alive, and a loop frees its temporaries
+right away. So the loop keeps what every iteration makes: a literal, an arithmetic
+result and a comparison go into an array that holds the previous iteration's array. The
+difference between two iteration counts, divided by the extra iterations, is what one
+iteration allocates.
+
+Run from the repository root:
+    python -m benchmarks.allocation_benchmark [iterations]
+"""
+import sys
+import tracemalloc
+from benchmarks.closures_benchmark import output
+from benchmarks.parser_benchmark import parse
+from sagar.my_evaluator.backends import BACKENDS
+from sagar.my_object.object import Environment
+from sagar.my_optimizer.passes import optimize
+
+SOURCE = '''
+maan_le keep = [];
+maan_le i = 0;
+while (i < %d) {
+    keep = [keep, i, i < 500, 7];
+    i = i + 1;
+}
+print(len(keep));
+'''
+
+
+def allocated(backend, program) -> tuple[int, int]:
+    # (blocks, bytes) still allocated when the program ends, kept alive by its environment
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        env = Environment(print_statements=[])
+        backend(program, env)
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+    return sum(stat.count_diff for stat in stats), sum(stat.size_diff for stat in stats)
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    # the loop limit is 1000 iterations
+    iterations = min(iterations, 500)
+    short, long = optimize(parse(SOURCE % iterations)), optimize(parse(SOURCE % (2 * iterations)))
+    print(f'per iteration, from {iterations} and {2 * iterations} iterations')
+    for name, backend in BACKENDS.items():
+        # a first run, so caches and lazily made objects are not counted
+        output(backend, short)
+        output(backend, long)
+        short_blocks, short_bytes = allocated(backend, short)
+        long_blocks, long_bytes = allocated(backend, long)
+        blocks = (long_blocks - short_blocks) / iterations
+        size = (long_bytes - short_bytes) / iterations
+        print(f'  {name:10s} {blocks:6.2f} blocks {size:8.1f} bytes')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+"""Time to get a parsed program from the binary AST format compared with parsing the
+source again, on a generated 10k-line program.
+
+Run from the repository root:
+    python -m benchmarks.ast_load_benchmark [repeat_count]
+"""
+import os
+import sys
+import tempfile
+from benchmarks.parser_benchmark import generate_program, parse, best_of
+from sagar.my_ast.serialize import dumps, loads, dump, load
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    source = generate_program()
+    program = parse(source)
+    data = dumps(program, source)
+    lines = source.count('\n') + 1
+    print(f"{lines} lines, {len(source)} chars, {len(data)} bytes serialized")
+
+    elapsed = best_of(lambda: parse(source), repeat)
+    print(f"parse:      {elapsed * 1000:7.1f} ms")
+    elapsed = best_of(lambda: dumps(program, source), repeat)
+    print(f"dumps:      {elapsed * 1000:7.1f} ms")
+    elapsed = best_of(lambda: loads(data), repeat)
+    print(f"loads:      {elapsed * 1000:7.1f} ms")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'program.gast')
+        dump(program, source, path)
+        elapsed = best_of(lambda: load(path), repeat)
+        print(f"load file:  {elapsed * 1000:7.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""Memory per AST node of a parsed program, for the node object tree and for the
+flat array encoding of the same tree.
+
+Run from the repository root:
+    python -m benchmarks.ast_memory_benchmark [line_count]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+from benchmarks.parser_benchmark import generate_program, parse
+from sagar.my_ast.flat import encode
+
+
+def retained(fn):
+    # bytes still allocated after fn returns, while its result is kept alive
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    res = fn()
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return res, used
+
+
+def main():
+    line_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    source = generate_program(line_count)
+
+    # tokens and literal strings held by the nodes count as part of the tree
+    program, tree_bytes = retained(lambda: parse(source))
+    flat, flat_bytes = retained(lambda: encode(program, source))
+    nodes = len(flat)
+    print(f"{line_count} lines, {nodes} nodes")
+    print(f"node objects: {tree_bytes / 2**20:7.1f} MiB  {tree_bytes / nodes:6.1f} bytes/node")
+    print(f"flat arrays:  {flat_bytes / 2**20:7.1f} MiB  {flat_bytes / nodes:6.1f} bytes/node")
+
+    start = time.perf_counter()
+    encode(program, source)
+    print(f"encode: {(time.perf_counter() - start) * 1000:.1f} ms")
+    start = time.perf_counter()
+    flat.decode()
+    print(f"decode: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
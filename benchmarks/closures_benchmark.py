@@ -0,0 +1,37 @@
+"""Evaluation time of a loop heavy and a call heavy program with the tree walking eval
+and with the closure compiler (compiling included, and compiled once beforehand).
+
+Run from the repository root:
+    python -m benchmarks.closures_benchmark [repeat_count]
+"""
+import sys
+from benchmarks.dispatch_benchmark import LOOP_SOURCE, CALL_SOURCE
+from benchmarks.parser_benchmark import parse, best_of
+from sagar.my_evaluator.closures import run, compile_node
+from sagar.my_evaluator.evaluator import eval
+from sagar.my_object.object import Environment
+from sagar.my_optimizer.passes import optimize
+
+
+def output(backend, program) -> list[str]:
+    env = Environment(print_statements=[])
+    backend(program, env)
+    return env.print_statements
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for name, source in [('loop', LOOP_SOURCE), ('call', CALL_SOURCE)]:
+        program = optimize(parse(source))
+        if output(run, program) != output(eval, program):
+            raise RuntimeError(f'{name}: the closure backend prints a different output')
+        code = compile_node(program)
+        tree = best_of(lambda: output(eval, program), repeat)
+        closures = best_of(lambda: output(run, program), repeat)
+        compiled = best_of(lambda: code(Environment(print_statements=[])), repeat)
+        print(f"{name}: eval {tree * 1000:7.2f} ms, closures {closures * 1000:7.2f} ms ({tree / closures:.2f}x), "
+              f"precompiled {compiled * 1000:7.2f} ms ({tree / compiled:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""Compares two JSON reports written by benchmarks.run and flags stage regressions.
+
+    python -m benchmarks.compare baseline.json current.json --threshold 1.15
+
+Exits with status 1 when any (shape, stage) got slower than threshold x baseline.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path: str) -> dict[tuple[str, str], dict]:
+    with open(path) as f:
+        report = json.load(f)
+    return {(r['shape'], r['stage']): r for r in report['results']}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=1.15, help='allowed slowdown ratio of min timings')
+    args = parser.parse_args(argv)
+
+    baseline = load(args.baseline)
+    current = load(args.current)
+    regressions = 0
+    for key in sorted(baseline.keys() & current.keys()):
+        old, new = baseline[key], current[key]
+        if old['size'] != new['size']:
+            print(f"{key[0]:>16} {key[1]:>5}: skipped, size changed {old['size']} -> {new['size']}")
+            continue
+        ratio = new['min'] / old['min'] if old['min'] else float('inf')
+        flag = 'REGRESSION' if ratio > args.threshold else ''
+        regressions += bool(flag)
+        print(f"{key[0]:>16} {key[1]:>5}: {old['min'] * 1000:9.2f} ms -> {new['min'] * 1000:9.2f} ms  x{ratio:.2f} {flag}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
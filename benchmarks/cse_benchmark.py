@@ -0,0 +1,55 @@
+"""Evaluation time of a loop repeating pure subexpressions, with and without the common
+subexpression pass, and the cost of fingerprinting a generated 10k-line program (first
+time, then from the hashes cached on its nodes).
+
+Run from the repository root:
+    python -m benchmarks.cse_benchmark [repeat_count]
+"""
+import sys
+from benchmarks.folding_benchmark import run
+from benchmarks.parser_benchmark import parse, best_of, generate_program
+from sagar.my_ast.hashing import fingerprint
+from sagar.my_optimizer.cse import eliminate_common_subexpressions
+from sagar.my_optimizer.resolver import resolve
+
+SOURCE = '''
+maan_le arr = [3, 1, 4, 1, 5, 9, 2, 6];
+maan_le norm = golmaal(x, y) {
+    ye_lo (x * x + y * y) * (x * x + y * y) + (x * x + y * y) / (len(arr) + 1);
+};
+maan_le i = 0;
+maan_le total = 0;
+while (i < 999) {
+    maan_le k = i - (i / len(arr)) * len(arr);
+    total = total + norm(arr[k], i) + arr[k] * arr[k] - len(arr);
+    i = i + 1;
+}
+print(total);
+'''
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    program = resolve(parse(SOURCE))
+    eliminated = eliminate_common_subexpressions(program)
+    if run(eliminated) != run(program):
+        raise RuntimeError('program prints a different output after the pass')
+
+    elapsed = best_of(lambda: eliminate_common_subexpressions(program), repeat)
+    print(f"eliminate:       {elapsed * 1000:7.2f} ms")
+    plain = best_of(lambda: run(program), repeat)
+    print(f"eval:            {plain * 1000:7.2f} ms")
+    optimized = best_of(lambda: run(eliminated), repeat)
+    print(f"eval with cse:   {optimized * 1000:7.2f} ms  ({plain / optimized:.2f}x)")
+
+    source = generate_program()
+    trees = [parse(source) for _ in range(repeat)]
+    first = best_of(lambda: fingerprint(trees.pop()), repeat)
+    large = parse(source)
+    fingerprint(large)
+    cached = best_of(lambda: fingerprint(large), repeat, number=1000)
+    print(f"fingerprint of {source.count(chr(10)) + 1} lines: {first * 1000:.1f} ms, then {cached * 1e6:.2f} us cached")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""Per node dispatch cost of eval on a loop heavy and a call heavy program: the node
+classes each program evaluates are recorded, then choosing a handler for every one of
+them is timed with the old chain of isinstance checks and with the handler table, next
+to the whole evaluation time per node.
+
+Run from the repository root:
+    python -m benchmarks.dispatch_benchmark [repeat_count]
+"""
+import sys
+from benchmarks.folding_benchmark import run
+from benchmarks.parser_benchmark import parse, best_of
+from sagar.my_ast.ast import *
+from sagar.my_evaluator import evaluator
+from sagar.my_optimizer.passes import optimize
+
+LOOP_SOURCE = '''
+maan_le i = 0;
+maan_le total = 0;
+while (i < 999) {
+    if (i - (i / 3) * 3 == 0) { total = total + i; } else { total = total - 1; }
+    i = i + 1;
+}
+print(total);
+'''
+
+CALL_SOURCE = '''
+maan_le fib = golmaal(n) { if (n < 2) { ye_lo n; } ye_lo fib(n - 1) + fib(n - 2); };
+print(fib(16));
+'''
+
+
+def old_dispatch(node):
+    # the isinstance chain eval used before the handler table, returning the position
+    # of the branch taken
+    if isinstance(node, Program):
+        return 0
+    elif isinstance(node, ExpressionStatement):
+        return 1
+    elif isinstance(node, IntegerLiteral):
+        return 2
+    elif isinstance(node, Boolean):
+        return 3
+    elif isinstance(node, PrefixExpression):
+        return 4
+    elif isinstance(node, InfixExpression):
+        return 5
+    elif isinstance(node, BlockStatement):
+        return 6
+    elif isinstance(node, IfExpression):
+        return 7
+    elif isinstance(node, ReturnStatement):
+        return 8
+    elif isinstance(node, LetStatement):
+        return 9
+    elif isinstance(node, ResolvedIdentifier):
+        return 10
+    elif isinstance(node, Identifier):
+        return 11
+    elif isinstance(node, ResolvedFunctionLiteral):
+        return 12
+    elif isinstance(node, FunctionLiteral):
+        return 13
+    elif isinstance(node, CallExpression):
+        return 14
+    elif isinstance(node, StringExpression):
+        return 15
+    elif isinstance(node, ArrayLiteral):
+        return 16
+    elif isinstance(node, AssignmentStatement):
+        return 17
+    elif isinstance(node, WhileStatement):
+        return 18
+    elif isinstance(node, IndexExpression):
+        return 19
+    elif isinstance(node, SharedExpression):
+        return 20
+    return -1
+
+
+def node_classes(program) -> list[type]:
+    # classes of the nodes eval is called on, in order, by wrapping every handler
+    seen = []
+    handlers = dict(evaluator.eval_handlers)
+
+    def record(handler):
+        def wrapper(node, env):
+            seen.append(type(node))
+            return handler(node, env)
+        return wrapper
+
+    evaluator.eval_handlers.update({cls: record(handler) for cls, handler in handlers.items()})
+    try:
+        run(program)
+    finally:
+        evaluator.eval_handlers.clear()
+        evaluator.eval_handlers.update(handlers)
+    return seen
+
+
+def table_lookup(node):
+    return evaluator.eval_handlers.get(type(node))
+
+
+def chain_dispatch(classes: list[type], instances: dict):
+    for cls in classes:
+        old_dispatch(instances[cls])
+
+
+def table_dispatch(classes: list[type], instances: dict):
+    for cls in classes:
+        table_lookup(instances[cls])
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for name, source in [('loop', LOOP_SOURCE), ('call', CALL_SOURCE)]:
+        program = optimize(parse(source))
+        classes = node_classes(program)
+        # a stand in instance per class, so the loops only differ in the dispatch
+        instances = {cls: object.__new__(cls) for cls in set(classes)}
+        chain = best_of(lambda: chain_dispatch(classes, instances), repeat)
+        table = best_of(lambda: table_dispatch(classes, instances), repeat)
+        total = best_of(lambda: run(program), repeat)
+        n = len(classes)
+        print(f"{name}: {n} nodes, eval {total / n * 1e6:.3f} us/node, "
+              f"dispatch {chain / n * 1e6:.3f} us/node isinstance chain, "
+              f"{table / n * 1e6:.3f} us/node table ({chain / table:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""Evaluation time of loops and function calls over constant expressions, with and
+without the constant folding pass.
+
+Run from the repository root:
+    python -m benchmarks.folding_benchmark [repeat_count]
+"""
+import sys
+from benchmarks.parser_benchmark import parse, best_of
+from sagar.my_evaluator.evaluator import eval, is_error
+from sagar.my_object.object import Environment
+from sagar.my_optimizer.folding import fold_constants
+
+SOURCE = '''
+maan_le scale = golmaal(x) { ye_lo x * (60 * 60 * 24) / (10 * 10) + (5 * 2 + 10) - 3 * (4 - 2); };
+maan_le i = 0;
+maan_le total = 0;
+while (i < 999) {
+    total = total + scale(i) + (5 * 2 + 10) * (7 - 3) - (100 / 4 / 5);
+    if (1 < 2) { i = i + 1; } else { i = i - 1; }
+}
+print(total, "done: " + "loop" + " " + "finished");
+'''
+
+
+def run(program):
+    env = Environment(print_statements=[])
+    res = eval(program, env)
+    if is_error(res):
+        raise RuntimeError(f'benchmark program failed: {res}')
+    return env.print_statements
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    program = parse(SOURCE)
+    folded = fold_constants(program)
+    if run(folded) != run(program):
+        raise RuntimeError('folded program prints a different output')
+
+    elapsed = best_of(lambda: fold_constants(program), repeat)
+    print(f"fold:            {elapsed * 1000:7.2f} ms")
+    plain = best_of(lambda: run(program), repeat)
+    print(f"eval unfolded:   {plain * 1000:7.2f} ms")
+    optimized = best_of(lambda: run(folded), repeat)
+    print(f"eval folded:     {optimized * 1000:7.2f} ms  ({plain / optimized:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
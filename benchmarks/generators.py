@@ -0,0 +1,69 @@
+"""Synthetic Golmaal programs of configurable size and shape.
+
+Every generator returns a program that parses and evaluates without errors
+(within the evaluator's 1000 iteration / 1000 print limits).
+"""
+from typing import Callable
+
+
+def nested_functions(size: int) -> str:
+    # golmaal(a0){ golmaal(a1){ ... ye_lo a0 + a1 + ...; } } called all the way down
+    params = [f'a{i}' for i in range(size)]
+    body = f"ye_lo {' + '.join(params)};"
+    for param in reversed(params):
+        body = f'golmaal({param}) {{ {body} }}'
+    calls = ''.join(f'({i})' for i in range(size))
+    return f'maan_le f = {body};\nprint(f{calls});\n'
+
+
+def long_array(size: int) -> str:
+    elements = ', '.join(str(i) if i % 3 else f'"s{i}"' for i in range(size))
+    return f'maan_le arr = [{elements}];\nprint(len(arr), arr[{size - 1}]);\n'
+
+
+def long_while_body(size: int) -> str:
+    lines = [f'maan_le x{i} = {i};' for i in range(size)]
+    lines.append('maan_le i = 0;')
+    lines.append('while (i < 10) {')
+    lines.extend(f'    x{j} = x{j} + i * 2 - 1;' for j in range(size))
+    lines.append('    i = i + 1;')
+    lines.append('}')
+    lines.append(f'print(x0, x{size - 1});')
+    return '\n'.join(lines) + '\n'
+
+
+def huge_string(size: int) -> str:
+    text = ('golmaal is fun ' * (size // 15 + 1))[:size]
+    return f'maan_le s = "{text}";\nprint(len(s));\n'
+
+
+def mixed(size: int) -> str:
+    lines = []
+    for i in range(size):
+        match i % 4:
+            case 0:
+                lines.append(f'maan_le v{i} = {i} * 2 + 3 - 4 / 5;')
+            case 1:
+                lines.append(f'maan_le f{i} = golmaal(x, y) {{ ye_lo x * y + {i}; }};')
+            case 2:
+                lines.append(f'if (v{i - 2} > 10) {{ f{i - 1}(v{i - 2}, 2); }} else {{ -v{i - 2}; }}')
+            case _:
+                lines.append(f'maan_le arr{i} = [1, "two", {i}][2] + len("abc");')
+    return '\n'.join(lines) + '\n'
+
+
+SHAPES: dict[str, Callable[[int], str]] = {
+    'nested_functions': nested_functions,
+    'long_array': long_array,
+    'long_while_body': long_while_body,
+    'huge_string': huge_string,
+    'mixed': mixed,
+}
+
+DEFAULT_SIZES: dict[str, int] = {
+    'nested_functions': 50,
+    'long_array': 20000,
+    'long_while_body': 200,
+    'huge_string': 1000000,
+    'mixed': 5000,
+}
@@ -0,0 +1,17 @@
+import unittest
+from benchmarks.generators import SHAPES
+from benchmarks.harness import bench_source, STAGES
+
+
+class TestGenerators(unittest.TestCase):
+
+    def test_shapes_run_cleanly(self):
+        for shape, generate in SHAPES.items():
+            for size in [1, 7, 40]:
+                # raises if the generated program has parse or evaluation errors
+                results = bench_source(generate(size), STAGES, warmup=0, repeat=1)
+                self.assertTrue(sorted(results) == sorted(STAGES), f'{shape}({size}) measured {sorted(results)}')
+
+
+if __name__ == '__main__':
+    unittest.main()
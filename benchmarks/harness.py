@@ -0,0 +1,70 @@
+"""Measures lexing, parsing and evaluation of a program as separate stages."""
+import statistics
+import time
+from typing import Callable
+from sagar.lexer.Lexer import new_lexer, REGEX_ENGINE
+from sagar.lexer.token_stream import tokenize_all
+from sagar.my_evaluator.evaluator import eval, is_error
+from sagar.my_object.object import Environment
+from sagar.my_parser.parser import Parser
+from sagar.my_token.token import Constants
+
+STAGES = ['lex', 'parse', 'eval']
+
+
+def measure(fn: Callable[[], object], warmup: int, repeat: int) -> dict[str, float]:
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.fmean(timings),
+        'stdev': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        'runs': len(timings),
+    }
+
+
+def lex(source: str, engine: str) -> int:
+    l = new_lexer(source, engine=engine)
+    count = 0
+    while l.next_token().token_type != Constants.EOF:
+        count += 1
+    return count
+
+
+def evaluate(program) -> Environment:
+    env = Environment(print_statements=[])
+    evaluated = eval(program, env)
+    if is_error(evaluated):
+        raise RuntimeError(f'benchmark program failed to evaluate: {evaluated.message}')
+    return env
+
+
+def bench_source(source: str, stages: list[str], warmup: int, repeat: int, engine: str = REGEX_ENGINE) -> dict[str, dict]:
+    results: dict[str, dict] = {}
+    tokens = lex(source, engine)
+
+    if 'lex' in stages:
+        results['lex'] = measure(lambda: lex(source, engine), warmup, repeat)
+
+    # parse from a pre-built token stream so that lexing is not timed twice
+    stream = tokenize_all(source)
+    p = Parser(stream.cursor())
+    program = p.parse_program()
+    if len(p.errors):
+        raise RuntimeError(f'benchmark program has parse errors: {p.errors[:5]}')
+    if 'parse' in stages:
+        results['parse'] = measure(lambda: Parser(stream.cursor()).parse_program(), warmup, repeat)
+
+    if 'eval' in stages:
+        results['eval'] = measure(lambda: evaluate(program), warmup, repeat)
+
+    for stage_result in results.values():
+        stage_result['tokens'] = tokens
+        stage_result['tokens_per_second'] = tokens / stage_result['min'] if stage_result['min'] else 0.0
+    return results
@@ -0,0 +1,38 @@
+"""Per-keystroke cost of IncrementalLexer.edit vs a full tokenize_all as buffers grow.
+
+Run from the repository root:
+    python -m benchmarks.incremental_benchmark
+"""
+import time
+from sagar.lexer.incremental import IncrementalLexer
+from sagar.lexer.token_stream import tokenize_all
+
+LINE = 'maan_le total = total + price * 2; print(total);\n'
+
+
+def best_of(fn, repeat: int = 20) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    for lines in [1000, 10000, 100000]:
+        source = LINE * lines
+        il = IncrementalLexer(source)
+        offset = len(source) // 2 + len('maan_le tot')
+
+        def keystroke():
+            il.edit(offset, 0, 'x')
+            il.edit(offset, 1, '')
+
+        full = best_of(lambda: tokenize_all(source), repeat=3)
+        incremental = best_of(keystroke) / 2
+        print(f"{lines:>7} lines: full lex {full * 1000:8.2f} ms   incremental edit {incremental * 1000:6.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
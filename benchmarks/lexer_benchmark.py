@@ -0,0 +1,225 @@
+"""Tokens/second of the classic and regex lexer engines and of tokenize_all, the
+cost of comments compared to the same amount of whitespace, and the cost of tracking
+token start offsets: the regex lexer against a copy that builds tokens without them,
+timed in interleaved rounds in the same process.
+
+Run from the repository root:
+    python -m benchmarks.lexer_benchmark [repeat_count]
+"""
+import gc
+import random
+import re
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from sagar.lexer.Lexer import new_lexer, CLASSIC_ENGINE, REGEX_ENGINE
+from sagar.lexer.regex_lexer import RegexLexer, TOKEN_RE, single_char_types, get_word_type, get_int_value
+from sagar.lexer.token_stream import tokenize_all
+from sagar.my_token import token
+from sagar.my_token.token import Constants, LineIndex, Token, TokenType
+
+TOKENIZE_ALL = 'bulk'
+
+SNIPPET = '''
+maan_le fibonacci = golmaal(n) {
+    if (n < 2) {
+        ye_lo n;
+    }
+    ye_lo fibonacci(n - 1) + fibonacci(n - 2);
+};
+maan_le greeting = "hello from the golmaal benchmark";
+maan_le numbers = [1, 22, 333, 4444, 55555];
+maan_le i = 0;
+while (i != 10) {
+    print(greeting, " ", numbers[i / 2], " ", fibonacci(i));
+    i = i + 1;
+}
+'''
+
+COMMENTED_SNIPPET = '''
+// recursive fibonacci, the classic lexer benchmark workload
+maan_le fibonacci = golmaal(n) {
+    /* base case: fib(0) = 0 and fib(1) = 1,
+       everything else recurses twice */
+    if (n < 2) {
+        ye_lo n; // nothing left to add
+    }
+    ye_lo fibonacci(n - 1) + fibonacci(n - 2);
+};
+// the loop below prints a few numbers
+maan_le i = 0;
+while (i != 10) { /* ten iterations */
+    print(fibonacci(i)); // one per line
+    i = i + 1;
+}
+'''
+
+COMMENT_RE = re.compile(r'//[^\n]*|/\*.*?\*/', re.DOTALL)
+
+
+def blank_comments(source: str) -> str:
+    # same length and line structure, comments replaced with spaces
+    return COMMENT_RE.sub(lambda m: re.sub(r'[^\n]', ' ', m.group()), source)
+
+
+def count_tokens(source: str, engine: str) -> int:
+    if engine == TOKENIZE_ALL:
+        return len(tokenize_all(source)) - 1
+    l = new_lexer(source, engine=engine)
+    count = 0
+    while l.next_token().token_type != Constants.EOF:
+        count += 1
+    return count
+
+
+def bench(source: str, engine: str, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count_tokens(source, engine)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@dataclass(slots=True)
+class PositionlessToken:
+    # Token without its start offset
+    token_type: TokenType
+    literal: str
+    value: int | None = field(default=None, compare=False, repr=False)
+
+
+class PositionlessRegexLexer(RegexLexer):
+    # RegexLexer.next_token with the start offsets left out, everything else the same
+    def next_token(self) -> PositionlessToken:
+        m = TOKEN_RE.match(self.input, self.position)
+        if m is None or m.lastgroup is None:
+            self.position = len(self.input)
+            return PositionlessToken(Constants.EOF, '')
+
+        self.position = m.end()
+        kind = m.lastgroup
+
+        if kind == 'word':
+            return positionless_word_token(m.group('word'))
+        if kind == 'string':
+            return PositionlessToken(Constants.STRING, m.group('string'))
+        if kind == 'two_char':
+            literal = m.group('two_char')
+            return PositionlessToken(token.get_two_char_type(literal), literal)
+
+        ch = m.group('char')
+        return PositionlessToken(single_char_types.get(ch, Constants.ILLEGAL), ch)
+
+
+def positionless_word_token(word: str) -> PositionlessToken:
+    tok_type = get_word_type(word)
+    if tok_type == Constants.INT:
+        return PositionlessToken(tok_type, word, get_int_value(word))
+    return PositionlessToken(tok_type, word)
+
+
+def lex_with(lexer) -> int:
+    count = 0
+    while lexer.next_token().token_type != Constants.EOF:
+        count += 1
+    return count
+
+
+def token_pairs(lexer) -> list[tuple[TokenType, str]]:
+    res = []
+    while True:
+        tok = lexer.next_token()
+        res.append((tok.token_type, tok.literal))
+        if tok.token_type == Constants.EOF:
+            return res
+
+
+def interleaved(fns: dict, rounds: int) -> dict[str, list[float]]:
+    # every round times each function once, in a shuffled order, so drift in machine
+    # speed affects all of them alike. The cyclic GC is off while timing, as in timeit.
+    times = {name: [] for name in fns}
+    order = list(fns)
+    rng = random.Random(5)
+    gc_enabled = gc.isenabled()
+    try:
+        for _ in range(rounds):
+            rng.shuffle(order)
+            for name in order:
+                gc.collect()
+                gc.disable()
+                start = time.perf_counter()
+                fns[name]()
+                times[name].append(time.perf_counter() - start)
+                gc.enable()
+    finally:
+        if gc_enabled:
+            gc.enable()
+        else:
+            gc.disable()
+    return times
+
+
+def report_overhead(label: str, base: list[float], new: list[float]):
+    # Overhead of new over base. The median of the per-round ratios is the figure to
+    # read: one slow round moves a best-of, but not the median of paired rounds.
+    ratios = sorted(n / b - 1 for n, b in zip(new, base))
+    quartiles = statistics.quantiles(ratios, n=4)
+    best = min(new) / min(base) - 1
+    print(f"{label}: overhead {statistics.median(ratios):+.1%} (paired median), "
+          f"quartiles {quartiles[0]:+.1%} .. {quartiles[2]:+.1%}")
+    print(f"{'':{len(label)}}  best of {len(new)}: without {min(base) * 1000:.2f} ms, with {min(new) * 1000:.2f} ms ({best:+.1%})")
+
+
+def position_overhead(rounds: int):
+    source = SNIPPET * 200
+    if token_pairs(PositionlessRegexLexer(source)) != token_pairs(RegexLexer(source)):
+        raise RuntimeError('the lexer without start offsets returns different tokens')
+    times = interleaved({
+        'without': lambda: lex_with(PositionlessRegexLexer(source)),
+        'with': lambda: lex_with(RegexLexer(source)),
+    }, rounds)
+    print(f"start offsets: {len(source)} chars, {rounds} interleaved rounds")
+    report_overhead('  regex lexer', times['without'], times['with'])
+
+    count = 100000
+    def construct(cls, *args):
+        def run():
+            for _ in range(count):
+                cls(*args)
+        return run
+    times = interleaved({
+        'without': construct(PositionlessToken, Constants.IDENT, 'name'),
+        'with': construct(Token, Constants.IDENT, 'name', 42),
+    }, rounds)
+    report_overhead('  Token() x100k', times['without'], times['with'])
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    source = SNIPPET * 2000
+    tokens = count_tokens(source, CLASSIC_ENGINE)
+    print(f"{len(source)} chars, {tokens} tokens, best of {repeat}")
+    for engine in [CLASSIC_ENGINE, REGEX_ENGINE, TOKENIZE_ALL]:
+        elapsed = bench(source, engine, repeat)
+        print(f"{engine:>8}: {elapsed * 1000:8.1f} ms  {tokens / elapsed:12,.0f} tokens/s")
+
+    # only paid when a parser error has to be rendered with a line/column
+    start = time.perf_counter()
+    LineIndex(source)
+    print(f"line index build: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    commented = COMMENTED_SNIPPET * 2000
+    blanked = blank_comments(commented)
+    print(f"comments: {len(commented)} chars, of which {len(commented) - len(COMMENT_RE.sub('', commented))} are comments")
+    for engine in [CLASSIC_ENGINE, REGEX_ENGINE, TOKENIZE_ALL]:
+        with_comments = bench(commented, engine, repeat)
+        with_spaces = bench(blanked, engine, repeat)
+        print(f"{engine:>8}: comments {with_comments * 1000:8.1f} ms  spaces {with_spaces * 1000:8.1f} ms  ratio {with_comments / with_spaces:.2f}")
+
+    position_overhead(max(repeat, 5) * 10)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Parse throughput on a generated 10k-line program, plus the per-request cost of
+building a Parser and parsing a small program, which is what /evaluate pays, and
+time to first output of a script defining many functions it never calls, with
+eager and lazy function body parsing.
+
+Run from the repository root:
+    python -m benchmarks.parser_benchmark [repeat_count]
+"""
+import sys
+import time
+from sagar.lexer.Lexer import new_lexer, REGEX_ENGINE
+from sagar.lexer.token_stream import tokenize_all
+from sagar.my_evaluator.evaluator import eval
+from sagar.my_object.object import Environment
+from sagar.my_parser.parser import Parser
+
+LINES = [
+    'maan_le a{i} = {i} * 2 + 3 - 4 / 5;',
+    'maan_le f{i} = golmaal(x, y) {{ ye_lo x * y + {i}; }};',
+    'if (a{i} < 10 == true) {{ print(a{i}, "small"); }} else {{ print(-a{i}); }}',
+    'maan_le arr{i} = [1, 2, 3, {i}][0] + len("abc");',
+    'while (a{i} > 0) {{ a{i} = a{i} - 1; }}',
+]
+
+
+FUNCTION = '''maan_le f{i} = golmaal(x, y) {{
+    maan_le total = 0;
+    while (x > 0) {{ total = total + x * y - {i} / 2; x = x - 1; }}
+    if (total > 100) {{ ye_lo [total, "big", len("abc")]; }} else {{ ye_lo -total; }}
+}};'''
+
+
+def generate_program(line_count: int = 10000) -> str:
+    return '\n'.join(LINES[i % len(LINES)].format(i=i) for i in range(line_count))
+
+
+def generate_library(function_count: int = 2000) -> str:
+    # many function definitions, of which only the first is called
+    return '\n'.join(FUNCTION.format(i=i) for i in range(function_count)) + '\nprint(f0(3, 4));'
+
+
+def first_output(source: str, lazy_functions: bool) -> list[str]:
+    p = Parser(new_lexer(source, engine=REGEX_ENGINE), lazy_functions=lazy_functions)
+    program = p.parse_program()
+    env = Environment(print_statements=[])
+    eval(program, env)
+    return env.print_statements
+
+
+def parse(source: str):
+    p = Parser(new_lexer(source, engine=REGEX_ENGINE))
+    program = p.parse_program()
+    if len(p.errors):
+        raise RuntimeError(f'benchmark program has parse errors: {p.errors[:5]}')
+    return program
+
+
+def best_of(fn, repeat: int, number: int = 1) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    source = generate_program()
+    parse(source)  # warmup
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(source)
+        best = min(best, time.perf_counter() - start)
+    lines = source.count('\n') + 1
+    print(f"{lines} lines, {len(source)} chars, best of {repeat}: {best * 1000:.1f} ms  {lines / best:,.0f} lines/s")
+
+    # parser only, over pre-lexed tokens, so lexing does not hide the Pratt loop
+    stream = tokenize_all(source)
+    elapsed = best_of(lambda: Parser(stream.cursor()).parse_program(), repeat)
+    print(f"parse over a token stream: {elapsed * 1000:.1f} ms  {(len(stream) - 1) / elapsed:,.0f} tokens/s")
+
+    number = 2000
+    small = generate_program(5)
+    small_stream = tokenize_all(small)
+    elapsed = best_of(lambda: Parser(small_stream.cursor()), repeat, number)
+    print(f"Parser construction: {elapsed * 1e6:.2f} us")
+    elapsed = best_of(lambda: parse(small), repeat, number)
+    print(f"small request ({len(small)} chars) lex + parse: {elapsed * 1e6:.1f} us")
+
+    library = generate_library()
+    eager = best_of(lambda: first_output(library, lazy_functions=False), repeat)
+    lazy = best_of(lambda: first_output(library, lazy_functions=True), repeat)
+    print(f"first output, {library.count('golmaal')} functions ({len(library)} chars): eager {eager * 1000:.1f} ms, lazy {lazy * 1000:.1f} ms ({eager / lazy:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""Evaluation time of recursive calls and closures reading enclosing variables, with and
+without the scope resolution pass.
+
+Run from the repository root:
+    python -m benchmarks.resolver_benchmark [repeat_count]
+"""
+import sys
+from benchmarks.folding_benchmark import run
+from benchmarks.parser_benchmark import parse, best_of
+from sagar.my_optimizer.resolver import resolve
+
+SOURCE = '''
+maan_le fib = golmaal(n) { if (n < 2) { ye_lo n; } ye_lo fib(n - 1) + fib(n - 2); };
+maan_le outer = golmaal(a, b, c) {
+    maan_le total = 0;
+    maan_le middle = golmaal(d) {
+        maan_le inner = golmaal(e) { ye_lo a + b + c + d + e + total; };
+        maan_le i = 0;
+        while (i < 300) {
+            total = inner(i) - total;
+            i = i + 1;
+        }
+        ye_lo total;
+    };
+    ye_lo middle(4);
+};
+print(fib(16), outer(1, 2, 3));
+'''
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    program = parse(SOURCE)
+    resolved = resolve(program)
+    if run(resolved) != run(program):
+        raise RuntimeError('resolved program prints a different output')
+
+    elapsed = best_of(lambda: resolve(program), repeat)
+    print(f"resolve:          {elapsed * 1000:7.2f} ms")
+    plain = best_of(lambda: run(program), repeat)
+    print(f"eval unresolved:  {plain * 1000:7.2f} ms")
+    optimized = best_of(lambda: run(resolved), repeat)
+    print(f"eval resolved:    {optimized * 1000:7.2f} ms  ({plain / optimized:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Runs the lex/parse/eval benchmarks over generated programs and writes JSON results.
+
+Run from the repository root, e.g.:
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --shapes mixed long_array --scale 0.5 --repeat 10
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from benchmarks.generators import SHAPES, DEFAULT_SIZES
+from benchmarks.harness import STAGES, bench_source
+from sagar.lexer.Lexer import CLASSIC_ENGINE, REGEX_ENGINE
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--shapes', nargs='+', choices=sorted(SHAPES), default=sorted(SHAPES))
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplier applied to every default program size')
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--engine', choices=[CLASSIC_ENGINE, REGEX_ENGINE], default=REGEX_ENGINE)
+    parser.add_argument('--output', help='write JSON results to this file instead of stdout')
+    args = parser.parse_args(argv)
+
+    results = []
+    for shape in args.shapes:
+        size = max(1, int(DEFAULT_SIZES[shape] * args.scale))
+        source = SHAPES[shape](size)
+        for stage, stats in bench_source(source, args.stages, args.warmup, args.repeat, engine=args.engine).items():
+            results.append({'shape': shape, 'size': size, 'chars': len(source), 'stage': stage, **stats})
+            print(f"{shape:>16} {stage:>5}: {stats['min'] * 1000:9.2f} ms  {stats['tokens_per_second']:12,.0f} tokens/s", file=sys.stderr)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.time(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'engine': args.engine,
+            'warmup': args.warmup,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
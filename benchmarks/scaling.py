@@ -0,0 +1,141 @@
+"""Parser scaling suite: times Parser.parse_program on generated programs of 1k to 1M
+tokens, fits time = c * tokens^k, and fails when parsing scales superlinearly (k above
+--max-exponent) or the per-token cost at some size regressed beyond --threshold times
+the stored baseline.
+
+Run from the repository root:
+    python -m benchmarks.scaling
+    python -m benchmarks.scaling --sizes 1000 10000 100000 --write-baseline
+
+Exits with status 1 on a failed check. The baseline is machine specific: rewrite it
+(--write-baseline) when moving to other hardware.
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import sys
+import time
+from benchmarks.generators import SHAPES
+from benchmarks.run import git_commit
+from sagar.lexer.token_stream import tokenize_all
+from sagar.my_parser.parser import Parser
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+# shapes that grow by repeating statements or list items, so any size can be generated
+SCALING_SHAPES = ['mixed', 'long_array', 'long_while_body']
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'scaling_baseline.json')
+
+
+def generate(shape: str, tokens: int) -> str:
+    # a program of the shape with about the given number of tokens
+    unit = len(tokenize_all(SHAPES[shape](100))) / 100
+    return SHAPES[shape](max(1, round(tokens / unit)))
+
+
+def time_parse(source: str, repeat: int, budget: float, collect: bool = False) -> tuple[int, float]:
+    # token count and best parse time over a pre-built token stream, so lexing is not
+    # timed; large programs get fewer runs, to stay around budget seconds. Like timeit,
+    # the garbage collector is off while timing unless collect: its full collections
+    # walk the whole (growing) AST, which hides how the parser itself scales.
+    stream = tokenize_all(source)
+    timings = []
+    while True:
+        p = Parser(stream.cursor())
+        gc.collect()
+        if not collect:
+            gc.disable()
+        try:
+            start = time.perf_counter()
+            p.parse_program()
+            timings.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+        if len(p.errors):
+            raise RuntimeError(f'benchmark program has parse errors: {p.errors[:5]}')
+        if len(timings) >= repeat or sum(timings) + timings[-1] > budget:
+            break
+    return len(stream) - 1, min(timings)
+
+
+def fit_exponent(points: list[tuple[int, float]]) -> float:
+    # least squares slope of log(time) against log(tokens): 1.0 is linear
+    xs = [math.log(tokens) for tokens, _ in points]
+    ys = [math.log(seconds) for _, seconds in points]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    var = sum((x - mean_x) ** 2 for x in xs)
+    if var == 0:
+        return 1.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var
+
+
+def measure(shapes: list[str], sizes: list[int], repeat: int, budget: float, collect: bool = False) -> list[dict]:
+    results = []
+    for shape in shapes:
+        for size in sizes:
+            tokens, seconds = time_parse(generate(shape, size), repeat, budget, collect)
+            results.append({'shape': shape, 'size': size, 'tokens': tokens, 'seconds': seconds, 'ns_per_token': seconds / tokens * 1e9})
+            print(f"{shape:>16} {tokens:>9} tokens: {seconds * 1000:10.2f} ms  {seconds / tokens * 1e9:8.1f} ns/token", file=sys.stderr)
+    return results
+
+
+def check(results: list[dict], baseline: dict | None, max_exponent: float, threshold: float) -> list[str]:
+    failures = []
+    by_shape: dict[str, list[dict]] = {}
+    for r in results:
+        by_shape.setdefault(r['shape'], []).append(r)
+    for shape, rows in by_shape.items():
+        if len(rows) < 2:
+            continue
+        exponent = fit_exponent([(r['tokens'], r['seconds']) for r in rows])
+        print(f"{shape:>16} growth: time ~ tokens^{exponent:.3f}", file=sys.stderr)
+        if exponent > max_exponent:
+            failures.append(f'{shape}: parse time grows as tokens^{exponent:.3f}, above {max_exponent}')
+
+    if baseline is not None:
+        stored = {(r['shape'], r['size']): r for r in baseline['results']}
+        for r in results:
+            old = stored.get((r['shape'], r['size']))
+            if old is None:
+                continue
+            ratio = r['ns_per_token'] / old['ns_per_token']
+            if ratio > threshold:
+                failures.append(f"{r['shape']} at {r['size']} tokens: {r['ns_per_token']:.1f} ns/token is x{ratio:.2f} the baseline {old['ns_per_token']:.1f}")
+    return failures
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--shapes', nargs='+', choices=SCALING_SHAPES, default=SCALING_SHAPES)
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES, help='approximate token counts')
+    parser.add_argument('--repeat', type=int, default=5, help='most runs per size; the best is kept')
+    parser.add_argument('--budget', type=float, default=2.0, help='seconds after which a size stops repeating')
+    parser.add_argument('--gc', action='store_true', help='keep the garbage collector running while timing')
+    parser.add_argument('--max-exponent', type=float, default=1.1, help='largest allowed growth exponent')
+    parser.add_argument('--threshold', type=float, default=1.5, help='allowed per-token slowdown ratio against the baseline')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--write-baseline', action='store_true', help='store these results as the baseline instead of checking against it')
+    args = parser.parse_args(argv)
+
+    results = measure(args.shapes, args.sizes, args.repeat, args.budget, args.gc)
+    if args.write_baseline:
+        report = {'meta': {'commit': git_commit(), 'timestamp': time.time(), 'gc': args.gc}, 'results': results}
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        baseline = None
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    else:
+        print(f'no baseline at {args.baseline}, checking growth only', file=sys.stderr)
+        baseline = None
+
+    failures = check(results, baseline, args.max_exponent, args.threshold)
+    for failure in failures:
+        print(f'FAIL {failure}')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,45 @@
+import unittest
+from benchmarks.scaling import SCALING_SHAPES, check, fit_exponent, generate, measure
+from sagar.lexer.token_stream import tokenize_all
+
+
+class TestScaling(unittest.TestCase):
+
+    def test_fit_exponent(self):
+        sizes = [1000, 10000, 100000, 1000000]
+        inps = [
+            ([(n, n * 3e-6) for n in sizes], 1.0),
+            ([(n, n * n * 1e-9) for n in sizes], 2.0),
+            ([(n, 0.5) for n in sizes], 0.0),
+        ]
+        for i, (points, exp) in enumerate(inps):
+            exponent = fit_exponent(points)
+            self.assertTrue(abs(exponent - exp) < 1e-9, f'{i}: exponent = {exponent} != {exp}')
+
+    def test_generate(self):
+        for shape in SCALING_SHAPES:
+            tokens = len(tokenize_all(generate(shape, 5000))) - 1
+            self.assertTrue(4000 < tokens < 6000, f'{shape}: {tokens} tokens for 5000')
+
+    def test_check(self):
+        def row(size, seconds):
+            return {'shape': 'mixed', 'size': size, 'tokens': size, 'seconds': seconds, 'ns_per_token': seconds / size * 1e9}
+        linear = [row(1000, 0.001), row(10000, 0.01)]
+        quadratic = [row(1000, 0.001), row(10000, 0.1)]
+        baseline = {'results': [row(1000, 0.0005), row(10000, 0.01)]}
+
+        self.assertTrue(check(linear, None, 1.1, 1.5) == [], 'linear growth failed')
+        failures = check(quadratic, None, 1.1, 1.5)
+        self.assertTrue(len(failures) == 1 and 'tokens^2.000' in failures[0], f'failures = {failures}')
+        # 2x the baseline at 1000 tokens, unchanged at 10000
+        failures = check(linear, baseline, 1.1, 1.5)
+        self.assertTrue(len(failures) == 1 and 'at 1000 tokens' in failures[0], f'failures = {failures}')
+
+    def test_measure(self):
+        results = measure(SCALING_SHAPES, [200, 400], repeat=1, budget=0.0)
+        self.assertTrue(len(results) == 2 * len(SCALING_SHAPES), f'{len(results)} results')
+        self.assertTrue(all(r['seconds'] > 0 and r['tokens'] > 0 for r in results), f'results = {results}')
+
+
+if __name__ == '__main__':
+    unittest.main()
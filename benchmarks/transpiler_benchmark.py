@@ -0,0 +1,46 @@
+"""Evaluation time of recursive fibonacci on the tree walker and on the python backend
+(sagar/my_transpiler): cold, transpiling and compiling every run, and warm, with the
+compiled code cached by program fingerprint. Also the loop program for comparison.
+
+Run from the repository root:
+    python -m benchmarks.transpiler_benchmark [repeat_count]
+"""
+import sys
+from benchmarks.closures_benchmark import output
+from benchmarks.dispatch_benchmark import LOOP_SOURCE
+from benchmarks.parser_benchmark import parse, best_of
+from sagar.my_evaluator.backends import BACKENDS, TREE_BACKEND, PYTHON_BACKEND
+from sagar.my_optimizer.passes import optimize
+from sagar.my_transpiler.transpiler import code_cache, transpile
+
+FIB_SOURCE = '''
+maan_le fib = golmaal(n) { if (n < 2) { ye_lo n; } ye_lo fib(n - 1) + fib(n - 2); };
+print(fib(%d));
+'''
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    tree = BACKENDS[TREE_BACKEND]
+    python = BACKENDS[PYTHON_BACKEND]
+
+    def cold(program):
+        code_cache.clear()
+        return output(python, program)
+
+    programs = [(f'fib({n})', FIB_SOURCE % n) for n in (12, 16, 20)] + [('loop', LOOP_SOURCE)]
+    for name, source in programs:
+        program = optimize(parse(source))
+        expected = output(tree, program)
+        if cold(program) != expected or output(python, program) != expected:
+            raise RuntimeError(f'{name}: the python backend prints a different output')
+        print(f"{name}: {len(transpile(program).splitlines())} lines of Python")
+        base = best_of(lambda: output(tree, program), repeat)
+        print(f"  {'tree':12s} {base * 1000:8.2f} ms")
+        for label, fn in [('python cold', lambda: cold(program)), ('python warm', lambda: output(python, program))]:
+            elapsed = best_of(fn, repeat)
+            print(f"  {label:12s} {elapsed * 1000:8.2f} ms ({base / elapsed:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
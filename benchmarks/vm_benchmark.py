@@ -0,0 +1,32 @@
+"""Evaluation time of a loop heavy and a call heavy program on every backend in
+sagar/my_evaluator/backends.py (compiling included), and the bytecode size.
+
+Run from the repository root:
+    python -m benchmarks.vm_benchmark [repeat_count]
+"""
+import sys
+from benchmarks.closures_benchmark import output
+from benchmarks.dispatch_benchmark import LOOP_SOURCE, CALL_SOURCE
+from benchmarks.parser_benchmark import parse, best_of
+from sagar.my_compiler.compiler import compile_program
+from sagar.my_evaluator.backends import BACKENDS, TREE_BACKEND
+from sagar.my_optimizer.passes import optimize
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for name, source in [('loop', LOOP_SOURCE), ('call', CALL_SOURCE)]:
+        program = optimize(parse(source))
+        expected = output(BACKENDS[TREE_BACKEND], program)
+        print(f"{name}: {len(compile_program(program))} ints of top level bytecode")
+        tree = None
+        for backend_name, backend in BACKENDS.items():
+            if output(backend, program) != expected:
+                raise RuntimeError(f'{name}: {backend_name} prints a different output')
+            elapsed = best_of(lambda: output(backend, program), repeat)
+            tree = tree or elapsed
+            print(f"  {backend_name:10s} {elapsed * 1000:7.2f} ms ({tree / elapsed:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
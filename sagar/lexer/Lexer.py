@@ -1,5 +1,6 @@
 from sagar.my_token import token
 from sagar.my_token.token import Token, Constants
+from sagar.lexer.regex_lexer import RegexLexer, SKIP_RE, get_int_value
 
 
 class Lexer:
@@ -41,6 +42,7 @@ class Lexer:
         tok = Token(con.EOF, '')
         
         self.skip_whitespace()
+        start = min(self.position, len(self.input))
 
         match self.ch:
             case '=':
@@ -90,7 +92,7 @@ class Lexer:
                 if is_letter_or_digit(self.ch):
                     word = self.read_word()
                     if is_number(word):
-                        tok = Token(con.INT, word)
+                        tok = Token(con.INT, word, value=get_int_value(word))
                     elif is_digit(word[0]):
                         tok = Token(con.ILLEGAL, word)
                     else:
@@ -98,6 +100,7 @@ class Lexer:
                 else:
                     tok = Token(con.ILLEGAL, self.ch)
 
+        tok.start = start
         self.read_char()
         return tok
     
@@ -111,11 +114,22 @@ class Lexer:
 
     
     def skip_whitespace(self):
-        while self.ch == ' ' or self.ch == '\t' or self.ch == '\n' or self.ch == '\r':
-            self.read_char()
+        # whitespace and comments are skipped in one regex step instead of char by char
+        if self.ch == ' ' or self.ch == '\t' or self.ch == '\n' or self.ch == '\r' or self.ch == '/':
+            end = SKIP_RE.match(self.input, self.position).end()
+            if end > self.position:
+                self.read_position = end
+                self.read_char()
+
 
+CLASSIC_ENGINE = 'classic'
+REGEX_ENGINE = 'regex'
 
-def new_lexer(input: str) -> Lexer:
+def new_lexer(input: str, engine: str = CLASSIC_ENGINE) -> Lexer | RegexLexer:
+    if engine == REGEX_ENGINE:
+        return RegexLexer(input= input)
+    if engine != CLASSIC_ENGINE:
+        raise ValueError(f"unknown lexer engine: {engine}")
     l = Lexer(input= input)
     l.read_char()
     return l
@@ -12,7 +12,7 @@ class TestNextToken(unittest.TestCase):
             x + y;
             };
             maan_le result = add(five, ten);
-            !-/*5;
+            !-/ *5;
             5 < 10 > 5;
             if (5 < 10) {
             ye_lo true;
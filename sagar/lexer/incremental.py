@@ -0,0 +1,102 @@
+from array import array
+from bisect import bisect_left
+from sagar.lexer.regex_lexer import TOKEN_RE, single_char_types, get_word_type
+from sagar.lexer.token_stream import TokenStream, tokenize_all
+from sagar.my_token.token import Constants
+
+
+def relex(stream: TokenStream, offset: int, deleted: int, inserted: str) -> TokenStream:
+    # Applies a text edit to stream in place, re-tokenizing only the damaged region.
+    # Tokens before the edit are kept as they are and tokens after it are kept (with
+    # shifted offsets) from the point where the new token boundaries line up with the old ones.
+    res, _ = relex_counted(stream, offset, deleted, inserted)
+    return res
+
+
+def relex_counted(stream: TokenStream, offset: int, deleted: int, inserted: str) -> tuple[TokenStream, int]:
+    old_source = stream.source
+    if offset < 0 or deleted < 0 or offset + deleted > len(old_source):
+        raise ValueError(f"edit ({offset}, {deleted}) out of range for source of length {len(old_source)}")
+
+    source = old_source[:offset] + inserted + old_source[offset + deleted:]
+
+    # a quote changes which side of every later '"' is inside a string
+    if '"' in inserted or '"' in old_source[offset:offset + deleted]:
+        res = tokenize_all(source)
+        stream.source, stream.types, stream.starts, stream.ends = res.source, res.types, res.starts, res.ends
+        stream.gap, stream.tail_delta = res.gap, res.tail_delta
+        return stream, len(stream)
+
+    # first token that ends at or after the edit. A token ending exactly at the edit
+    # can still grow (e.g. an identifier gaining a character).
+    first = bisect_left(stream.ends, offset - 1, 0, stream.gap)
+    if first == stream.gap:
+        first = bisect_left(stream.ends, offset - 1 - stream.tail_delta, stream.gap, len(stream))
+    while stream.token_end(first) < offset:
+        first += 1
+    restart = stream.token_end(first - 1) if first > 0 else 0
+
+    delta = len(inserted) - deleted
+    old_count = len(stream)
+
+    # first old token that lies completely after the deleted text
+    resume = first
+    while resume < old_count and stream.token_start(resume) < offset + deleted:
+        resume += 1
+
+    new_types = array('B')
+    new_starts = array('l')
+    new_ends = array('l')
+    synced = False
+
+    for m in TOKEN_RE.finditer(source, restart):
+        kind = m.lastgroup
+        if kind is None:
+            break
+        token_start = m.start(kind) - 1 if kind == 'string' else m.start(kind)
+
+        while resume < old_count and stream.token_start(resume) + delta < token_start:
+            resume += 1
+        if resume < old_count and stream.token_start(resume) + delta == token_start:
+            synced = True
+            break
+
+        if kind == 'word':
+            tok_type = get_word_type(m.group('word'))
+        elif kind == 'string':
+            tok_type = Constants.STRING
+        elif kind == 'two_char':
+            tok_type = Constants.EQ if m.group('two_char') == '==' else Constants.NOT_EQ
+        else:
+            tok_type = single_char_types.get(m.group('char'), Constants.ILLEGAL)
+        new_types.append(tok_type)
+        new_starts.append(m.start(kind))
+        new_ends.append(m.end(kind))
+
+    if not synced:
+        # ran into the end of the source: only the EOF token is left to reuse
+        resume = old_count - 1
+
+    # tokens from resume on only move by delta, which is folded into tail_delta
+    stream.move_gap(resume)
+    stream.types[first:resume] = new_types
+    stream.starts[first:resume] = new_starts
+    stream.ends[first:resume] = new_ends
+    stream.gap = first + len(new_types)
+    stream.tail_delta += delta
+    stream.source = source
+    return stream, len(new_types)
+
+
+class IncrementalLexer:
+    def __init__(self, source: str):
+        self.stream: TokenStream = tokenize_all(source)
+        self.relexed = len(self.stream)
+
+    @property
+    def source(self) -> str:
+        return self.stream.source
+
+    def edit(self, offset: int, deleted: int, inserted: str) -> TokenStream:
+        self.stream, self.relexed = relex_counted(self.stream, offset, deleted, inserted)
+        return self.stream
@@ -0,0 +1,63 @@
+import random
+import unittest
+from sagar.lexer.incremental import IncrementalLexer, relex
+from sagar.lexer.token_stream import tokenize_all, TokenStream
+
+
+class TestIncrementalLexer(unittest.TestCase):
+
+    def validate_same_stream(self, got: TokenStream, idx: int = -1):
+        expected = tokenize_all(got.source)
+        got_cols = (list(got.types), [got.start(i) for i in range(len(got))], [got.end(i) for i in range(len(got))])
+        exp_cols = (list(expected.types), list(expected.starts), list(expected.ends))
+        self.assertTrue(got_cols == exp_cols, f'stream -> {idx} for {got.source!r} = {got_cols} != {exp_cols}')
+
+    def test_edits(self):
+        src = 'maan_le abc = 10;\nprint(abc + 2);\n'
+        edits = [
+            (12, 0, '0'),     # maan_le abc =0 10;
+            (8, 3, 'xyzw'),   # rename identifier
+            (17, 0, '='),     # turn = into ==
+            (0, 0, '   '),    # leading whitespace
+            (10, 1, ''),      # delete a character inside an identifier
+        ]
+        il = IncrementalLexer(src)
+        for i, (offset, deleted, inserted) in enumerate(edits):
+            expected_source = il.source[:offset] + inserted + il.source[offset + deleted:]
+            stream = il.edit(offset, deleted, inserted)
+            self.assertTrue(stream.source == expected_source, f'stream.source -> {i} = {stream.source!r} != {expected_source!r}')
+            self.validate_same_stream(stream, idx=i)
+
+    def test_random_edits(self):
+        rng = random.Random(3)
+        alphabet = 'ab_1 \n"=!;(){}+-/*'
+        for i in range(500):
+            il = IncrementalLexer(''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 40))))
+            for _ in range(4):
+                offset = rng.randint(0, len(il.source))
+                deleted = rng.randint(0, min(3, len(il.source) - offset))
+                inserted = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 3)))
+                self.validate_same_stream(il.edit(offset, deleted, inserted), idx=i)
+
+    def test_only_damaged_region_is_relexed(self):
+        src = 'maan_le a = 1 + 2;\n' * 2000
+        il = IncrementalLexer(src)
+        offset = len(src) // 2 + 8  # inside the name of a statement in the middle
+        il.edit(offset, 1, 'bc')
+        self.assertTrue(il.relexed <= 2, f'il.relexed = {il.relexed}. Expected the edit to re-lex at most 2 tokens')
+        self.validate_same_stream(il.stream)
+
+    def test_quote_falls_back_to_full_lex(self):
+        il = IncrementalLexer('maan_le a = 1; maan_le b = 2;')
+        stream = il.edit(12, 0, '"')
+        self.assertTrue(il.relexed == len(stream), f'il.relexed = {il.relexed} != {len(stream)}')
+        self.validate_same_stream(stream)
+
+    def test_out_of_range_edit(self):
+        stream = tokenize_all('abc')
+        with self.assertRaises(ValueError):
+            relex(stream, 2, 5, '')
+
+
+if __name__ == '__main__':
+    unittest.main()
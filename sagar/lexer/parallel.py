@@ -0,0 +1,79 @@
+import os
+import re
+from array import array
+from concurrent.futures import Executor, ProcessPoolExecutor
+from sagar.lexer.token_stream import TokenStream, tokenize_all
+from sagar.my_token.token import Constants
+
+DEFAULT_MIN_CHUNK_SIZE = 256 * 1024
+
+# strings and comments are consumed whole, so their quotes, braces and newlines never count
+SPLIT_SCAN_RE = re.compile(r'''
+    "[^"]*"?
+  | //[^\n]*
+  | /\*(?:[^*]+|\*(?!/))*(?:\*/)?
+  | [{}\n]
+''', re.VERBOSE)
+
+
+def find_split_points(source: str, parts: int) -> list[int]:
+    # Offsets just after a newline that is outside of any string or comment and at
+    # brace depth 0, roughly evenly spaced. Lexing the pieces independently yields the
+    # same tokens.
+    if parts < 2:
+        return []
+    step = len(source) // parts
+    target = step
+    splits: list[int] = []
+    depth = 0
+
+    for m in SPLIT_SCAN_RE.finditer(source):
+        ch = m.group()
+        if ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth = max(depth - 1, 0)
+        elif ch == '\n' and depth == 0 and m.start() >= target:
+            splits.append(m.end())
+            if len(splits) == parts - 1:
+                break
+            target = m.end() + step
+    return splits
+
+
+def tokenize_chunk(chunk: str, offset: int) -> tuple[array, array, array]:
+    stream = tokenize_all(chunk)
+    count = len(stream) - 1  # the chunk's EOF is not part of the stitched stream
+    starts = array('l', map(offset.__add__, stream.starts[:count]))
+    ends = array('l', map(offset.__add__, stream.ends[:count]))
+    return stream.types[:count], starts, ends
+
+
+def tokenize_parallel(source: str, workers: int | None = None, executor: Executor | None = None, min_chunk_size: int = DEFAULT_MIN_CHUNK_SIZE) -> TokenStream:
+    # Same result as tokenize_all(source), with the lexing of independent top level
+    # chunks spread over a process pool.
+    workers = workers or os.cpu_count() or 1
+    parts = min(workers, len(source) // max(min_chunk_size, 1))
+    splits = find_split_points(source, parts)
+    if not splits:
+        return tokenize_all(source)
+
+    bounds = list(zip([0] + splits, splits + [len(source)]))
+    chunks = [source[start:end] for start, end in bounds]
+    offsets = [start for start, _ in bounds]
+
+    if executor is None:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pieces = list(pool.map(tokenize_chunk, chunks, offsets))
+    else:
+        pieces = list(executor.map(tokenize_chunk, chunks, offsets))
+
+    stream = TokenStream(source)
+    for types, starts, ends in pieces:
+        stream.types.extend(types)
+        stream.starts.extend(starts)
+        stream.ends.extend(ends)
+    stream.types.append(Constants.EOF)
+    stream.starts.append(len(source))
+    stream.ends.append(len(source))
+    return stream
@@ -0,0 +1,57 @@
+import re
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from sagar.lexer.parallel import find_split_points, tokenize_parallel
+from sagar.lexer.token_stream import tokenize_all, TokenStream
+
+SOURCE = '''maan_le add = golmaal(x, y) {
+    ye_lo x + y;
+};
+maan_le s = "a string
+spanning { lines";
+if (add(1, 2) == 3) {
+    print(s);
+}
+maan_le arr = [1, 2, 3]; // "quote and { brace
+/* block comment with {
+"quote */
+'''
+
+
+class TestParallelLexing(unittest.TestCase):
+
+    def validate_same_stream(self, got: TokenStream, expected: TokenStream):
+        got_cols = (list(got.types), list(got.starts), list(got.ends))
+        exp_cols = (list(expected.types), list(expected.starts), list(expected.ends))
+        self.assertTrue(got_cols == exp_cols, 'parallel token stream differs from tokenize_all')
+
+    def test_split_points(self):
+        source = SOURCE * 20
+        splits = find_split_points(source, 8)
+        self.assertTrue(len(splits) == 7, f'len(splits) = {len(splits)} != 7')
+        for split in splits:
+            before = re.sub(r'"[^"]*"|//[^\n]*|/\*.*?\*/', '', source[:split], flags=re.DOTALL)
+            self.assertTrue(source[split - 1] == '\n', f'split {split} is not right after a newline')
+            self.assertTrue('"' not in before, f'split {split} is inside a string')
+            self.assertTrue(before.count('{') == before.count('}'), f'split {split} is inside braces')
+
+    def test_no_split_inside_unterminated_string(self):
+        source = 'maan_le a = 1;\n' * 10 + '"open\n' + 'maan_le b = 2;\n' * 10
+        for split in find_split_points(source, 4):
+            self.assertTrue(split <= source.index('"'), f'split {split} is after the unterminated string')
+
+    def test_matches_serial_lexer(self):
+        source = SOURCE * 200
+        expected = tokenize_all(source)
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            for workers in [2, 3, 7]:
+                got = tokenize_parallel(source, workers=workers, executor=pool, min_chunk_size=64)
+                self.validate_same_stream(got, expected)
+
+    def test_small_input_stays_serial(self):
+        source = SOURCE
+        self.validate_same_stream(tokenize_parallel(source, workers=4), tokenize_all(source))
+
+
+if __name__ == '__main__':
+    unittest.main()
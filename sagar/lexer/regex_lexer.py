@@ -0,0 +1,144 @@
+import re
+from sagar.my_token import token
+from sagar.my_token.token import Token, TokenType, Constants
+
+
+# Whitespace, // line comments and /* block comments */ (an unterminated one runs to
+# the end of the input). The quantifiers are plain greedy ones (possessive ones need
+# Python 3.11): what follows the skipped text in TOKEN_RE matches any character that is
+# not whitespace, or the end, so the first, longest skip always succeeds and the regex
+# never backtracks into it.
+SKIP_PATTERN = r'''
+    (?:
+        [ \t\n\r]+
+      | //[^\n]*
+      | /\*(?:[^*]+|\*(?!/))*(?:\*/)?
+    )*
+'''
+
+SKIP_RE = re.compile(SKIP_PATTERN, re.VERBOSE)
+
+# Whitespace and comments are skipped in bulk and whole words/strings are consumed in
+# a single match, so the per-character read_char/peek_char loop of the classic Lexer
+# is replaced by one C-level regex step per token. Matching the end of the input
+# (lastgroup None) keeps finditer from searching past an unterminated comment.
+TOKEN_RE = re.compile(SKIP_PATTERN + r'''
+    (?:
+        (?P<word>[A-Za-z0-9_]+)
+      | "(?P<string>[^"]*)"?
+      | (?P<two_char>[=!]=)
+      | (?P<char>[^ \t\n\r])
+      | \Z
+    )
+''', re.VERBOSE)
+
+single_char_types = {
+    '=': Constants.ASSIGN,
+    ';': Constants.SEMICOLON,
+    '(': Constants.LPAREN,
+    ')': Constants.RPAREN,
+    ',': Constants.COMMA,
+    '+': Constants.PLUS,
+    '{': Constants.LBRACE,
+    '}': Constants.RBRACE,
+    '!': Constants.BANG,
+    '-': Constants.MINUS,
+    '/': Constants.SLASH,
+    '<': Constants.LT,
+    '>': Constants.GT,
+    '*': Constants.ASTERISK,
+    '[': Constants.LBRACKET,
+    ']': Constants.RBRACKET,
+}
+
+
+def get_word_type(word: str) -> TokenType:
+    if word.isdigit():
+        return Constants.INT
+    if word[0] <= '9':
+        # words are [A-Za-z0-9_]+, so anything sorting below '9' starts with a digit
+        return Constants.ILLEGAL
+    return token.get_ident_type(word)
+
+
+def get_int_value(word: str) -> int | None:
+    try:
+        return int(word)
+    except ValueError:
+        # longer than sys.get_int_max_str_digits(); the parser reports it
+        return None
+
+
+def word_token(word: str, start: int) -> Token:
+    tok_type = get_word_type(word)
+    if tok_type == Constants.INT:
+        return Token(tok_type, word, start, get_int_value(word))
+    return Token(tok_type, word, start)
+
+
+class RegexLexer:
+    def __init__(self, input: str):
+        self.input = input
+        self.position = 0
+
+    def next_token(self) -> Token:
+        m = TOKEN_RE.match(self.input, self.position)
+        if m is None or m.lastgroup is None:
+            self.position = len(self.input)
+            return Token(Constants.EOF, '', self.position)
+
+        self.position = m.end()
+        kind = m.lastgroup
+
+        if kind == 'word':
+            return word_token(m.group('word'), m.start('word'))
+        if kind == 'string':
+            return Token(Constants.STRING, m.group('string'), m.start('string') - 1)
+        if kind == 'two_char':
+            literal = m.group('two_char')
+            return Token(token.get_two_char_type(literal), literal, m.start('two_char'))
+
+        ch = m.group('char')
+        return Token(single_char_types.get(ch, Constants.ILLEGAL), ch, m.start('char'))
+
+
+# Skips every token except brackets and ILLEGAL ones in a single match: identifiers,
+# keywords, integers, strings, operators, whitespace and comments. What is left is a
+# bracket, an ILLEGAL token (a word starting with a digit that is not an integer, or
+# any other character) or the end of the input. As in SKIP_PATTERN, the alternatives
+# after the skip match anything, so the skip is never backtracked into; an integer is
+# only skipped when no word character follows its last digit.
+BRACKET_SCAN_RE = re.compile(r'''
+    (?:
+        [ \t\n\r]+
+      | //[^\n]*
+      | /\*(?:[^*]+|\*(?!/))*(?:\*/)?
+      | [A-Za-z_][A-Za-z0-9_]*
+      | [0-9]+(?![A-Za-z0-9_])
+      | "[^"]*"?
+      | [=;,+!\-/<>*]
+    )*
+    (?:
+        (?P<bracket>[(){}\[\]])
+      | (?P<illegal>[A-Za-z0-9_]+|.)
+      | \Z
+    )
+''', re.VERBOSE)
+
+
+def bracket_tokens(source: str, start: int):
+    # The bracket and ILLEGAL tokens RegexLexer would return from start, then EOF,
+    # without building the others. Used to brace match lazily parsed function bodies.
+    position = start
+    while True:
+        m = BRACKET_SCAN_RE.match(source, position)
+        kind = m.lastgroup
+        if kind is None:
+            yield Token(Constants.EOF, '', len(source))
+            return
+        position = m.end()
+        if kind == 'bracket':
+            ch = m.group('bracket')
+            yield Token(single_char_types[ch], ch, m.start('bracket'))
+        else:
+            yield Token(Constants.ILLEGAL, m.group('illegal'), m.start('illegal'))
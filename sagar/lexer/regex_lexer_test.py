@@ -0,0 +1,156 @@
+import random
+import re
+import unittest
+from sagar.lexer.Lexer import new_lexer, CLASSIC_ENGINE, REGEX_ENGINE
+from sagar.lexer.parallel import SPLIT_SCAN_RE
+from sagar.lexer.regex_lexer import RegexLexer, bracket_tokens, TOKEN_RE, BRACKET_SCAN_RE
+from sagar.my_token.token import Constants, TokenType
+
+
+class TestRegexLexerParity(unittest.TestCase):
+
+    def lex_all(self, inp: str, engine: str) -> list[tuple[TokenType, str, int, int | None]]:
+        return self.lex_all_from(new_lexer(inp, engine=engine))
+
+    def lex_all_from(self, l) -> list[tuple[TokenType, str, int, int | None]]:
+        res = []
+        while True:
+            tok = l.next_token()
+            res.append((tok.token_type, tok.literal, tok.start, tok.value))
+            if tok.token_type == Constants.EOF:
+                return res
+
+    def validate_parity(self, inp: str, idx: int = -1):
+        classic = self.lex_all(inp, CLASSIC_ENGINE)
+        regex = self.lex_all(inp, REGEX_ENGINE)
+        self.assertTrue(classic == regex, f'token streams differ for input {idx} = {inp!r}.\nclassic = {classic}\nregex = {regex}')
+
+    def test_lexer_test_input(self):
+        inp = '''
+            maan_le five = 5;
+            maan_le ten = 10;
+            maan_le add = golmaal(x, y) {
+            x + y;
+            };
+            maan_le result = add(five, ten);
+            !-/*5;
+            5 < 10 > 5;
+            if (5 < 10) {
+            ye_lo true;
+            } else {
+            ye_lo false;
+            }
+            10 == 10;
+            10 != 9;
+            "foobar"
+            "foo bar"
+            [1, 2];
+        '''
+        self.validate_parity(inp)
+
+    def test_edge_cases(self):
+        inps = [
+            '',
+            '   \t\r\n  ',
+            'x',
+            '  trailing   ',
+            '"unterminated string',
+            '""',
+            '"a""b"',
+            '"multi\nline"',
+            '12abc 007 _under __ a_1',
+            '== != = ! !== ===',
+            'a==b!=c',
+            '@ # $ % ^ & ~ ` ? : . \\ |',
+            'maan_le é = 5;',
+            'while(x){break; continue;}',
+            'golmaal(a, b){ye_lo a + b*2;}(1, 2)',
+            'x\x0by',
+            '\x00',
+            '// only a comment',
+            'a // comment\nb',
+            'a /* block\n comment */ b',
+            'a /* unterminated block',
+            'a /* stars ** / */ b',
+            '/**/x/***/y',
+            'a / b * c',
+            '"not // a comment" x',
+            '1 /* x */ / 2',
+        ]
+        for i, inp in enumerate(inps):
+            self.validate_parity(inp, idx=i)
+
+    def test_random_inputs(self):
+        rng = random.Random(42)
+        alphabet = 'abcXYZ_0129 \t\n\r"=!;(),+{}-/<>*[]@.'
+        for i in range(500):
+            inp = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 60)))
+            self.validate_parity(inp, idx=i)
+
+    def test_comments(self):
+        inp = '''
+            // line comment with "quote and { brace
+            maan_le a = 10; // trailing
+            /* block
+               comment */ maan_le b = a / 2 * 3;
+            /* unterminated ye_lo a;
+        '''
+        expected = [
+            (Constants.LET, 'maan_le'), (Constants.IDENT, 'a'), (Constants.ASSIGN, '='), (Constants.INT, '10'), (Constants.SEMICOLON, ';'),
+            (Constants.LET, 'maan_le'), (Constants.IDENT, 'b'), (Constants.ASSIGN, '='), (Constants.IDENT, 'a'), (Constants.SLASH, '/'),
+            (Constants.INT, '2'), (Constants.ASTERISK, '*'), (Constants.INT, '3'), (Constants.SEMICOLON, ';'), (Constants.EOF, ''),
+        ]
+        for engine in [CLASSIC_ENGINE, REGEX_ENGINE]:
+            got = [(tok_type, literal) for tok_type, literal, _, _ in self.lex_all(inp, engine)]
+            self.assertTrue(got == expected, f'{engine} tokens = {got} != {expected}')
+
+    def test_int_values(self):
+        for engine in [CLASSIC_ENGINE, REGEX_ENGINE]:
+            values = [value for tok_type, _, _, value in self.lex_all('0 007 42 x 12abc', engine) if tok_type == Constants.INT]
+            self.assertTrue(values == [0, 7, 42], f'{engine} int values = {values} != [0, 7, 42]')
+
+            huge = '9' * 5000  # above the default int max str digits
+            tok = new_lexer(huge, engine=engine).next_token()
+            self.assertTrue(tok.token_type == Constants.INT and tok.value is None, f'{engine} gave {tok.token_type} with value {tok.value} for a huge literal')
+
+    def test_bracket_tokens(self):
+        # the bracket scan returns exactly the bracket, ILLEGAL and EOF tokens of RegexLexer
+        kept = {Constants.LPAREN, Constants.RPAREN, Constants.LBRACE, Constants.RBRACE, Constants.LBRACKET, Constants.RBRACKET, Constants.ILLEGAL, Constants.EOF}
+        rng = random.Random(7)
+        alphabet = 'abcXYZ_0129 \t\n\r"=!;(),+{}-/<>*[]@.é'
+        inps = ['a /* ( */ b // ]\n[ "{" ]', '12abc (1) a1 _1', '"unterminated ( string', '/* unterminated {']
+        inps += [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 60))) for _ in range(500)]
+        for i, inp in enumerate(inps):
+            start = rng.randint(0, len(inp))
+            l = RegexLexer(inp)
+            l.position = start
+            exp = [(tok_type, literal, tok_start) for tok_type, literal, tok_start, _ in self.lex_all_from(l) if tok_type in kept]
+            got = [(tok.token_type, tok.literal, tok.start) for tok in bracket_tokens(inp, start)]
+            self.assertTrue(got == exp, f'bracket tokens differ for input {i} = {inp!r} from {start}.\nexpected = {exp}\ngot = {got}')
+
+    def test_python_310_patterns(self):
+        # possessive quantifiers and atomic groups need Python 3.11 to compile
+        for name, pattern in [('TOKEN_RE', TOKEN_RE), ('BRACKET_SCAN_RE', BRACKET_SCAN_RE), ('SPLIT_SCAN_RE', SPLIT_SCAN_RE)]:
+            found = re.findall(r'[+*?}]\+|\(\?>', pattern.pattern)
+            self.assertTrue(found == [], f'{name} uses {found}')
+
+        # a digit run followed by a word character is one ILLEGAL token, not a shorter integer
+        got = [(tok.token_type, tok.literal) for tok in bracket_tokens('123abc ( 12_ 7', 0)]
+        exp = [(Constants.ILLEGAL, '123abc'), (Constants.LPAREN, '('), (Constants.ILLEGAL, '12_'), (Constants.EOF, '')]
+        self.assertTrue(got == exp, f'got = {got} != {exp}')
+
+    def test_repeated_eof(self):
+        l = new_lexer('x', engine=REGEX_ENGINE)
+        self.assertTrue(isinstance(l, RegexLexer), f'new_lexer did not return a RegexLexer. It returned {type(l)}')
+        l.next_token()
+        for i in range(3):
+            tok = l.next_token()
+            self.assertTrue(tok.token_type == Constants.EOF, f'tok {i} is not EOF. Its {tok.token_type}')
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            new_lexer('x', engine='nope')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import codecs
+from typing import BinaryIO, TextIO
+from sagar.my_token import token
+from sagar.my_token.token import Token, Constants
+from sagar.lexer.regex_lexer import TOKEN_RE, single_char_types, word_token
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class StreamingLexer:
+    # Lexes a file object (text or binary) or an mmap in fixed size chunks. Only the
+    # unconsumed tail of the current chunk is kept in memory, plus whatever a single
+    # token needs when it straddles a chunk boundary.
+    def __init__(self, source: TextIO | BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE, encoding: str = 'utf-8'):
+        self.source = source
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder(encoding)()
+        self.buffer = ''
+        self.position = 0  # into buffer
+        self.offset = 0    # absolute offset of buffer[0] in the source
+        self.eof = False
+
+    def read_chunk(self, size: int):
+        chunk = self.source.read(size)
+        if isinstance(chunk, (bytes, bytearray)):
+            text = self.decoder.decode(chunk, final=not chunk)
+        else:
+            text = chunk
+        if not chunk:
+            self.eof = True
+
+        # drop what has already been tokenized
+        self.offset += self.position
+        self.buffer = self.buffer[self.position:] + text
+        self.position = 0
+
+    def next_token(self) -> Token:
+        size = self.chunk_size
+        while True:
+            m = TOKEN_RE.match(self.buffer, self.position)
+            # a match touching the end of the buffer might continue in the next chunk
+            if self.eof or (m is not None and m.end() < len(self.buffer)):
+                break
+            self.read_chunk(size)
+            # each retry matches the token from its start again, so a token spanning many
+            # chunks reads twice as much every time to stay linear in its length
+            size *= 2
+
+        if m is None or m.lastgroup is None:
+            self.position = len(self.buffer)
+            return Token(Constants.EOF, '', self.offset + self.position)
+
+        self.position = m.end()
+        kind = m.lastgroup
+        start = self.offset + m.start(kind)
+
+        if kind == 'word':
+            return word_token(m.group('word'), start)
+        if kind == 'string':
+            return Token(Constants.STRING, m.group('string'), start - 1)
+        if kind == 'two_char':
+            literal = m.group('two_char')
+            return Token(token.get_two_char_type(literal), literal, start)
+
+        ch = m.group('char')
+        return Token(single_char_types.get(ch, Constants.ILLEGAL), ch, start)
+
+
+def new_streaming_lexer(source: TextIO | BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE, encoding: str = 'utf-8') -> StreamingLexer:
+    return StreamingLexer(source, chunk_size=chunk_size, encoding=encoding)
@@ -0,0 +1,84 @@
+import io
+import mmap
+import os
+import tempfile
+import unittest
+from sagar.lexer.Lexer import new_lexer, REGEX_ENGINE
+from sagar.lexer.streaming_lexer import new_streaming_lexer
+from sagar.my_parser.parser import Parser
+from sagar.my_token.token import Constants, TokenType
+
+SOURCE = '''
+// a line comment
+maan_le greeting = "hello, wörld ✓ with a long string literal";
+maan_le add = golmaal(first_argument, second_argument) {
+    ye_lo first_argument + second_argument; /* a block comment
+    that spans lines, with * and / inside */
+};
+if (add(10, 20) == 30) { print(greeting); } else { print("nope"); }
+maan_le x = 5 != 6; [1, 2, 3][0]; "unterminated
+'''
+
+
+class TestStreamingLexer(unittest.TestCase):
+
+    def lex_all(self, l) -> list[tuple[TokenType, str, int]]:
+        res = []
+        while True:
+            tok = l.next_token()
+            res.append((tok.token_type, tok.literal, tok.start))
+            if tok.token_type == Constants.EOF:
+                return res
+
+    def test_chunk_boundaries(self):
+        expected = self.lex_all(new_lexer(SOURCE, engine=REGEX_ENGINE))
+        for chunk_size in [1, 2, 3, 5, 7, 16, 1024]:
+            text_tokens = self.lex_all(new_streaming_lexer(io.StringIO(SOURCE), chunk_size=chunk_size))
+            self.assertTrue(text_tokens == expected, f'text stream tokens with chunk_size = {chunk_size} differ')
+            byte_tokens = self.lex_all(new_streaming_lexer(io.BytesIO(SOURCE.encode('utf-8')), chunk_size=chunk_size))
+            self.assertTrue(byte_tokens == expected, f'byte stream tokens with chunk_size = {chunk_size} differ')
+
+    def test_mmap(self):
+        expected = self.lex_all(new_lexer(SOURCE, engine=REGEX_ENGINE))
+        fd, path = tempfile.mkstemp()
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(SOURCE.encode('utf-8'))
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                got = self.lex_all(new_streaming_lexer(mm, chunk_size=4))
+            self.assertTrue(got == expected, 'mmap tokens differ from the in-memory lexer')
+        finally:
+            os.remove(path)
+
+    def test_bounded_buffer(self):
+        l = new_streaming_lexer(io.StringIO('maan_le a = 1;\n' * 10000), chunk_size=256)
+        longest = 0
+        while l.next_token().token_type != Constants.EOF:
+            longest = max(longest, len(l.buffer))
+        self.assertTrue(longest < 2 * 256, f'buffer grew to {longest} chars with chunk_size = 256')
+
+    def test_long_tokens(self):
+        class CountingReader(io.StringIO):
+            reads = 0
+
+            def read(self, size=-1):
+                self.reads += 1
+                return super().read(size)
+
+        for inp in ['"' + 'a' * 100000 + '";', '/*' + 'a' * 100000 + '*/ 1;']:
+            source = CountingReader(inp)
+            tokens = self.lex_all(new_streaming_lexer(source, chunk_size=16))
+            self.assertTrue(tokens == self.lex_all(new_lexer(inp, engine=REGEX_ENGINE)), f'{inp[:2]}: tokens differ')
+            # the read size doubles while a token continues, so a token of n chars takes
+            # about log2(n / chunk_size) reads instead of n / chunk_size
+            self.assertTrue(source.reads < 20, f'{inp[:2]}: {source.reads} reads')
+
+    def test_parser_over_stream(self):
+        inp = 'maan_le add = golmaal(x, y){ ye_lo x + y; }; add(1, 2);'
+        program = Parser(new_streaming_lexer(io.StringIO(inp), chunk_size=3)).parse_program()
+        expected = Parser(new_lexer(inp)).parse_program()
+        self.assertTrue(str(program) == str(expected), f'{program} != {expected}')
+
+
+if __name__ == '__main__':
+    unittest.main()
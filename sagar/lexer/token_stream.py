@@ -0,0 +1,124 @@
+from array import array
+from sagar.my_token.token import Token, TokenType, Constants, token_types
+from sagar.lexer.regex_lexer import TOKEN_RE, single_char_types, get_word_type, get_int_value
+
+
+
+class TokenStream:
+    # Parallel columns: token type id and the [start, end) slice of the literal in source.
+    # Token objects are only built when somebody indexes into the stream.
+    #
+    # Offsets of tokens at index >= gap are stored relative to tail_delta so that an
+    # incremental edit can shift every later token without rewriting the columns.
+    def __init__(self, source: str):
+        self.source = source
+        self.types = array('B')
+        self.starts = array('l')
+        self.ends = array('l')
+        self.gap = 0
+        self.tail_delta = 0
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, i: int) -> Token:
+        if self.types[i] == Constants.INT:
+            literal = self.literal(i)
+            return Token(Constants.INT, literal, self.start(i), get_int_value(literal))
+        return Token(token_types[self.types[i]], self.literal(i), self.token_start(i))
+
+    def token_type(self, i: int) -> TokenType:
+        return token_types[self.types[i]]
+
+    def start(self, i: int) -> int:
+        if i >= self.gap:
+            return self.starts[i] + self.tail_delta
+        return self.starts[i]
+
+    def end(self, i: int) -> int:
+        if i >= self.gap:
+            return self.ends[i] + self.tail_delta
+        return self.ends[i]
+
+    def literal(self, i: int) -> str:
+        return self.source[self.start(i):self.end(i)]
+
+    def token_start(self, i: int) -> int:
+        # start/end delimit the literal, which excludes the quotes of a string
+        if self.types[i] == Constants.STRING:
+            return self.start(i) - 1
+        return self.start(i)
+
+    def token_end(self, i: int) -> int:
+        end = self.end(i)
+        if self.types[i] == Constants.STRING and end < len(self.source):
+            return end + 1
+        return end
+
+    def move_gap(self, i: int):
+        # only the tokens between the old and the new gap are rewritten
+        delta = self.tail_delta
+        if delta and i > self.gap:
+            self.starts[self.gap:i] = array('l', map(delta.__add__, self.starts[self.gap:i]))
+            self.ends[self.gap:i] = array('l', map(delta.__add__, self.ends[self.gap:i]))
+        elif delta and i < self.gap:
+            self.starts[i:self.gap] = array('l', map((-delta).__add__, self.starts[i:self.gap]))
+            self.ends[i:self.gap] = array('l', map((-delta).__add__, self.ends[i:self.gap]))
+        self.gap = i
+
+    def cursor(self) -> 'TokenCursor':
+        return TokenCursor(self)
+
+
+class TokenCursor:
+    # Drop-in replacement for a Lexer: Parser only needs next_token(), and peek()
+    # allows looking arbitrarily far ahead without re-lexing.
+    def __init__(self, stream: TokenStream):
+        self.stream = stream
+        self.index = 0
+
+    def next_token(self) -> Token:
+        i = self.index
+        if i < len(self.stream) - 1:
+            self.index = i + 1
+        return self.stream[i]
+
+    @property
+    def input(self) -> str:
+        return self.stream.source
+
+    def peek(self, offset: int = 0) -> Token:
+        i = min(self.index + offset, len(self.stream) - 1)
+        return self.stream[i]
+
+
+def tokenize_all(source: str) -> TokenStream:
+    stream = TokenStream(source)
+    types = stream.types
+    starts = stream.starts
+    ends = stream.ends
+    word_ids: dict[str, TokenType] = {}
+
+    for m in TOKEN_RE.finditer(source):
+        kind = m.lastgroup
+        if kind is None:
+            break
+        if kind == 'word':
+            word = m.group('word')
+            type_id = word_ids.get(word)
+            if type_id is None:
+                type_id = word_ids[word] = get_word_type(word)
+        elif kind == 'string':
+            type_id = Constants.STRING
+        elif kind == 'two_char':
+            type_id = Constants.EQ if m.group('two_char') == '==' else Constants.NOT_EQ
+        else:
+            type_id = single_char_types.get(m.group('char'), Constants.ILLEGAL)
+        types.append(type_id)
+        starts.append(m.start(kind))
+        ends.append(m.end(kind))
+
+    types.append(Constants.EOF)
+    starts.append(len(source))
+    ends.append(len(source))
+    return stream
@@ -0,0 +1,75 @@
+import random
+import unittest
+from sagar.lexer.Lexer import new_lexer
+from sagar.lexer.token_stream import tokenize_all, TokenStream
+from sagar.my_parser.parser import Parser
+from sagar.my_token.token import Constants, TokenType
+
+
+class TestTokenStream(unittest.TestCase):
+
+    def lex_all(self, inp: str) -> list[tuple[TokenType, str, int]]:
+        l = new_lexer(inp)
+        res = []
+        while True:
+            tok = l.next_token()
+            res.append((tok.token_type, tok.literal, tok.start))
+            if tok.token_type == Constants.EOF:
+                return res
+
+    def validate_stream(self, inp: str, idx: int = -1):
+        stream = tokenize_all(inp)
+        expected = self.lex_all(inp)
+        got = [(tok.token_type, tok.literal, tok.start) for tok in (stream[i] for i in range(len(stream)))]
+        self.assertTrue(got == expected, f'stream {idx} for {inp!r} = {got} != {expected}')
+
+    def test_matches_lexer(self):
+        inps = [
+            '',
+            '   ',
+            'maan_le five = 5; maan_le add = golmaal(x, y) { x + y; };',
+            '!-/*5; 5 < 10 > 5; 10 == 10; 10 != 9;',
+            '"foobar" "foo bar" [1, 2]; "unterminated',
+            '12abc _x @ é',
+        ]
+        for i, inp in enumerate(inps):
+            self.validate_stream(inp, idx=i)
+
+        rng = random.Random(7)
+        alphabet = 'abc_019 \n"=!;(){}[]+-*/<>,$'
+        for i in range(300):
+            inp = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 50)))
+            self.validate_stream(inp, idx=i)
+
+    def test_columns(self):
+        stream = tokenize_all('maan_le s = "ab";')
+        self.assertTrue(isinstance(stream, TokenStream), f'tokenize_all returned a {type(stream)}')
+        self.assertTrue(len(stream) == 6, f'len(stream) = {len(stream)} != 6')
+        self.assertTrue(stream.types.typecode == 'B', f'stream.types.typecode = {stream.types.typecode} != B')
+        self.assertTrue(list(stream.starts) == [0, 8, 10, 13, 16, 17], f'stream.starts = {list(stream.starts)}')
+        self.assertTrue(list(stream.ends) == [7, 9, 11, 15, 17, 17], f'stream.ends = {list(stream.ends)}')
+        self.assertTrue(stream.token_type(3) == Constants.STRING, f'stream.token_type(3) = {stream.token_type(3)}')
+        self.assertTrue(stream.literal(3) == 'ab', f'stream.literal(3) = {stream.literal(3)}')
+
+    def test_cursor(self):
+        cursor = tokenize_all('a + b').cursor()
+        self.assertTrue(cursor.peek(2).literal == 'b', f'cursor.peek(2).literal = {cursor.peek(2).literal} != b')
+        literals = [cursor.next_token().literal for _ in range(3)]
+        self.assertTrue(literals == ['a', '+', 'b'], f'literals = {literals}')
+        for i in range(3):
+            tok = cursor.next_token()
+            self.assertTrue(tok.token_type == Constants.EOF, f'tok {i} after the end is {tok.token_type}. Not EOF')
+        self.assertTrue(cursor.peek(10).token_type == Constants.EOF, 'peeking past the end did not return EOF')
+
+    def test_parser_over_cursor(self):
+        inp = 'maan_le add = golmaal(x, y){ ye_lo x + y * 2; }; print(add(1, [1, 2][0]));'
+        p1 = Parser(new_lexer(inp))
+        p2 = Parser(tokenize_all(inp).cursor())
+        program1 = p1.parse_program()
+        program2 = p2.parse_program()
+        self.assertTrue(len(p2.errors) == 0, f'parser over cursor has errors: {p2.errors}')
+        self.assertTrue(str(program1) == str(program2), f'{program2} != {program1}')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 import getpass
+import os
 from sagar.my_repl import repl
 
 def main():
@@ -7,7 +8,8 @@ def main():
     print(f"Hello Mr {user}. Welcome to Monkey programming language.")
     print("Feel free to try this:")
 
-    repl.start()
+    # EVAL_BACKEND=closures runs the lines through the closure compiler
+    repl.start(backend=os.environ.get('EVAL_BACKEND', repl.TREE_BACKEND))
 
 if __name__ == "__main__":
     main()
@@ -1,22 +1,32 @@
+import copy
 from abc import ABC, abstractmethod
 from sagar.my_token.token import Token, Constants
 
 class Node(ABC):
+    # hash_cache: structural hash, set on first use by sagar/my_ast/hashing.py
+    __slots__ = ('hash_cache',)
+
     @abstractmethod
     def token_literal(self) -> str:
         pass
 
 class Statement(Node):
+    __slots__ = ()
+
     @abstractmethod
     def statement_node(self):
         pass
 
 class Expression(Node):
+    __slots__ = ()
+
     @abstractmethod
     def expression_node(self):
         pass
 
 class Program(Node):
+    __slots__ = ('statements',)
+
     def __init__(self):
         self.statements: list[Statement] = []
 
@@ -33,6 +43,8 @@ class Program(Node):
             return ''
 
 class Identifier(Expression):
+    __slots__ = ('token', 'value')
+
     def __init__(self, token: Token, value: str):
         self.token = token
         self.value = value
@@ -48,6 +60,8 @@ class Identifier(Expression):
 
 
 class LetStatement(Statement):
+    __slots__ = ('token', 'name', 'value')
+
     def __init__(self, token: Token, name: Identifier, value: Expression):
         self.token: Token = token
         self.name: Identifier = name
@@ -69,6 +83,8 @@ class LetStatement(Statement):
         pass
 
 class ReturnStatement(Statement):
+    __slots__ = ('token', 'value')
+
     def __init__(self, token: Token, value: Expression):
         self.token = token
         self.value = value
@@ -87,6 +103,8 @@ class ReturnStatement(Statement):
         return
 
 class ExpressionStatement(Statement):
+    __slots__ = ('token', 'expression')
+
     def __init__(self, token: Token, expression: Expression):
         self.token = token
         self.expression = expression
@@ -103,9 +121,14 @@ class ExpressionStatement(Statement):
         return
     
 class IntegerLiteral(Expression):
+    # obj_cache: the IntegerObj it evaluates to, set before the program is evaluated by
+    # sagar/my_optimizer/literals.py
+    __slots__ = ('token', 'value', 'obj_cache')
+
     def __init__(self, token: Token, value: int):
         self.token = token
         self.value = value
+        self.obj_cache = None
 
     def __str__(self):
         return self.token.literal
@@ -118,6 +141,8 @@ class IntegerLiteral(Expression):
     
 
 class PrefixExpression(Expression):
+    __slots__ = ('token', 'operator', 'right')
+
     def __init__(self, token: Token, operator: str, right: Expression):
         self.token = token
         self.operator = operator
@@ -140,6 +165,8 @@ class PrefixExpression(Expression):
 
 
 class InfixExpression(Expression):
+    __slots__ = ('token', 'left', 'operator', 'right')
+
     def __init__(self, token, left: Expression, operator, right: Expression):
         self.left = left
         self.token = token
@@ -163,6 +190,8 @@ class InfixExpression(Expression):
 
 
 class Boolean(Expression):
+    __slots__ = ('token', 'value')
+
     def __init__(self, token : Token, value: bool):
         self.token = token
         self.value = value
@@ -178,9 +207,14 @@ class Boolean(Expression):
         
 
 class BlockStatement(Statement):
+    # printed: the body as parsed, set by the optimizer on a function body it rewrote. A
+    # function value prints its body, and optimizing must not change what a program prints.
+    __slots__ = ('token', 'statements', 'printed')
+
     def __init__(self, token: Token):
         self.token = token
         self.statements: list[Statement] = []
+        self.printed: BlockStatement | None = None
     
     def statement_node(self):
         return
@@ -189,9 +223,48 @@ class BlockStatement(Statement):
         return self.token.literal
     
     def __str__(self):
+        printed = getattr(self, 'printed', None)
+        if printed is not None:
+            return str(printed)
         return "; ".join(str(s) for s in self.statements)
-    
+
+
+class LazyBlockStatement(BlockStatement):
+    # A function body that was only brace matched by the parser (lazy_functions). It is
+    # parsed from the source, starting at its '{' token, the first time its statements
+    # are needed. Cached programs are shared between threads, so two threads can parse it
+    # at once: both get equal blocks, and errors is set last, so a thread seeing it set
+    # also sees block.
+    __slots__ = ('source', 'end', 'parser_cls', 'block', 'errors')
+
+    def __init__(self, token: Token, source: str, end: int, parser_cls: type):
+        self.token = token
+        self.source = source
+        # offset of the closing '}'
+        self.end = end
+        self.parser_cls = parser_cls
+        self.block: BlockStatement | None = None
+        # None until the body is parsed
+        self.errors: list[str] | None = None
+
+    def parse(self) -> BlockStatement | None:
+        if self.errors is None:
+            block, errors = self.parser_cls.parse_block_at(self.source, self.token)
+            # a body with syntax errors never runs, as with eager parsing
+            self.block = None if errors else block
+            self.errors = errors
+        return self.block
+
+    @property
+    def statements(self) -> list[Statement]:
+        block = self.parse()
+        if block is None:
+            return []
+        return block.statements
+
 class IfExpression(Expression):
+    __slots__ = ('token', 'condition', 'consequence', 'alternative')
+
     def __init__(self, token: Token, condition: Expression, consequence: BlockStatement, alternative: BlockStatement):
         self.token: Token = token
         self.condition: Expression = condition
@@ -212,6 +285,8 @@ class IfExpression(Expression):
         
 
 class FunctionLiteral(Expression):
+    __slots__ = ('token', 'parameters', 'body')
+
     def __init__(self, token: Token, parameters: BlockStatement = None, body: BlockStatement = None):
         self.token = token
         self.parameters: list[Identifier] = parameters
@@ -228,6 +303,7 @@ class FunctionLiteral(Expression):
     
 
 class CallExpression(Expression):
+    __slots__ = ('token', 'function', 'arguments')
 
     def __init__(self, token: Token, function: Expression):
         self.token: Token = token
@@ -250,9 +326,14 @@ class CallExpression(Expression):
         return ''.join(res)
     
 class StringExpression(Expression):
+    # obj_cache: the StringObj it evaluates to, set before the program is evaluated by
+    # sagar/my_optimizer/literals.py
+    __slots__ = ('token', 'value', 'obj_cache')
+
     def __init__(self, token: Token):
         self.token = token
         self.value = token.literal
+        self.obj_cache = None
     
     def token_literal(self):
         return self.token.literal
@@ -260,8 +341,13 @@ class StringExpression(Expression):
     def expression_node(self):
         return
 
+    def __str__(self):
+        return f'"{self.value}"'
+
 
 class ArrayLiteral(Expression):
+    __slots__ = ('token', 'elements')
+
     def __init__(self, tok: Token, elements: list[Expression]):
         self.token: Token = tok
         self.elements: list[Expression] = elements
@@ -276,6 +362,8 @@ class ArrayLiteral(Expression):
         return  f"[{', '.join(list(map(str, self.elements)))}]"
 
 class IndexExpression(Expression):
+    __slots__ = ('token', 'left', 'index')
+
     def __init__(self, tok: Token, left: Expression, index: Expression):
         self.token: Token = tok
         self.left: Expression = left
@@ -292,6 +380,8 @@ class IndexExpression(Expression):
         
         
 class AssignmentStatement(Statement):
+    __slots__ = ('token', 'left', 'right')
+
     def __init__(self, token: Token, left: Identifier, right: Expression):
         self.token: Token = token
         self.left: Identifier = left
@@ -303,7 +393,12 @@ class AssignmentStatement(Statement):
     def token_literal(self):
         return self.token.literal
 
+    def __str__(self):
+        return f'{str(self.left)} = {str(self.right)}'
+
 class WhileStatement(Statement):
+    __slots__ = ('token', 'condition', 'body')
+
     def __init__(self, token: Token, condition: Expression, body: BlockStatement):
         self.token = token
         self.condition = condition
@@ -313,4 +408,80 @@ class WhileStatement(Statement):
         return
     
     def token_literal(self):
-        return self.token.literal
\ No newline at end of file
+        return self.token.literal
+
+    def __str__(self):
+        return f'while{str(self.condition)} {str(self.body)}'
+
+
+def updated(node: Node, **fields) -> Node:
+    # node with fields replaced, for passes that must not mutate their (possibly shared)
+    # input: a copy when any field changes, node itself otherwise
+    if all(getattr(node, name, None) is value for name, value in fields.items()):
+        return node
+    node = copy.copy(node)
+    node.hash_cache = None
+    if isinstance(node, (IntegerLiteral, StringExpression)):
+        node.obj_cache = None
+    for name, value in fields.items():
+        setattr(node, name, value)
+    return node
+
+
+# Nodes produced by the resolver (sagar/my_optimizer/resolver.py). Subclasses of the
+# parsed nodes, so anything not using the addresses treats them as the originals.
+
+class Scope:
+    # the variables of a function body in slot order: parameters, then the names it
+    # declares with maan_le or assigns to (assignment writes to the current environment)
+    __slots__ = ('names', 'index')
+
+    def __init__(self, names: list[str]):
+        self.names = names
+        self.index: dict[str, int] = {name: slot for slot, name in enumerate(names)}
+
+
+GLOBAL_SLOT = -1
+
+
+class ResolvedIdentifier(Identifier):
+    # depth: number of function environments to go out from the current one. slot: index
+    # in that environment's slots, or GLOBAL_SLOT for a name looked up in the environment
+    # the program runs in (globals, then builtins)
+    __slots__ = ('depth', 'slot')
+
+    def __init__(self, token: Token, value: str, depth: int, slot: int):
+        super().__init__(token, value)
+        self.depth = depth
+        self.slot = slot
+
+
+class ResolvedFunctionLiteral(FunctionLiteral):
+    __slots__ = ('scope',)
+
+    def __init__(self, token: Token, parameters: list[ResolvedIdentifier], body: BlockStatement, scope: Scope):
+        super().__init__(token, parameters, body)
+        self.scope = scope
+
+
+class SharedExpression(Expression):
+    # An expression that occurs more than once in a block, from the common subexpression
+    # pass (sagar/my_optimizer/cse.py). The first occurrence (first=True) evaluates value
+    # and keeps the result in the environment under name, which no identifier can have;
+    # later ones read it back instead of evaluating value again.
+    __slots__ = ('token', 'name', 'value', 'first')
+
+    def __init__(self, token: Token, name: str, value: Expression, first: bool):
+        self.token = token
+        self.name = name
+        self.value = value
+        self.first = first
+
+    def expression_node(self):
+        return
+
+    def token_literal(self):
+        return self.token.literal
+
+    def __str__(self):
+        return str(self.value)
@@ -0,0 +1,197 @@
+from array import array
+from sagar.my_ast.ast import *
+from sagar.lexer.regex_lexer import RegexLexer
+
+# field kinds
+NODE = 0
+VALUE = 1
+LIST = 2
+
+# every node class with its fields, in slot order. The token is not a field: only the
+# offset of its first character is kept, and it is re-lexed from the source on demand.
+node_fields: dict[type, tuple[tuple[str, int], ...]] = {
+    Program: (('statements', LIST),),
+    Identifier: (('value', VALUE),),
+    LetStatement: (('name', NODE), ('value', NODE)),
+    ReturnStatement: (('value', NODE),),
+    ExpressionStatement: (('expression', NODE),),
+    IntegerLiteral: (('value', VALUE),),
+    PrefixExpression: (('operator', VALUE), ('right', NODE)),
+    InfixExpression: (('left', NODE), ('operator', VALUE), ('right', NODE)),
+    Boolean: (('value', VALUE),),
+    BlockStatement: (('statements', LIST),),
+    IfExpression: (('condition', NODE), ('consequence', NODE), ('alternative', NODE)),
+    FunctionLiteral: (('parameters', LIST), ('body', NODE)),
+    CallExpression: (('function', NODE), ('arguments', LIST)),
+    StringExpression: (('value', VALUE),),
+    ArrayLiteral: (('elements', LIST),),
+    IndexExpression: (('left', NODE), ('index', NODE)),
+    AssignmentStatement: (('left', NODE), ('right', NODE)),
+    WhileStatement: (('condition', NODE), ('body', NODE)),
+}
+
+node_types: list[type] = list(node_fields)
+node_kinds: dict[type, int] = {cls: kind for kind, cls in enumerate(node_types)}
+
+
+class FlatAst:
+    # Array-of-structs encoding of a parsed program. Node i is kinds[i] (an index into
+    # node_types), starts[i] (source offset of its token, -1 for Program) and fields[i],
+    # the index in slots of its first field. A field slot holds a node index (-1 for None),
+    # an index into values, or an index into lists, where a list is stored as its length
+    # followed by node indexes (-1 for a None list). Node 0 is the Program.
+    def __init__(self, source: str):
+        self.source = source
+        self.kinds = array('B')
+        self.starts = array('l')
+        self.fields = array('i')
+        self.slots = array('i')
+        self.lists = array('i')
+        self.values: list = []
+        self.value_ids: dict[tuple[type, object], int] = {}
+        self.lexer = RegexLexer(source)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def add_node(self, node: Node) -> int:
+        cls = type(node)
+        if cls not in node_kinds:
+            raise ValueError(f"cannot encode node of type {cls.__name__}")
+        start = -1
+        if cls is not Program:
+            start = node.token.start
+            if start < 0:
+                raise ValueError(f"{cls.__name__} token has no source offset")
+        self.kinds.append(node_kinds[cls])
+        self.starts.append(start)
+        self.fields.append(len(self.slots))
+        self.slots.extend([-1] * len(node_fields[cls]))
+        return len(self.kinds) - 1
+
+    def add_value(self, value) -> int:
+        key = (type(value), value)
+        value_id = self.value_ids.get(key)
+        if value_id is None:
+            value_id = self.value_ids[key] = len(self.values)
+            self.values.append(value)
+        return value_id
+
+    def node_type(self, i: int) -> type:
+        return node_types[self.kinds[i]]
+
+    def token(self, i: int) -> Token | None:
+        start = self.starts[i]
+        if start < 0:
+            return None
+        self.lexer.position = start
+        return self.lexer.next_token()
+
+    def field(self, i: int, k: int) -> int:
+        return self.slots[self.fields[i] + k]
+
+    def list_items(self, list_id: int) -> array:
+        count = self.lists[list_id]
+        return self.lists[list_id + 1:list_id + 1 + count]
+
+    def view(self, i: int) -> 'Node | None':
+        if i < 0:
+            return None
+        view = view_types[self.kinds[i]].__new__(view_types[self.kinds[i]])
+        view.flat_ast = self
+        view.flat_index = i
+        return view
+
+    @property
+    def root(self) -> Program:
+        return self.view(0)
+
+    def decode(self) -> Program:
+        # rebuilds regular nodes, without recursion so deep trees decode too
+        nodes = [self.node_type(i).__new__(self.node_type(i)) for i in range(len(self))]
+        for i, node in enumerate(nodes):
+            cls = type(node)
+            if cls is not Program:
+                node.token = self.token(i)
+            for k, (name, kind) in enumerate(node_fields[cls]):
+                slot = self.field(i, k)
+                if kind == NODE:
+                    setattr(node, name, nodes[slot] if slot >= 0 else None)
+                elif kind == VALUE:
+                    setattr(node, name, self.values[slot])
+                elif slot < 0:
+                    setattr(node, name, None)
+                else:
+                    setattr(node, name, [nodes[item] if item >= 0 else None for item in self.list_items(slot)])
+        return nodes[0]
+
+
+def encode(program: Program, source: str) -> FlatAst:
+    # source is the text program was parsed from; node tokens are stored as offsets into it
+    ast = FlatAst(source)
+    stack = [(program, ast.add_node(program))]
+    while stack:
+        node, i = stack.pop()
+        base = ast.fields[i]
+        for k, (name, kind) in enumerate(node_fields[type(node)]):
+            value = getattr(node, name)
+            if kind == VALUE:
+                ast.slots[base + k] = ast.add_value(value)
+            elif value is None:
+                continue
+            elif kind == NODE:
+                child = ast.add_node(value)
+                ast.slots[base + k] = child
+                stack.append((value, child))
+            else:
+                list_id = len(ast.lists)
+                ast.lists.append(len(value))
+                for item in value:
+                    if item is None:
+                        ast.lists.append(-1)
+                        continue
+                    child = ast.add_node(item)
+                    ast.lists.append(child)
+                    stack.append((item, child))
+                ast.slots[base + k] = list_id
+    return ast
+
+
+def node_getter(k: int):
+    def get(self):
+        return self.flat_ast.view(self.flat_ast.field(self.flat_index, k))
+    return property(get)
+
+
+def value_getter(k: int):
+    def get(self):
+        return self.flat_ast.values[self.flat_ast.field(self.flat_index, k)]
+    return property(get)
+
+
+def list_getter(k: int):
+    def get(self):
+        list_id = self.flat_ast.field(self.flat_index, k)
+        if list_id < 0:
+            return None
+        return [self.flat_ast.view(item) for item in self.flat_ast.list_items(list_id)]
+    return property(get)
+
+
+def token_getter(self):
+    return self.flat_ast.token(self.flat_index)
+
+
+getters = {NODE: node_getter, VALUE: value_getter, LIST: list_getter}
+
+
+def make_view_type(cls: type) -> type:
+    # A subclass of the node class whose fields are read from a FlatAst, so code that
+    # dispatches on isinstance (like the evaluator) walks views the same as nodes
+    namespace = {'__slots__': ('flat_ast', 'flat_index'), 'token': property(token_getter)}
+    for k, (name, kind) in enumerate(node_fields[cls]):
+        namespace[name] = getters[kind](k)
+    return type(f'{cls.__name__}View', (cls,), namespace)
+
+
+view_types: list[type] = [make_view_type(cls) for cls in node_types]
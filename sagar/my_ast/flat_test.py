@@ -0,0 +1,99 @@
+import unittest
+from sagar.lexer.Lexer import new_lexer
+from sagar.my_ast.ast import *
+from sagar.my_ast.flat import FlatAst, encode, node_fields
+from sagar.my_evaluator.evaluator import eval
+from sagar.my_object.object import Environment
+from sagar.my_parser.parser import Parser, IterativeParser
+
+SOURCE = '''
+maan_le add = golmaal(x, y) { ye_lo x + y; };
+maan_le arr = [1, "two", true, add(1, 2), -3, !false];
+maan_le i = 0;
+while (i < 3) {
+    if (i == 1) { print("one", arr[1]); } else { print(i * 10 / 2); }
+    i = i + 1;
+}
+print(len(arr), add(arr[0], arr[3]), "done" + i);
+'''
+
+
+def flatten(node) -> list:
+    # pre-order (type, token, fields) listing of a tree, without recursion
+    res = []
+    stack = [node]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, list):
+            res.append(('list', len(obj)))
+            stack.extend(reversed(obj))
+        elif isinstance(obj, Node):
+            cls = next(cls for cls in type(obj).__mro__ if cls in node_fields)
+            token = None if cls is Program else (obj.token.token_type, obj.token.literal, obj.token.start, obj.token.value)
+            res.append((cls.__name__, token))
+            stack.extend(getattr(obj, name) for name, _ in reversed(node_fields[cls]))
+        else:
+            res.append(obj)
+    return res
+
+
+class TestFlatAst(unittest.TestCase):
+
+    def parse(self, source: str, parser_cls=Parser) -> Program:
+        p = parser_cls(new_lexer(source))
+        program = p.parse_program()
+        self.assertTrue(p.errors == [], f'p.errors = {p.errors}')
+        return program
+
+    def test_round_trip(self):
+        program = self.parse(SOURCE)
+        ast = encode(program, SOURCE)
+        decoded = ast.decode()
+        self.assertTrue(isinstance(ast, FlatAst) and len(ast) == len([n for n in flatten(program) if isinstance(n, tuple) and n[0] != 'list']), 'node count mismatch')
+        self.assertTrue(flatten(decoded) == flatten(program), 'decoded tree differs from the parsed one')
+
+        source = 'maan_le add = golmaal(x, y) { ye_lo x + y; }; if (add(1, 2) > [3][0]) { -add(4, 5) } else { !true }'
+        program = self.parse(source)
+        decoded = encode(program, source).decode()
+        self.assertTrue(str(decoded) == str(program), f'str(decoded) = {str(decoded)} != {str(program)}')
+
+    def test_views(self):
+        program = self.parse(SOURCE)
+        root = encode(program, SOURCE).root
+        self.assertTrue(isinstance(root, Program), f'root is a {type(root)}')
+        self.assertTrue(str(root.statements[0]) == str(program.statements[0]), f'str(root) = {str(root)}')
+        self.assertTrue(flatten(root) == flatten(program), 'view tree differs from the parsed one')
+
+        let: LetStatement = root.statements[0]
+        self.assertTrue(isinstance(let, LetStatement) and let.name.value == 'add', f'statement 0 = {let}')
+        self.assertTrue(let.token_literal() == 'maan_le', f'let.token_literal() = {let.token_literal()}')
+        self.assertTrue([str(p) for p in let.value.parameters] == ['x', 'y'], f'parameters = {let.value.parameters}')
+
+    def test_evaluator_walks_views(self):
+        program = self.parse(SOURCE)
+        env = Environment(print_statements=[])
+        eval(program, env)
+        view_env = Environment(print_statements=[])
+        eval(encode(program, SOURCE).root, view_env)
+        self.assertTrue(view_env.print_statements == env.print_statements, f'{view_env.print_statements} != {env.print_statements}')
+
+    def test_deep_tree(self):
+        depth = 5000
+        source = '-' * depth + '1;'
+        program = self.parse(source, parser_cls=IterativeParser)
+        ast = encode(program, source)
+        self.assertTrue(len(ast) == depth + 3, f'len(ast) = {len(ast)} != {depth + 3}')
+        node = ast.decode().statements[0].expression
+        for _ in range(depth):
+            node = node.right
+        self.assertTrue(isinstance(node, IntegerLiteral) and node.value == 1, f'innermost node = {node}')
+
+    def test_missing_offsets(self):
+        program = Program()
+        program.statements = [ExpressionStatement(Token(Constants.INT, '1'), IntegerLiteral(Token(Constants.INT, '1'), 1))]
+        with self.assertRaises(ValueError):
+            encode(program, '1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import hashlib
+from sagar.my_ast.ast import *
+from sagar.my_ast.flat import node_fields, NODE, VALUE, LIST
+
+# Structural hashes: a 16 byte digest of a node's type, primitive fields and the hashes
+# of its children. Tokens are left out, so the same code formatted differently (spacing,
+# line breaks, comments, redundant parentheses) hashes the same, except the text of a
+# token a node prints as (printed_tokens): a function value prints its body, so 007 and 7
+# are different programs even though both evaluate to 7. Nodes from the resolver
+# hash as the node they were made from, since they only add addresses derived from the
+# names. Digests are stable across processes (unlike hash()), so fingerprints can key
+# caches shared between workers.
+#
+# The hash is cached on the node (Node.hash_cache); ast.updated clears it on copies.
+
+NONE_HASH = b'\0' * 16
+
+# nodes whose __str__ shows their token's text rather than a field
+printed_tokens = (IntegerLiteral, FunctionLiteral)
+
+# class -> (prefix, fields) of every node class seen, found through the MRO
+layouts: dict[type, tuple[bytes, tuple[tuple[str, int], ...]]] = {}
+
+
+def layout(cls: type) -> tuple[bytes, tuple[tuple[str, int], ...]]:
+    res = layouts.get(cls)
+    if res is None:
+        for base in cls.__mro__:
+            fields = node_fields.get(base)
+            if fields is not None:
+                res = layouts[cls] = (base.__name__.encode() + b'\0', fields)
+                return res
+        raise ValueError(f'cannot hash node of type {cls.__name__}')
+    return res
+
+
+def compute_hash(node: Node) -> bytes:
+    # the hashes of its children are cached already
+    cls = type(node)
+    if cls is SharedExpression:
+        # evaluates to its value
+        return node.value.hash_cache
+    if cls is LazyBlockStatement:
+        # not parsed, so hashed by its source text. Its position is included too: syntax
+        # errors found when it is first called report it, so moving it changes the output.
+        data = f'LazyBlockStatement:{node.token.start}:{node.source[node.token.start:node.end + 1]}'
+        return hashlib.blake2b(data.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+    prefix, fields = layout(cls)
+    parts = [prefix]
+    if isinstance(node, printed_tokens):
+        parts.append(repr(node.token.literal).encode('utf-8', 'surrogatepass') + b'\0')
+    for field, kind in fields:
+        value = getattr(node, field)
+        if kind == NODE:
+            parts.append(NONE_HASH if value is None else value.hash_cache)
+        elif kind == VALUE:
+            # repr keeps types apart (1, '1', True) and escapes control characters, so
+            # the terminator is unambiguous
+            parts.append(repr(value).encode('utf-8', 'surrogatepass') + b'\0')
+        elif value is None:
+            parts.append(b'N')
+        else:
+            parts.append(len(value).to_bytes(4, 'little'))
+            parts.extend(NONE_HASH if item is None else item.hash_cache for item in value)
+    if cls is BlockStatement and getattr(node, 'printed', None) is not None:
+        # an optimized function body prints as parsed, so programs printing it differently
+        # must not share a fingerprint
+        parts.append(node.printed.hash_cache)
+    return hashlib.blake2b(b''.join(parts), digest_size=16).digest()
+
+
+def structural_hash(node: Node) -> bytes:
+    res = getattr(node, 'hash_cache', None)
+    if res is not None:
+        return res
+    # pre-order listing of the nodes not hashed yet, without recursion so deeply nested
+    # programs can be hashed; reversed, every node comes after its children
+    order = []
+    stack: list = [node]
+    while stack:
+        current = stack.pop()
+        if current is None or getattr(current, 'hash_cache', None) is not None:
+            continue
+        order.append(current)
+        cls = type(current)
+        if cls is SharedExpression:
+            stack.append(current.value)
+        elif cls is not LazyBlockStatement:
+            if cls is BlockStatement:
+                stack.append(getattr(current, 'printed', None))
+            for field, kind in layout(cls)[1]:
+                if kind == NODE:
+                    stack.append(getattr(current, field))
+                elif kind == LIST:
+                    value = getattr(current, field)
+                    if value:
+                        stack.extend(value)
+    for current in reversed(order):
+        current.hash_cache = compute_hash(current)
+    return node.hash_cache
+
+
+def fingerprint(program: Program) -> str:
+    # key of a program independent of its formatting
+    return structural_hash(program).hex()
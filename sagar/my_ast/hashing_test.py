@@ -0,0 +1,99 @@
+import os
+import subprocess
+import sys
+import unittest
+from sagar.lexer.Lexer import new_lexer
+from sagar.my_ast.ast import *
+from sagar.my_ast.hashing import structural_hash, fingerprint
+from sagar.my_optimizer.resolver import resolve
+from sagar.my_parser.parser import Parser, IterativeParser
+
+
+def parse(source: str, parser_cls=Parser, lazy_functions=False) -> Program:
+    p = parser_cls(new_lexer(source), lazy_functions=lazy_functions)
+    program = p.parse_program()
+    assert p.errors == [], f'p.errors = {p.errors}'
+    return program
+
+
+class TestStructuralHash(unittest.TestCase):
+
+    def test_formatting_independent(self):
+        inps = [
+            ('maan_le a = 1 + 2 * 3; print(a);', 'maan_le  a=1+(2*3)\n\nprint( a )'),
+            ('maan_le f = golmaal(x, y) { ye_lo x + y; };', 'maan_le f = golmaal(x,y) {\n    // adds\n    ye_lo x + y;\n};'),
+            ('if (a < 1) { 1 } else { 2 }', 'if ((a < 1)) {\n 1;\n}\nelse { 2; }'),
+            ('[1, "a b", true][0]', '[ 1 , "a b" , true ] [ 0 ] /* index */'),
+        ]
+        for i, (a, b) in enumerate(inps):
+            self.assertTrue(fingerprint(parse(a)) == fingerprint(parse(b)), f'{i}: {a!r} and {b!r} hash differently')
+
+    def test_distinguishes(self):
+        sources = [
+            'maan_le a = 1;',
+            'maan_le b = 1;',
+            'a = 1;',
+            'maan_le a = "1";',
+            'maan_le a = true;',
+            'maan_le a = 1 + 2 * 3;',
+            'maan_le a = (1 + 2) * 3;',
+            'maan_le a = -1;',
+            'maan_le a = !1;',
+            'f(1, 2)',
+            'f([1, 2])',
+            'f(1)(2)',
+            'golmaal(x) { x }',
+            'golmaal() { x }',
+            'if (a) { 1 }',
+            'if (a) { 1 } else { }',
+            'while (a) { 1 }',
+            '"a b"',
+            '"ab"',
+            # a function value prints its integers as written
+            'golmaal() { 7 }',
+            'golmaal() { 007 }',
+        ]
+        hashes = [fingerprint(parse(source)) for source in sources]
+        self.assertTrue(len(set(hashes)) == len(hashes), f'collisions among {sources}')
+
+    def test_cached_and_invalidated(self):
+        program = parse('maan_le a = 1 + 2;')
+        let = program.statements[0]
+        h = structural_hash(let)
+        self.assertTrue(let.hash_cache == h and let.value.hash_cache is not None, 'hash not cached on the nodes')
+        copy = updated(let, value=IntegerLiteral(let.value.token, 3))
+        self.assertTrue(structural_hash(copy) != h, 'updated copy kept the hash of the original')
+        self.assertTrue(structural_hash(let) == h, 'the original hash changed')
+
+    def test_resolved_hash_same(self):
+        source = 'maan_le a = 1; maan_le f = golmaal(x) { maan_le y = x + a; ye_lo y; }; f(2);'
+        program = parse(source)
+        resolved = resolve(program)
+        self.assertTrue(fingerprint(resolved) == fingerprint(program), 'resolving changed the fingerprint')
+
+    def test_lazy_bodies(self):
+        source = 'maan_le f = golmaal(x) { ye_lo x; };'
+        a = fingerprint(parse(source, lazy_functions=True))
+        b = fingerprint(parse(source, lazy_functions=True))
+        moved = fingerprint(parse('\n' + source, lazy_functions=True))
+        changed = fingerprint(parse(source.replace('x;', 'x + 1;'), lazy_functions=True))
+        self.assertTrue(a == b, 'the same lazy program hashed differently')
+        self.assertTrue(len({a, moved, changed}) == 3, 'lazy bodies hashed without their position or text')
+
+    def test_deep_program(self):
+        program = parse('-' * 50000 + '1;', parser_cls=IterativeParser)
+        self.assertTrue(len(fingerprint(program)) == 32, 'deep program was not hashed')
+
+    def test_stable_across_processes(self):
+        source = 'maan_le a = [1, "x"]; print(a[0] + len(a));'
+        code = f'from sagar.my_ast.hashing_test import parse; from sagar.my_ast.hashing import fingerprint; print(fingerprint(parse({source!r})))'
+        outputs = set()
+        for seed in ['1', '2']:
+            env = {**os.environ, 'PYTHONHASHSEED': seed}
+            res = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, env=env, check=True)
+            outputs.add(res.stdout.strip())
+        self.assertTrue(outputs == {fingerprint(parse(source))}, f'fingerprints differ between processes: {outputs}')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,363 @@
+import gc
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+from sagar.my_ast.ast import *
+from sagar.my_ast.flat import encode, node_fields, node_types
+from sagar.lexer.regex_lexer import get_int_value
+from sagar.my_token.token import token_types
+
+# Binary format, all integers little endian:
+#   header   MAGIC, FORMAT_VERSION (u16), node type count (u16), CRC-32 of everything
+#            after the header (u32) and, per node type, its name and field names, so a
+#            file written for another node layout is rejected
+#   counts   nodes, slots, list entries, values, errors (u32 each)
+#   columns  per node: kind (u8), token type (u8), token start (i64), token literal value
+#            id (i32, -1 for Program), first field slot (i32); then the slots and lists
+#            arrays of FlatAst (i32)
+#   values   tagged: str (u32 length + utf-8), int (u16 length + signed bytes), False, True, None
+#   errors   parser error messages, as str values
+# Only plain data is stored, never pickled objects, so loading cannot run arbitrary code.
+# Damaged data (a failed checksum, or references outside the arrays) raises ValueError.
+MAGIC = b'GAST'
+FORMAT_VERSION = 2
+
+STR = 0
+INT = 1
+FALSE = 2
+TRUE = 3
+NONE = 4
+
+HEADER = struct.Struct('<4sHHI')
+COUNTS = struct.Struct('<5I')
+
+
+def layout_signature() -> bytes:
+    names = [f"{cls.__name__}:{','.join(name for name, _ in node_fields[cls])}" for cls in node_types]
+    return ';'.join(names).encode('ascii')
+
+
+LAYOUT = layout_signature()
+
+
+def column(typecode: str, values) -> bytes:
+    col = array(typecode, values)
+    if sys.byteorder != 'little':
+        col.byteswap()
+    return col.tobytes()
+
+
+def read_column(typecode: str, data, offset: int, count: int) -> tuple[array, int]:
+    col = array(typecode)
+    end = offset + count * col.itemsize
+    if end > len(data):
+        raise ValueError('truncated AST data')
+    col.frombytes(data[offset:end])
+    if sys.byteorder != 'little':
+        col.byteswap()
+    return col, end
+
+
+def write_value(out: list[bytes], value):
+    if value is None:
+        out.append(bytes([NONE]))
+    elif value is True or value is False:
+        out.append(bytes([TRUE if value else FALSE]))
+    elif isinstance(value, int):
+        raw = value.to_bytes((value.bit_length() + 8) // 8, 'little', signed=True)
+        out.append(struct.pack('<BH', INT, len(raw)) + raw)
+    elif isinstance(value, str):
+        raw = value.encode('utf-8', 'surrogatepass')
+        out.append(struct.pack('<BI', STR, len(raw)) + raw)
+    else:
+        raise ValueError(f'cannot serialize value of type {type(value).__name__}')
+
+
+def read_value(data, offset: int) -> tuple[object, int]:
+    if offset >= len(data):
+        raise ValueError('truncated AST data')
+    tag = data[offset]
+    offset += 1
+    if tag == NONE:
+        return None, offset
+    if tag == TRUE or tag == FALSE:
+        return tag == TRUE, offset
+    if tag == INT:
+        size, = struct.unpack_from('<H', data, offset)
+        offset += 2
+        if offset + size > len(data):
+            raise ValueError('truncated AST data')
+        return int.from_bytes(data[offset:offset + size], 'little', signed=True), offset + size
+    if tag == STR:
+        size, = struct.unpack_from('<I', data, offset)
+        offset += 4
+        if offset + size > len(data):
+            raise ValueError('truncated AST data')
+        return str(data[offset:offset + size], 'utf-8', 'surrogatepass'), offset + size
+    raise ValueError(f'unknown value tag {tag}')
+
+
+def dumps(program: Program, source: str, errors: list[str] = ()) -> bytes:
+    flat = encode(program, source)
+    # token type and literal per node, so loading never has to re-lex the source
+    token_type_col = array('B')
+    literal_col = array('i')
+    for i in range(len(flat)):
+        tok = flat.token(i)
+        if tok is None:
+            token_type_col.append(0)
+            literal_col.append(-1)
+        else:
+            token_type_col.append(tok.token_type)
+            literal_col.append(flat.add_value(tok.literal))
+
+    out = [
+        struct.pack('<I', len(LAYOUT)), LAYOUT,
+        COUNTS.pack(len(flat), len(flat.slots), len(flat.lists), len(flat.values), len(errors)),
+        flat.kinds.tobytes(),
+        token_type_col.tobytes(),
+        column('q', flat.starts),
+        column('i', literal_col),
+        column('i', flat.fields),
+        column('i', flat.slots),
+        column('i', flat.lists),
+    ]
+    for value in flat.values:
+        write_value(out, value)
+    for error in errors:
+        write_value(out, error)
+    body = b''.join(out)
+    return HEADER.pack(MAGIC, FORMAT_VERSION, len(node_types), zlib.crc32(body)) + body
+
+
+def loads(data) -> tuple[Program, list[str]]:
+    # data is anything supporting the buffer protocol: bytes, a memoryview or an mmap.
+    # The view is released on return, even on errors, so an mmap can be closed after.
+    with memoryview(data) as view:
+        return read_ast(view)
+
+
+def read_ast(data: memoryview) -> tuple[Program, list[str]]:
+    if len(data) < HEADER.size:
+        raise ValueError('truncated AST data')
+    magic, version, type_count, checksum = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError('not a serialized Golmaal AST')
+    if version != FORMAT_VERSION:
+        raise ValueError(f'unsupported AST format version {version} (expected {FORMAT_VERSION})')
+    offset = HEADER.size
+    if zlib.crc32(data[offset:]) != checksum:
+        raise ValueError('AST data is damaged (checksum mismatch)')
+    if offset + 4 > len(data):
+        raise ValueError('truncated AST data')
+    layout_size, = struct.unpack_from('<I', data, offset)
+    offset += 4
+    if type_count != len(node_types) or bytes(data[offset:offset + layout_size]) != LAYOUT:
+        raise ValueError('AST data was written for a different node layout')
+    offset += layout_size
+
+    if offset + COUNTS.size > len(data):
+        raise ValueError('truncated AST data')
+    node_count, slot_count, list_count, value_count, error_count = COUNTS.unpack_from(data, offset)
+    offset += COUNTS.size
+    kinds, offset = read_column('B', data, offset, node_count)
+    tok_types, offset = read_column('B', data, offset, node_count)
+    starts, offset = read_column('q', data, offset, node_count)
+    literals, offset = read_column('i', data, offset, node_count)
+    fields, offset = read_column('i', data, offset, node_count)
+    slots, offset = read_column('i', data, offset, slot_count)
+    lists, offset = read_column('i', data, offset, list_count)
+
+    values = []
+    errors = []
+    try:
+        for _ in range(value_count):
+            value, offset = read_value(data, offset)
+            values.append(value)
+        for _ in range(error_count):
+            error, offset = read_value(data, offset)
+            errors.append(error)
+    except struct.error:
+        raise ValueError('truncated AST data') from None
+
+    check_references(kinds, tok_types, literals, fields, slots, lists, values)
+    # The tree is acyclic, so the cyclic GC has nothing to collect while it is built, but
+    # would otherwise run repeatedly over the growing heap (close to half the load time).
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        program = build_nodes(kinds, tok_types, starts, literals, fields, slots, lists, values)
+    except (IndexError, KeyError, TypeError, AttributeError):
+        # a reference past the end of its array, or to a node of the wrong kind
+        raise ValueError('AST data has an invalid reference') from None
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return program, errors
+
+
+def check_references(kinds, tok_types, literals, fields, slots, lists, values):
+    # Whole-column range checks, so no negative index can wrap around to the end of an
+    # array. Indices too large make build_nodes raise IndexError instead.
+    if len(kinds) == 0:
+        raise ValueError('AST data has no nodes')
+    if max(kinds) >= len(kind_builders) or max(tok_types) >= len(token_types):
+        raise ValueError('AST data has an unknown node or token type')
+    # node 0 is the Program, which has no token (-1)
+    if len(kinds) > 1 and (min(literals[1:]) < 0 or max(literals[1:]) >= len(values)):
+        raise ValueError('AST data has an invalid reference')
+    # -1 is the only negative slot or list entry: no node, or no list
+    if min(fields) < 0 or (slots and min(slots) < -1) or (lists and min(lists) < -1):
+        raise ValueError('AST data has an invalid reference')
+
+
+def node_list(ref: int, nodes: list, lists: list) -> list | None:
+    if ref < 0:
+        return None
+    end = ref + 1 + lists[ref]
+    if end > len(lists) or end <= ref:
+        raise IndexError(ref)
+    return [nodes[item] for item in lists[ref + 1:end]]
+
+
+def value_at(values: list, ref: int):
+    # -1 passes check_references (it means no node in node slots), but is no value
+    if ref < 0:
+        raise IndexError(ref)
+    return values[ref]
+
+
+# One builder per node class, filling its fields from the slots starting at f in the
+# order of node_fields. nodes ends with a None sentinel, so a -1 child index gives None.
+def build_program(node, f, slots, nodes, values, lists):
+    node.statements = node_list(slots[f], nodes, lists)
+
+def build_identifier(node, f, slots, nodes, values, lists):
+    node.value = value_at(values, slots[f])
+
+def build_let(node, f, slots, nodes, values, lists):
+    node.name = nodes[slots[f]]
+    node.value = nodes[slots[f + 1]]
+
+def build_return(node, f, slots, nodes, values, lists):
+    node.value = nodes[slots[f]]
+
+def build_expression_statement(node, f, slots, nodes, values, lists):
+    node.expression = nodes[slots[f]]
+
+def build_integer(node, f, slots, nodes, values, lists):
+    node.value = value_at(values, slots[f])
+
+def build_prefix(node, f, slots, nodes, values, lists):
+    node.operator = value_at(values, slots[f])
+    node.right = nodes[slots[f + 1]]
+
+def build_infix(node, f, slots, nodes, values, lists):
+    node.left = nodes[slots[f]]
+    node.operator = value_at(values, slots[f + 1])
+    node.right = nodes[slots[f + 2]]
+
+def build_boolean(node, f, slots, nodes, values, lists):
+    node.value = value_at(values, slots[f])
+
+def build_block(node, f, slots, nodes, values, lists):
+    node.statements = node_list(slots[f], nodes, lists)
+
+def build_if(node, f, slots, nodes, values, lists):
+    node.condition = nodes[slots[f]]
+    node.consequence = nodes[slots[f + 1]]
+    node.alternative = nodes[slots[f + 2]]
+
+def build_function(node, f, slots, nodes, values, lists):
+    node.parameters = node_list(slots[f], nodes, lists)
+    node.body = nodes[slots[f + 1]]
+
+def build_call(node, f, slots, nodes, values, lists):
+    node.function = nodes[slots[f]]
+    node.arguments = node_list(slots[f + 1], nodes, lists)
+
+def build_string(node, f, slots, nodes, values, lists):
+    node.value = value_at(values, slots[f])
+
+def build_array(node, f, slots, nodes, values, lists):
+    node.elements = node_list(slots[f], nodes, lists)
+
+def build_index(node, f, slots, nodes, values, lists):
+    node.left = nodes[slots[f]]
+    node.index = nodes[slots[f + 1]]
+
+def build_assignment(node, f, slots, nodes, values, lists):
+    node.left = nodes[slots[f]]
+    node.right = nodes[slots[f + 1]]
+
+def build_while(node, f, slots, nodes, values, lists):
+    node.condition = nodes[slots[f]]
+    node.body = nodes[slots[f + 1]]
+
+
+builders = {
+    Program: build_program,
+    Identifier: build_identifier,
+    LetStatement: build_let,
+    ReturnStatement: build_return,
+    ExpressionStatement: build_expression_statement,
+    IntegerLiteral: build_integer,
+    PrefixExpression: build_prefix,
+    InfixExpression: build_infix,
+    Boolean: build_boolean,
+    BlockStatement: build_block,
+    IfExpression: build_if,
+    FunctionLiteral: build_function,
+    CallExpression: build_call,
+    StringExpression: build_string,
+    ArrayLiteral: build_array,
+    IndexExpression: build_index,
+    AssignmentStatement: build_assignment,
+    WhileStatement: build_while,
+}
+kind_builders = [(cls, builders[cls]) for cls in node_types]
+
+
+def build_nodes(kinds, tok_types, starts, literals, fields, slots, lists, values) -> Program:
+    # Children always have a higher index than their parent, so building from the last
+    # node backwards finds every child already built. Nodes sharing a token in the parsed
+    # tree (an ExpressionStatement and its first expression) share it here as well.
+    count = len(kinds)
+    nodes: list = [None] * (count + 1)
+    tokens: dict[int, Token] = {}
+    slots = slots.tolist()
+    lists = lists.tolist()
+    starts = starts.tolist()
+    literals = literals.tolist()
+    fields = fields.tolist()
+    int_type = Constants.INT
+
+    for i in range(count - 1, 0, -1):
+        cls, build = kind_builders[kinds[i]]
+        node = cls.__new__(cls)
+        start = starts[i]
+        tok = tokens.get(start)
+        if tok is None:
+            literal = values[literals[i]]
+            tok_type = token_types[tok_types[i]]
+            tok = tokens[start] = Token(tok_type, literal, start, get_int_value(literal) if tok_type == int_type else None)
+        node.token = tok
+        build(node, fields[i], slots, nodes, values, lists)
+        nodes[i] = node
+
+    program = Program()
+    build_program(program, fields[0], slots, nodes, values, lists)
+    return program
+
+
+def dump(program: Program, source: str, path: str, errors: list[str] = ()):
+    with open(path, 'wb') as f:
+        f.write(dumps(program, source, errors))
+
+
+def load(path: str) -> tuple[Program, list[str]]:
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return loads(mm)
@@ -0,0 +1,99 @@
+import os
+import struct
+import tempfile
+import unittest
+import zlib
+from sagar.lexer.Lexer import new_lexer
+from sagar.my_ast.flat_test import flatten
+from sagar.my_ast.serialize import dumps, loads, dump, load, MAGIC, FORMAT_VERSION, HEADER
+from sagar.my_parser.parser import Parser, IterativeParser
+
+PROGRAMS = [
+    '',
+    'maan_le five = 5; maan_le ten = 10; five + ten * 2 / -1;',
+    'maan_le add = golmaal(x, y) { ye_lo x + y; }; add(1, add(2, 3));',
+    'maan_le s = "héllo ✓"; print(s, "", len(s));',
+    'maan_le i = 0; while (i < 10) { if (i == 5) { break } else { i = i + 1; } }',
+    'maan_le arr = [1, true, "x", [2, 3]]; arr[3][0] != !false;',
+    'maan_le big = 123456789012345678901234567890; -big;',
+    '// comments are not part of the tree\nmaan_le a = /* one */ 1;',
+]
+
+
+def with_checksum(data: bytes) -> bytes:
+    # data with its header checksum recomputed
+    magic, version, type_count, _ = HEADER.unpack_from(data, 0)
+    return HEADER.pack(magic, version, type_count, zlib.crc32(data[HEADER.size:])) + data[HEADER.size:]
+
+
+class TestSerialize(unittest.TestCase):
+
+    def parse(self, source: str, parser_cls=Parser):
+        p = parser_cls(new_lexer(source))
+        return p.parse_program(), p.errors
+
+    def test_round_trip(self):
+        for i, source in enumerate(PROGRAMS):
+            program, errors = self.parse(source)
+            loaded, loaded_errors = loads(dumps(program, source, errors))
+            self.assertTrue(str(loaded) == str(program), f'program {i}: str(loaded) = {str(loaded)} != {str(program)}')
+            self.assertTrue(flatten(loaded) == flatten(program), f'program {i}: loaded tree differs from the parsed one')
+            self.assertTrue(loaded_errors == errors == [], f'program {i}: errors = {loaded_errors}')
+
+    def test_errors_round_trip(self):
+        source = 'maan_le = 5; f(1 2); maan_le ok = "fine";'
+        program, errors = self.parse(source)
+        loaded, loaded_errors = loads(dumps(program, source, errors))
+        self.assertTrue(len(errors) == 2 and loaded_errors == errors, f'loaded_errors = {loaded_errors} != {errors}')
+        self.assertTrue(str(loaded) == str(program), f'str(loaded) = {str(loaded)} != {str(program)}')
+
+    def test_deep_tree(self):
+        source = '(' * 3000 + '1' + ' + 1)' * 3000 + ';'
+        program, _ = self.parse(source, parser_cls=IterativeParser)
+        loaded, _ = loads(dumps(program, source))
+        self.assertTrue(flatten(loaded) == flatten(program), 'loaded deep tree differs from the parsed one')
+
+    def test_file_round_trip(self):
+        source = PROGRAMS[4]
+        program, errors = self.parse(source)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'program.gast')
+            dump(program, source, path, errors)
+            loaded, loaded_errors = load(path)
+        self.assertTrue(str(loaded) == str(program), f'str(loaded) = {str(loaded)} != {str(program)}')
+
+    def test_rejects_bad_data(self):
+        source = PROGRAMS[1]
+        data = dumps(*self.parse(source)[:1], source)
+        layout = HEADER.size + 4
+        bad = {
+            'empty': b'',
+            'magic': b'XXXX' + data[4:],
+            'version': MAGIC + struct.pack('<H', FORMAT_VERSION + 1) + data[6:],
+            'layout': with_checksum(data[:layout] + b'X' + data[layout + 1:]),
+            'truncated': with_checksum(data[:len(data) // 2]),
+            'checksum': data[:-1] + bytes([data[-1] ^ 1]),
+        }
+        for name, blob in bad.items():
+            with self.assertRaises(ValueError, msg=f'{name} data was loaded'):
+                loads(blob)
+
+    def test_damaged_data(self):
+        source = PROGRAMS[2] + PROGRAMS[5]
+        data = dumps(*self.parse(source)[:1], source)
+        for i in range(len(data)):
+            damaged = bytearray(data)
+            damaged[i] ^= 0x41
+            with self.assertRaises(ValueError, msg=f'data with byte {i} flipped was loaded'):
+                loads(bytes(damaged))
+            # data damaged before its checksum was computed: references past the ends of
+            # the arrays are found too, and nothing but ValueError is raised
+            if i >= HEADER.size:
+                try:
+                    loads(with_checksum(bytes(damaged)))
+                except ValueError:
+                    pass
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+from enum import IntEnum
+
+
+class Opcode(IntEnum):
+    # Instructions are flat lists of ints: an opcode followed by its operands. Jump
+    # targets are positions in the same list; constants are indexes into the constants
+    # pool of the bytecode. Every statement leaves one value on the stack, as eval
+    # returns one for it.
+    CONSTANT = 0 # constant: push it
+    NULL = 1 # push the null object
+    POP = 2
+
+    GET_NAME = 3 # name constant: look it up through the environments, then the builtins
+    GET_LOCAL = 4 # slot, name constant: a resolved identifier declared by this call
+    GET_RESOLVED = 5 # ResolvedIdentifier constant: any other resolved identifier
+    LET_NAME = 6 # name constant
+    LET_SLOT = 7 # slot
+    ASSIGN_NAME = 8 # name constant
+    ASSIGN_RESOLVED = 9 # ResolvedIdentifier constant
+    ASSIGN_OTHER = 10 # node constant: whatever eval_assignment does with it
+
+    ADD = 11
+    SUB = 12
+    MUL = 13
+    DIV = 14
+    LT = 15
+    GT = 16
+    EQ = 17
+    NOT_EQ = 18
+    INFIX = 19 # operator constant: any other infix operator
+    MINUS = 20
+    BANG = 21
+    PREFIX = 22 # operator constant: any other prefix operator
+
+    JUMP = 23 # target
+    JUMP_IF_FALSE = 24 # target: pop an if condition, jump when its value is false
+    JUMP_IF_RETURN = 25 # target: jump if a statement returned, else pop its value
+
+    LOOP_START = 26 # push the iteration budget of a while loop
+    LOOP_TEST = 27 # end: pop the condition, leave the loop when it is false
+    LOOP_BODY = 28 # end, next: pop a body statement's value; break and continue jump
+    LOOP_NEXT = 29 # start: count the iteration and test the condition again
+    LOOP_END = 30 # replace the budget with the loop's null value
+
+    MAKE_FUNCTION = 31 # FunctionCode constant: push a function closing over the environment
+    CALL = 32 # argument count: the function is below its arguments
+    RETURN_OBJ = 33 # wrap the value of a ye_lo statement
+    RETURN = 34 # leave the function (or the program) with the value on the stack
+
+    ARRAY = 35 # element count
+    CHECK_INDEXABLE = 36 # the left side of an index expression has to be an array
+    INDEX = 37
+
+    SHARED_STORE = 38 # name constant: keep the value of a shared expression
+    SHARED_LOAD = 39 # name constant, target: push the kept value and jump, if there is one
+
+    EVAL = 40 # node constant: evaluate it with eval in the current environment
+
+
+# number of operands of every opcode
+operand_counts: dict[Opcode, int] = {op: 0 for op in Opcode}
+operand_counts.update({
+    Opcode.CONSTANT: 1,
+    Opcode.GET_NAME: 1,
+    Opcode.GET_LOCAL: 2,
+    Opcode.GET_RESOLVED: 1,
+    Opcode.LET_NAME: 1,
+    Opcode.LET_SLOT: 1,
+    Opcode.ASSIGN_NAME: 1,
+    Opcode.ASSIGN_RESOLVED: 1,
+    Opcode.ASSIGN_OTHER: 1,
+    Opcode.INFIX: 1,
+    Opcode.PREFIX: 1,
+    Opcode.JUMP: 1,
+    Opcode.JUMP_IF_FALSE: 1,
+    Opcode.JUMP_IF_RETURN: 1,
+    Opcode.LOOP_TEST: 1,
+    Opcode.LOOP_BODY: 2,
+    Opcode.LOOP_NEXT: 1,
+    Opcode.MAKE_FUNCTION: 1,
+    Opcode.CALL: 1,
+    Opcode.ARRAY: 1,
+    Opcode.SHARED_STORE: 1,
+    Opcode.SHARED_LOAD: 2,
+    Opcode.EVAL: 1,
+})
+
+
+class Bytecode:
+    __slots__ = ('instructions', 'constants')
+
+    def __init__(self, instructions: list[int], constants: list):
+        self.instructions = instructions
+        self.constants = constants
+
+    def __len__(self):
+        return len(self.instructions)
+
+
+def disassemble(bytecode: Bytecode) -> list[str]:
+    # one line per instruction: position, opcode name and operands
+    res = []
+    instructions = bytecode.instructions
+    ip = 0
+    while ip < len(instructions):
+        op = Opcode(instructions[ip])
+        operands = instructions[ip + 1:ip + 1 + operand_counts[op]]
+        res.append(' '.join([f'{ip:04d}', op.name] + [str(operand) for operand in operands]))
+        ip += 1 + len(operands)
+    return res
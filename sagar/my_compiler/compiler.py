@@ -0,0 +1,292 @@
+from sagar.my_ast.ast import *
+from sagar.my_compiler.code import Opcode, Bytecode
+from sagar.my_evaluator.evaluator import EvalConstants, builtins
+from sagar.my_object.object import literal_obj
+from typing import Callable
+
+# Compiles a parsed (optionally optimized) program to bytecode for sagar/my_vm. The
+# bytecode does what eval does, in the same order: ye_lo, break and continue stay values
+# that the statements around them check, as they are in the evaluator, so programs that
+# use them as values behave the same. Nodes the compiler does not know are evaluated by
+# eval from the VM (Opcode.EVAL).
+
+binary_opcodes = {
+    '+': Opcode.ADD,
+    '-': Opcode.SUB,
+    '*': Opcode.MUL,
+    '/': Opcode.DIV,
+    '<': Opcode.LT,
+    '>': Opcode.GT,
+    '==': Opcode.EQ,
+    '!=': Opcode.NOT_EQ,
+}
+
+
+class FunctionCode:
+    # a compiled function literal. The body of a lazily parsed literal is compiled on its
+    # first call.
+    __slots__ = ('params', 'body', 'scope', 'bytecode')
+
+    def __init__(self, literal: FunctionLiteral):
+        self.params = literal.parameters
+        self.body = literal.body
+        # set for a resolved literal: its calls get slot environments
+        self.scope = literal.scope if isinstance(literal, ResolvedFunctionLiteral) else None
+        self.bytecode: Bytecode | None = None
+        if not isinstance(self.body, LazyBlockStatement):
+            self.bytecode = compile_function_body(self.body)
+
+    def load(self) -> Bytecode | None:
+        if self.bytecode is None:
+            block = self.body.parse()
+            if block is None:
+                return None
+            self.bytecode = compile_function_body(block)
+        return self.bytecode
+
+
+class Compiler:
+    def __init__(self):
+        self.instructions: list[int] = []
+        self.constants: list = []
+        # (kind, value) -> index in constants, so repeated literals and names share one
+        self.constant_ids: dict[tuple, int] = {}
+
+    def bytecode(self) -> Bytecode:
+        return Bytecode(self.instructions, self.constants)
+
+    def emit(self, op: Opcode, *operands: int) -> int:
+        # position of the instruction
+        position = len(self.instructions)
+        self.instructions.append(int(op))
+        self.instructions.extend(operands)
+        return position
+
+    def patch(self, position: int, target: int, operand: int = 0):
+        # point the jump at position to target
+        self.instructions[position + 1 + operand] = target
+
+    def constant(self, kind: str, value, obj=None) -> int:
+        key = (kind, value) if kind != 'node' else (kind, id(value))
+        index = self.constant_ids.get(key)
+        if index is None:
+            index = self.constant_ids[key] = len(self.constants)
+            self.constants.append(value if obj is None else obj)
+        return index
+
+    def node_constant(self, node) -> int:
+        # nodes and other unhashable constants are kept by identity
+        return self.constant('node', node)
+
+    def compile(self, node: Node):
+        method = methods.get(type(node))
+        if method is None:
+            method = method_for(type(node))
+        method(self, node)
+
+    def compile_fallback(self, node: Node):
+        self.emit(Opcode.EVAL, self.node_constant(node))
+
+    def compile_program(self, node: Program):
+        if not node.statements:
+            # eval of an empty program fails; it does so from the VM too
+            self.compile_fallback(node)
+        else:
+            self.compile_statements(node.statements)
+        self.emit(Opcode.RETURN)
+
+    def compile_statements(self, statements: list[Statement]):
+        # leaves the last statement's value, or the first ReturnObj, on the stack
+        jumps = []
+        for statement in statements[:-1]:
+            self.compile(statement)
+            jumps.append(self.emit(Opcode.JUMP_IF_RETURN, 0))
+        self.compile(statements[-1])
+        for jump in jumps:
+            self.patch(jump, len(self.instructions))
+
+    def compile_block(self, node: BlockStatement):
+        if not node.statements:
+            self.compile_fallback(node)
+            return
+        self.compile_statements(node.statements)
+
+    def compile_expression_statement(self, node: ExpressionStatement):
+        self.compile(node.expression)
+
+    def compile_integer_literal(self, node: IntegerLiteral):
+        self.emit(Opcode.CONSTANT, self.constant('int', node.value, literal_obj(node)))
+
+    def compile_string_expression(self, node: StringExpression):
+        self.emit(Opcode.CONSTANT, self.constant('string', node.value, literal_obj(node)))
+
+    def compile_boolean(self, node: Boolean):
+        obj = EvalConstants.TRUE_BOOLEAN_OBJ if node.value else EvalConstants.FALSE_BOOLEAN_OBJ
+        self.emit(Opcode.CONSTANT, self.constant('bool', node.value, obj))
+
+    def compile_prefix(self, node: PrefixExpression):
+        self.compile(node.right)
+        if node.operator == '-':
+            self.emit(Opcode.MINUS)
+        elif node.operator == '!':
+            self.emit(Opcode.BANG)
+        else:
+            self.emit(Opcode.PREFIX, self.constant('name', node.operator))
+
+    def compile_infix(self, node: InfixExpression):
+        self.compile(node.left)
+        self.compile(node.right)
+        op = binary_opcodes.get(node.operator)
+        if op is None:
+            self.emit(Opcode.INFIX, self.constant('name', node.operator))
+        else:
+            self.emit(op)
+
+    def compile_if_expression(self, node: IfExpression):
+        self.compile(node.condition)
+        to_alternative = self.emit(Opcode.JUMP_IF_FALSE, 0)
+        self.compile(node.consequence)
+        to_end = self.emit(Opcode.JUMP, 0)
+        self.patch(to_alternative, len(self.instructions))
+        if node.alternative:
+            self.compile(node.alternative)
+        else:
+            self.emit(Opcode.NULL)
+        self.patch(to_end, len(self.instructions))
+
+    def compile_while_statement(self, node: WhileStatement):
+        self.emit(Opcode.LOOP_START)
+        start = len(self.instructions)
+        self.compile(node.condition)
+        exits = [self.emit(Opcode.LOOP_TEST, 0)]
+        bodies = []
+        for statement in node.body.statements:
+            self.compile(statement)
+            bodies.append(self.emit(Opcode.LOOP_BODY, 0, 0))
+        following = self.emit(Opcode.LOOP_NEXT, start)
+        end = self.emit(Opcode.LOOP_END)
+        for position in exits + bodies:
+            self.patch(position, end)
+        for position in bodies:
+            self.patch(position, following, operand=1)
+
+    def compile_return_statement(self, node: ReturnStatement):
+        self.compile(node.value)
+        self.emit(Opcode.RETURN_OBJ)
+
+    def compile_let_statement(self, node: LetStatement):
+        name = node.name
+        if name.value in builtins or not isinstance(node.value, Expression):
+            # errors only when it runs
+            self.compile_fallback(node)
+            return
+        self.compile(node.value)
+        if isinstance(name, ResolvedIdentifier) and name.slot != GLOBAL_SLOT:
+            self.emit(Opcode.LET_SLOT, name.slot)
+        else:
+            self.emit(Opcode.LET_NAME, self.constant('name', name.value))
+
+    def compile_identifier(self, node: Identifier):
+        self.emit(Opcode.GET_NAME, self.constant('name', node.value))
+
+    def compile_resolved_identifier(self, node: ResolvedIdentifier):
+        if node.depth == 0 and node.slot != GLOBAL_SLOT:
+            self.emit(Opcode.GET_LOCAL, node.slot, self.constant('name', node.value))
+        else:
+            self.emit(Opcode.GET_RESOLVED, self.node_constant(node))
+
+    def compile_assignment_statement(self, node: AssignmentStatement):
+        self.compile(node.right)
+        left = node.left
+        if isinstance(left, ResolvedIdentifier):
+            self.emit(Opcode.ASSIGN_RESOLVED, self.node_constant(left))
+        elif isinstance(left, Identifier):
+            self.emit(Opcode.ASSIGN_NAME, self.constant('name', left.value))
+        else:
+            self.emit(Opcode.ASSIGN_OTHER, self.node_constant(left))
+
+    def compile_function_literal(self, node: FunctionLiteral):
+        self.emit(Opcode.MAKE_FUNCTION, self.node_constant(FunctionCode(node)))
+
+    def compile_call_expression(self, node: CallExpression):
+        self.compile(node.function)
+        for argument in node.arguments:
+            self.compile(argument)
+        self.emit(Opcode.CALL, len(node.arguments))
+
+    def compile_array_literal(self, node: ArrayLiteral):
+        for element in node.elements:
+            self.compile(element)
+        self.emit(Opcode.ARRAY, len(node.elements))
+
+    def compile_index_expression(self, node: IndexExpression):
+        self.compile(node.left)
+        # checked before the index is evaluated, as in eval_index_operation
+        self.emit(Opcode.CHECK_INDEXABLE)
+        self.compile(node.index)
+        self.emit(Opcode.INDEX)
+
+    def compile_shared_expression(self, node: SharedExpression):
+        name = self.constant('name', node.name)
+        if node.first:
+            self.compile(node.value)
+            self.emit(Opcode.SHARED_STORE, name)
+            return
+        # the first occurrence may not have run in this environment
+        load = self.emit(Opcode.SHARED_LOAD, name, 0)
+        self.compile(node.value)
+        self.patch(load, len(self.instructions), operand=1)
+
+
+def method_for(cls: type) -> Callable[[Compiler, Node], None]:
+    # the nearest base class with a method, cached; eval runs anything else
+    method = Compiler.compile_fallback
+    for base in cls.__mro__:
+        if base in methods:
+            method = methods[base]
+            break
+    methods[cls] = method
+    return method
+
+
+# node class -> Compiler method compiling it
+methods: dict[type, Callable[[Compiler, Node], None]] = {
+    Program: Compiler.compile_program,
+    ExpressionStatement: Compiler.compile_expression_statement,
+    IntegerLiteral: Compiler.compile_integer_literal,
+    Boolean: Compiler.compile_boolean,
+    PrefixExpression: Compiler.compile_prefix,
+    InfixExpression: Compiler.compile_infix,
+    BlockStatement: Compiler.compile_block,
+    IfExpression: Compiler.compile_if_expression,
+    ReturnStatement: Compiler.compile_return_statement,
+    LetStatement: Compiler.compile_let_statement,
+    ResolvedIdentifier: Compiler.compile_resolved_identifier,
+    Identifier: Compiler.compile_identifier,
+    FunctionLiteral: Compiler.compile_function_literal,
+    CallExpression: Compiler.compile_call_expression,
+    StringExpression: Compiler.compile_string_expression,
+    ArrayLiteral: Compiler.compile_array_literal,
+    AssignmentStatement: Compiler.compile_assignment_statement,
+    WhileStatement: Compiler.compile_while_statement,
+    IndexExpression: Compiler.compile_index_expression,
+    SharedExpression: Compiler.compile_shared_expression,
+}
+
+
+def compile_program(node: Node) -> Bytecode:
+    compiler = Compiler()
+    if isinstance(node, Program):
+        compiler.compile_program(node)
+    else:
+        compiler.compile(node)
+        compiler.emit(Opcode.RETURN)
+    return compiler.bytecode()
+
+
+def compile_function_body(body: BlockStatement) -> Bytecode:
+    # the body's statements, then leave the call; an empty body fails as in eval
+    compiler = Compiler()
+    compiler.compile_block(body)
+    compiler.emit(Opcode.RETURN)
+    return compiler.bytecode()
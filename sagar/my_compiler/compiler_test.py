@@ -0,0 +1,57 @@
+import unittest
+from sagar.my_compiler.code import disassemble
+from sagar.my_compiler.compiler import compile_program, FunctionCode
+from sagar.my_object.object import IntegerObj
+from sagar.my_optimizer.passes import optimize
+from sagar.my_optimizer.resolver_test import parse
+
+
+def listing(source: str, optimized: bool = False) -> list[str]:
+    # disassembly without positions
+    program = parse(source)
+    if optimized:
+        program = optimize(program)
+    return [line.split(' ', 1)[1] for line in disassemble(compile_program(program))]
+
+
+class TestCompiler(unittest.TestCase):
+
+    def test_instructions(self):
+        inps = [
+            ('1 + 2 * 3', ['CONSTANT 0', 'CONSTANT 1', 'CONSTANT 2', 'MUL', 'ADD', 'RETURN']),
+            ('maan_le a = 1; a;', ['CONSTANT 0', 'LET_NAME 1', 'JUMP_IF_RETURN 8', 'GET_NAME 1', 'RETURN']),
+            ('if (a) { 1 } else { 2 }', ['GET_NAME 0', 'JUMP_IF_FALSE 8', 'CONSTANT 1', 'JUMP 10', 'CONSTANT 2', 'RETURN']),
+            ('if (a) { 1 }', ['GET_NAME 0', 'JUMP_IF_FALSE 8', 'CONSTANT 1', 'JUMP 9', 'NULL', 'RETURN']),
+            ('while (a) { b; c; }', ['LOOP_START', 'GET_NAME 0', 'LOOP_TEST 17', 'GET_NAME 1', 'LOOP_BODY 17 15',
+                                     'GET_NAME 2', 'LOOP_BODY 17 15', 'LOOP_NEXT 1', 'LOOP_END', 'RETURN']),
+            ('x = -y[0];', ['GET_NAME 0', 'CHECK_INDEXABLE', 'CONSTANT 1', 'INDEX', 'MINUS', 'ASSIGN_NAME 2', 'RETURN']),
+            ('ye_lo f(1, [2]);', ['GET_NAME 0', 'CONSTANT 1', 'CONSTANT 2', 'ARRAY 1', 'CALL 2', 'RETURN_OBJ', 'RETURN']),
+            ('maan_le len = 1;', ['EVAL 0', 'RETURN']),
+        ]
+        for i, (inp, exp) in enumerate(inps):
+            res = listing(inp)
+            self.assertTrue(res == exp, f'{i}: {inp!r}\n{res}\n!= {exp}')
+
+    def test_constants(self):
+        bytecode = compile_program(parse('print(1, 1, "1", x, x);'))
+        kinds = [type(constant).__name__ for constant in bytecode.constants]
+        self.assertTrue(kinds == ['str', 'IntegerObj', 'StringObj', 'str'], f'constants = {kinds}')
+        self.assertTrue(isinstance(bytecode.constants[1], IntegerObj) and bytecode.constants[1].value == 1, 'integer constant')
+
+    def test_resolved_and_shared(self):
+        source = 'maan_le f = golmaal(x) { maan_le y = x * x; ye_lo x * x + y; };'
+        function = compile_program(optimize(parse(source))).constants[0]
+        self.assertTrue(isinstance(function, FunctionCode), f'constant 0 is a {type(function)}')
+        ops = [line.split(' ')[1] for line in disassemble(function.bytecode)]
+        for op in ['GET_LOCAL', 'LET_SLOT', 'SHARED_STORE', 'SHARED_LOAD', 'RETURN']:
+            self.assertTrue(op in ops, f'{op} not in {ops}')
+
+    def test_lazy_function(self):
+        program = parse('maan_le f = golmaal() { ye_lo 1; };', lazy_functions=True)
+        function = compile_program(program).constants[0]
+        self.assertTrue(function.bytecode is None, 'lazy body compiled before its first call')
+        self.assertTrue(function.load() is function.bytecode and function.bytecode is not None, 'lazy body not compiled on load')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,28 @@
+from sagar.my_ast.ast import Node
+from sagar.my_evaluator import closures
+from sagar.my_evaluator.evaluator import eval
+from sagar.my_object.object import Environment, Object
+from sagar.my_transpiler import transpiler
+from sagar.my_vm import vm
+from typing import Callable
+
+TREE_BACKEND = 'tree'
+CLOSURE_BACKEND = 'closures'
+VM_BACKEND = 'vm'
+PYTHON_BACKEND = 'python'
+
+# name -> function running a program in an environment; every backend returns what
+# eval would and prints the same statements
+BACKENDS: dict[str, Callable[[Node, Environment], Object]] = {
+    TREE_BACKEND: eval,
+    CLOSURE_BACKEND: closures.run,
+    VM_BACKEND: vm.run,
+    PYTHON_BACKEND: transpiler.run,
+}
+
+
+def get_backend(name: str = TREE_BACKEND) -> Callable[[Node, Environment], Object]:
+    backend = BACKENDS.get(name)
+    if backend is None:
+        raise ValueError(f"unknown eval backend: {name}")
+    return backend
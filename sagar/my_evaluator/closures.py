@@ -0,0 +1,543 @@
+from operator import add, sub, mul, floordiv, lt, gt, eq, ne
+from sagar.my_ast.ast import *
+from sagar.my_evaluator.evaluator import *
+from sagar.my_object.object import *
+from typing import Callable
+
+# Closure compilation: a program is compiled once into a tree of Python closures, one per
+# node, each taking the Environment and returning what eval returns for that node. The
+# node class, operator and identifier address are looked at once, while compiling,
+# instead of every time the node runs. The closures keep the evaluator's behaviour,
+# errors and limits, and use its functions for anything off the fast paths; nodes
+# without a compiler are run by eval.
+
+Code = Callable[[Environment], Object]
+
+# operator -> (function on the two int values, function making the result object)
+int_operators = {
+    '+': (add, integer_obj),
+    '-': (sub, integer_obj),
+    '*': (mul, integer_obj),
+    '/': (floordiv, integer_obj),
+    '<': (lt, boolean_obj),
+    '>': (gt, boolean_obj),
+    '==': (eq, boolean_obj),
+    '!=': (ne, boolean_obj),
+}
+
+
+class CompiledBody:
+    # the compiled statements of a function body, shared by every function object made
+    # from the literal; a lazily parsed body is parsed and compiled on its first call
+    __slots__ = ('block', 'code')
+
+    def __init__(self, block: BlockStatement):
+        self.block = block
+        self.code: Code | None = None
+        if not isinstance(block, LazyBlockStatement):
+            self.code = compile_block_statements(block.statements)
+
+    def load(self) -> Code | None:
+        if self.code is None:
+            block = self.block.parse()
+            if block is None:
+                return None
+            self.code = compile_block_statements(block.statements)
+        return self.code
+
+
+class CompiledFunctionObj(FunctionObj):
+    # a function whose body was compiled; prints as any other function
+    def __init__(self, params: list[Identifier], body: BlockStatement, env: Environment, scope: Scope | None, compiled: CompiledBody):
+        super().__init__(params, body, env, scope)
+        self.compiled = compiled
+
+
+def run(program: Node, env: Environment) -> Object:
+    # the closure backend: compile, then run, returning what eval(program, env) would
+    try:
+        code = compile_node(program)
+    except RecursionError:
+        # too deeply nested to compile; eval reports it the way it always has
+        return eval(program, env)
+    return code(env)
+
+
+def compile_node(node: Node) -> Code:
+    compiler = compilers.get(type(node))
+    if compiler is None:
+        compiler = compiler_for(type(node))
+    return compiler(node)
+
+
+def compiler_for(cls: type) -> Callable[[Node], Code]:
+    # as handler_for in the evaluator: the nearest base class with a compiler, cached
+    compiler = compile_fallback
+    for base in cls.__mro__:
+        if base in compilers:
+            compiler = compilers[base]
+            break
+    compilers[cls] = compiler
+    return compiler
+
+
+def compile_fallback(node: Node) -> Code:
+    def fallback(env):
+        return eval(node, env)
+    return fallback
+
+
+def compile_program(node: Program) -> Code:
+    statements = [compile_node(statement) for statement in node.statements]
+
+    def program(env):
+        for statement in statements:
+            res = statement(env)
+            if isinstance(res, ReturnObj):
+                return res.value
+            if isinstance(res, ErrorObj):
+                return res
+        return res
+    return program
+
+
+def compile_block_statements(statements: list[Statement]) -> Code:
+    codes = [compile_node(statement) for statement in statements]
+    if len(codes) == 1:
+        # a block returns its only statement's result, whatever it is
+        return codes[0]
+
+    def block(env):
+        for statement in codes:
+            res = statement(env)
+            if isinstance(res, ReturnObj) or isinstance(res, ErrorObj):
+                return res
+        return res
+    return block
+
+
+def compile_block(node: BlockStatement) -> Code:
+    return compile_block_statements(node.statements)
+
+
+def compile_expression_statement(node: ExpressionStatement) -> Code:
+    return compile_node(node.expression)
+
+
+def compile_integer_literal(node: IntegerLiteral) -> Code:
+    obj = literal_obj(node)
+
+    def integer_literal(env):
+        return obj
+    return integer_literal
+
+
+def compile_boolean(node: Boolean) -> Code:
+    obj = EvalConstants.TRUE_BOOLEAN_OBJ if node.value else EvalConstants.FALSE_BOOLEAN_OBJ
+
+    def boolean(env):
+        return obj
+    return boolean
+
+
+def compile_string_expression(node: StringExpression) -> Code:
+    obj = literal_obj(node)
+
+    def string_expression(env):
+        return obj
+    return string_expression
+
+
+def compile_prefix(node: PrefixExpression) -> Code:
+    right = compile_node(node.right)
+    operator = node.operator
+    if operator == '-':
+        def minus(env):
+            value = right(env)
+            if type(value) is IntegerObj:
+                return integer_obj(-value.value)
+            if isinstance(value, ErrorObj):
+                return value
+            return eval_minus_operator(value)
+        return minus
+
+    def prefix(env):
+        value = right(env)
+        if isinstance(value, ErrorObj):
+            return value
+        return eval_prefix_expression(operator, value)
+    return prefix
+
+
+def compile_infix(node: InfixExpression) -> Code:
+    left = compile_node(node.left)
+    right = compile_node(node.right)
+    operator = node.operator
+    if operator not in int_operators:
+        def infix(env):
+            l = left(env)
+            if isinstance(l, ErrorObj):
+                return l
+            r = right(env)
+            if isinstance(r, ErrorObj):
+                return r
+            return eval_infix_expression(operator, l, r)
+        return infix
+
+    fn, result = int_operators[operator]
+    if type(node.right) is IntegerLiteral:
+        # i + 1, n < 2: the right operand is known
+        constant_obj = literal_obj(node.right)
+        constant = constant_obj.value
+
+        def infix_constant(env):
+            l = left(env)
+            if type(l) is IntegerObj:
+                return result(fn(l.value, constant))
+            if isinstance(l, ErrorObj):
+                return l
+            return eval_infix_expression(operator, l, constant_obj)
+        return infix_constant
+
+    def infix_int(env):
+        l = left(env)
+        if isinstance(l, ErrorObj):
+            return l
+        r = right(env)
+        if type(l) is IntegerObj and type(r) is IntegerObj:
+            return result(fn(l.value, r.value))
+        if isinstance(r, ErrorObj):
+            return r
+        # strings, mismatched types and unknown operators
+        return eval_infix_expression(operator, l, r)
+    return infix_int
+
+
+def compile_if_expression(node: IfExpression) -> Code:
+    condition = compile_node(node.condition)
+    consequence = compile_node(node.consequence)
+    alternative = compile_node(node.alternative) if node.alternative else None
+
+    def if_expression(env):
+        value = condition(env)
+        if type(value) is not BooleanObj:
+            if isinstance(value, ErrorObj):
+                return value
+            truthy = get_truthy(value)
+            if isinstance(truthy, ErrorObj):
+                return truthy
+        # the condition's own value decides, as in eval_if_expression
+        if value.value:
+            return consequence(env)
+        elif alternative is not None:
+            return alternative(env)
+        return EvalConstants.NULL_OBJ
+    return if_expression
+
+
+def compile_while_statement(node: WhileStatement) -> Code:
+    condition = compile_node(node.condition)
+    body = [compile_node(statement) for statement in node.body.statements]
+
+    def while_statement(env):
+        value = condition(env)
+        if isinstance(value, ErrorObj):
+            return value
+        truthy = get_truthy(value)
+        if isinstance(truthy, ErrorObj):
+            return truthy
+
+        iter_left = 1000
+
+        while truthy.value:
+            if iter_left == 0:
+                return ErrorObj('Can only perform 1000 iterations currently')
+            res = EvalConstants.NULL_OBJ
+            for statement in body:
+                res = statement(env)
+                if isinstance(res, ErrorObj):
+                    return res
+                if isinstance(res, ReturnObj):
+                    return ErrorObj('cannot have a return statement inside a while function')
+                if isinstance(res, BuiltinKeywordFunction):
+                    break
+
+            if isinstance(res, BuiltinKeywordFunction) and res.name == 'break':
+                break
+
+            value = condition(env)
+            if isinstance(value, ErrorObj):
+                return value
+            truthy = get_truthy(value)
+            if isinstance(truthy, ErrorObj):
+                return truthy
+            iter_left = iter_left - 1
+        return EvalConstants.NULL_OBJ
+    return while_statement
+
+
+def compile_return_statement(node: ReturnStatement) -> Code:
+    value = compile_node(node.value)
+
+    def return_statement(env):
+        res = value(env)
+        if isinstance(res, ErrorObj):
+            return res
+        return ReturnObj(value=res)
+    return return_statement
+
+
+def compile_let_statement(node: LetStatement) -> Code:
+    name = node.name
+    if name.value in builtins or not isinstance(node.value, Expression):
+        # errors only when it runs
+        return compile_fallback(node)
+    value = compile_node(node.value)
+
+    if isinstance(name, ResolvedIdentifier) and name.slot != GLOBAL_SLOT:
+        slot = name.slot
+
+        def let_slot(env):
+            res = value(env)
+            if isinstance(res, ErrorObj):
+                return res
+            env.slots[slot] = res
+            return NULL_OBJ
+        return let_slot
+
+    key = name.value
+
+    def let_statement(env):
+        res = value(env)
+        if isinstance(res, ErrorObj):
+            return res
+        env.put(key, res)
+        return NULL_OBJ
+    return let_statement
+
+
+def compile_identifier(node: Identifier) -> Code:
+    name = node.value
+    builtin = builtins.get(name, None)
+
+    def identifier(env):
+        res = env.get(name)
+        if res:
+            return res
+        if builtin:
+            return builtin
+        return ErrorObj(f'identifier not found: {name}')
+    return identifier
+
+
+def compile_resolved_identifier(node: ResolvedIdentifier) -> Code:
+    if node.depth != 0 or node.slot == GLOBAL_SLOT:
+        def resolved_identifier(env):
+            return eval_resolved_identifier(node, env)
+        return resolved_identifier
+
+    name = node.value
+    slot = node.slot
+    builtin = builtins.get(name, None)
+
+    def local(env):
+        res = env.slots[slot]
+        if res is not None:
+            return res
+        # declared in this scope but not set yet, so it is looked up further out
+        res = env.outer.get(name)
+        if res:
+            return res
+        if builtin:
+            return builtin
+        return ErrorObj(f'identifier not found: {name}')
+    return local
+
+
+def compile_assignment_statement(node: AssignmentStatement) -> Code:
+    right = compile_node(node.right)
+    left = node.left
+    name = getattr(left, 'value', None)
+
+    if isinstance(left, ResolvedIdentifier):
+        slot = left.slot
+
+        def assign_resolved(env):
+            value = right(env)
+            if isinstance(value, ErrorObj):
+                return value
+            if not lookup_resolved(left, env):
+                return ErrorObj(f'identifier not declared: {name}')
+            # written to the current environment, as eval_assignment does
+            if slot == GLOBAL_SLOT:
+                env.put(name, value)
+            else:
+                env.slots[slot] = value
+            return EvalConstants.NULL_OBJ
+        return assign_resolved
+
+    if isinstance(left, Identifier):
+        def assign(env):
+            value = right(env)
+            if isinstance(value, ErrorObj):
+                return value
+            if not env.get(name):
+                return ErrorObj(f'identifier not declared: {name}')
+            env.put(name, value)
+            return EvalConstants.NULL_OBJ
+        return assign
+
+    def assign_other(env):
+        value = right(env)
+        if isinstance(value, ErrorObj):
+            return value
+        return eval_assignment(AssignmentObj(left, value), env)
+    return assign_other
+
+
+def compile_function_literal(node: FunctionLiteral) -> Code:
+    params = node.parameters
+    body = node.body
+    scope = node.scope if isinstance(node, ResolvedFunctionLiteral) else None
+    compiled = CompiledBody(body)
+
+    def function_literal(env):
+        return CompiledFunctionObj(params, body, env, scope, compiled)
+    return function_literal
+
+
+def compile_call_expression(node: CallExpression) -> Code:
+    function = compile_node(node.function)
+    arguments = [compile_node(argument) for argument in node.arguments]
+
+    def call_expression(env):
+        fun = function(env)
+        if isinstance(fun, ErrorObj):
+            return fun
+        args = []
+        for argument in arguments:
+            value = argument(env)
+            if isinstance(value, ErrorObj):
+                return value
+            args.append(value)
+        return call_function(fun, args, env)
+    return call_expression
+
+
+def call_function(fun: Object, args: list[Object], env: Environment) -> Object:
+    if type(fun) is CompiledFunctionObj:
+        code = fun.compiled.code
+        if code is None:
+            code = fun.compiled.load()
+            if code is None:
+                return ErrorObj(f"syntax error in function body: {'; '.join(fun.body.errors)}")
+        params = fun.params
+        if len(params) != len(args):
+            return ErrorObj(f'expected {len(params)} arguments. but passed {len(args)}.')
+        extended_env = Environment(outer=fun.env, scope=fun.scope)
+        if fun.scope is not None:
+            slots = extended_env.slots
+            for param, arg in zip(params, args):
+                slots[param.slot] = arg
+        else:
+            for param, arg in zip(params, args):
+                extended_env.put(param.value, arg)
+        res = code(extended_env)
+        if isinstance(res, ReturnObj):
+            return res.value
+        return res
+
+    if isinstance(fun, Builtin):
+        return fun.fn(args, env = env)
+
+    if isinstance(fun, FunctionObj):
+        # made by eval (a fallback node, or an earlier REPL line)
+        if isinstance(fun.body, LazyBlockStatement) and fun.body.parse() is None:
+            return ErrorObj(f"syntax error in function body: {'; '.join(fun.body.errors)}")
+        extended_env = get_extended_env(fun, args)
+        if is_error(extended_env):
+            return extended_env
+        return unwrap_return_value(eval_block_statements(fun.body.statements, env = extended_env))
+
+    return ErrorObj(f'not a function: {str(fun)}')
+
+
+def compile_array_literal(node: ArrayLiteral) -> Code:
+    elements = [compile_node(element) for element in node.elements]
+
+    def array_literal(env):
+        res = []
+        for element in elements:
+            value = element(env)
+            if isinstance(value, ErrorObj):
+                return value
+            res.append(value)
+        return ArrayObj(elements=res)
+    return array_literal
+
+
+def compile_index_expression(node: IndexExpression) -> Code:
+    left = compile_node(node.left)
+    index = compile_node(node.index)
+
+    def index_expression(env):
+        arr = left(env)
+        if isinstance(arr, ErrorObj):
+            return arr
+        if not isinstance(arr, ArrayObj):
+            return ErrorObj(f'{arr.get_type()} cannot be subscripted')
+        i = index(env)
+        if isinstance(i, ErrorObj):
+            return i
+        if not isinstance(i, IntegerObj):
+            return ErrorObj(f'cannot index an array with non-integer types: {i.get_type()}')
+        elements = arr.elements
+        if i.value < 0 or i.value >= len(elements):
+            return ErrorObj(f'Array index out of bounds for length {len(elements)}: {i.value}')
+        return elements[i.value]
+    return index_expression
+
+
+def compile_shared_expression(node: SharedExpression) -> Code:
+    value = compile_node(node.value)
+    name = node.name
+    if node.first:
+        def first(env):
+            res = value(env)
+            if not isinstance(res, ErrorObj):
+                env.store[name] = res
+            return res
+        return first
+
+    def shared(env):
+        res = env.store.get(name)
+        if res is None:
+            # the first occurrence did not run in this environment
+            return value(env)
+        return res
+    return shared
+
+
+# node class -> function compiling it, for compile_node
+compilers: dict[type, Callable[[Node], Code]] = {
+    Program: compile_program,
+    ExpressionStatement: compile_expression_statement,
+    IntegerLiteral: compile_integer_literal,
+    Boolean: compile_boolean,
+    PrefixExpression: compile_prefix,
+    InfixExpression: compile_infix,
+    BlockStatement: compile_block,
+    IfExpression: compile_if_expression,
+    ReturnStatement: compile_return_statement,
+    LetStatement: compile_let_statement,
+    ResolvedIdentifier: compile_resolved_identifier,
+    Identifier: compile_identifier,
+    FunctionLiteral: compile_function_literal,
+    CallExpression: compile_call_expression,
+    StringExpression: compile_string_expression,
+    ArrayLiteral: compile_array_literal,
+    AssignmentStatement: compile_assignment_statement,
+    WhileStatement: compile_while_statement,
+    IndexExpression: compile_index_expression,
+    SharedExpression: compile_shared_expression,
+}
@@ -0,0 +1,72 @@
+import unittest
+from sagar.my_ast.ast import *
+from sagar.my_evaluator import evaluator_test
+from sagar.my_evaluator.backends import get_backend, CLOSURE_BACKEND
+from sagar.my_evaluator.closures import run, compile_node, CompiledFunctionObj
+from sagar.my_evaluator.evaluator import eval
+from sagar.my_object.object import *
+from sagar.my_optimizer.cse_test import PROGRAMS
+from sagar.my_optimizer.passes import optimize
+from sagar.my_optimizer.resolver_test import parse
+from sagar.my_parser.parser import IterativeParser
+
+
+def outcome(backend, program: Node) -> tuple:
+    # what a run returns and prints, comparable between backends
+    env = Environment(print_statements=[])
+    try:
+        res = backend(program, env)
+    except Exception as e:
+        return type(e).__name__, str(e), env.print_statements
+    # every backend makes functions of its own FunctionObj subclass
+    kind = 'FunctionObj' if isinstance(res, FunctionObj) else type(res).__name__
+    return kind, str(res), env.print_statements
+
+
+class TestClosureEvaluator(evaluator_test.TestEvaluator):
+    # the whole evaluator suite, run through the closure compiler
+
+    def evaluate(self, program: Node, env: Environment) -> Object:
+        return run(program, env)
+
+
+class TestClosures(unittest.TestCase):
+
+    def test_same_as_eval(self):
+        for i, source in enumerate(PROGRAMS):
+            for lazy_functions in [False, True]:
+                program = parse(source, lazy_functions=lazy_functions)
+                for variant in [program, optimize(program)]:
+                    expected = outcome(eval, variant)
+                    res = outcome(run, variant)
+                    self.assertTrue(res == expected, f'program {i} {source!r}: {res} != {expected}')
+
+    def test_compiled_once(self):
+        source = 'maan_le f = golmaal(n) { ye_lo n * 2; }; maan_le i = 0; while (i < 3) { print(f(i)); i = i + 1; }'
+        code = compile_node(optimize(parse(source)))
+        for _ in range(2):
+            env = Environment(print_statements=[])
+            code(env)
+            self.assertTrue(env.print_statements == ['0', '2', '4'], f'env.print_statements = {env.print_statements}')
+            self.assertTrue(isinstance(env.get('f'), CompiledFunctionObj), f'f is a {type(env.get("f"))}')
+
+    def test_functions_between_backends(self):
+        # a REPL environment may hold functions made by either backend
+        env = Environment(print_statements=[])
+        eval(parse('maan_le f = golmaal(x) { ye_lo x + 1; };'), env)
+        run(parse('maan_le g = golmaal(x) { ye_lo f(x) * 2; }; print(g(1));'), env)
+        eval(parse('print(g(2));'), env)
+        self.assertTrue(env.print_statements == ['4', '6'], f'env.print_statements = {env.print_statements}')
+
+    def test_deep_program(self):
+        program = parse('-' * 5000 + '1;', parser_cls=IterativeParser)
+        self.assertTrue(outcome(run, program) == outcome(eval, program), 'a program too deep to compile behaved differently')
+
+    def test_backends(self):
+        self.assertTrue(get_backend(CLOSURE_BACKEND) is run, 'closure backend not registered')
+        with self.assertRaises(ValueError):
+            get_backend('nope')
+
+
+if __name__ == '__main__':
+    unittest.main()
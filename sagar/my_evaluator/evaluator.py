@@ -1,12 +1,14 @@
 from sagar.my_ast.ast import *
 from sagar.my_object.object import *
 from dataclasses import dataclass
+from typing import Callable
 
 @dataclass(frozen=True)
 class EvalConstants:
-    TRUE_BOOLEAN_OBJ = BooleanObj(True)
-    FALSE_BOOLEAN_OBJ = BooleanObj(False)
-    NULL_OBJ = NullObj()
+    # the interned objects of sagar/my_object/object.py
+    TRUE_BOOLEAN_OBJ = TRUE_OBJ
+    FALSE_BOOLEAN_OBJ = FALSE_OBJ
+    NULL_OBJ = NULL_OBJ
 
 
 def __length(args: list[Object], **kwargs) -> Object:
@@ -14,9 +16,9 @@ def __length(args: list[Object], **kwargs) -> Object:
         return ErrorObj(f"wrong number of arguments. got={len(args)}, want=1")
     arg: Object = args[0]
     if isinstance(arg, StringObj):
-        return IntegerObj(len(arg.value))
+        return integer_obj(len(arg.value))
     elif isinstance(arg, ArrayObj):
-        return IntegerObj(len(arg.elements))
+        return integer_obj(len(arg.elements))
     return ErrorObj(f"argument to 'len' not supported, got {arg.get_type()}")
 
 def __print(args: list[Object], **kwargs) -> NullObj | ErrorObj:
@@ -32,7 +34,7 @@ def __print(args: list[Object], **kwargs) -> NullObj | ErrorObj:
     overload = env.print(res)
     if overload:
         return ErrorObj('Cannot print more than 1000 statements currently.')
-    return NullObj()
+    return NULL_OBJ
 
 builtins = {
     'len': Builtin(__length, name = 'len'),
@@ -43,97 +45,131 @@ builtins = {
 
 
 def eval(node: Node, env: Environment) -> Object:
-    if isinstance(node, Program):
-        return eval_statements(node.statements, env)
-    
-    elif isinstance(node, ExpressionStatement):
-        return eval(node.expression, env)
+    # one dict lookup on the exact node class instead of a chain of isinstance checks
+    handler = eval_handlers.get(type(node))
+    if handler is None:
+        handler = handler_for(type(node))
+    return handler(node, env)
+
+
+def handler_for(cls: type) -> Callable[[Node, Environment], Object]:
+    # a class without its own handler (LazyBlockStatement, or a node subclass defined
+    # elsewhere) is evaluated as its nearest base class that has one; the result is added
+    # to the table, so the MRO is only walked once per class
+    handler = eval_unknown
+    for base in cls.__mro__:
+        if base in eval_handlers:
+            handler = eval_handlers[base]
+            break
+    eval_handlers[cls] = handler
+    return handler
 
-    elif isinstance(node, IntegerLiteral):
-        return IntegerObj(value=node.value)
 
-    elif isinstance(node, Boolean):
-        if node.value:
-            return EvalConstants.TRUE_BOOLEAN_OBJ # As all boolean true objs are same follow singleton approach
-        else:
-            return EvalConstants.FALSE_BOOLEAN_OBJ
-    
-    elif isinstance(node, PrefixExpression):
-        right = eval(node.right, env)
-        if is_error(right):
-            return right
-        return eval_prefix_expression(node.operator, right)
-    
-    elif isinstance(node, InfixExpression):
-        left = eval(node.left, env)
-        if is_error(left):
-            return left
-        right = eval(node.right, env)
-        if is_error(right):
-            return right
-        return eval_infix_expression(node.operator, left, right)
+def eval_unknown(node: Node, env: Environment) -> Object:
+    return ErrorObj('cannot evaluate the statement')
 
-    elif isinstance(node, BlockStatement):
-        return eval_block_statements(node.statements, env)
-    
-    elif isinstance(node, IfExpression):
-        return eval_if_expression(node, env)
-    
-    elif isinstance(node, ReturnStatement):
-        value = eval(node.value, env)
-        if is_error(value):
-            return value
-        return ReturnObj(value=value)
-    
-    elif isinstance(node, LetStatement):
-        if node.name.value in builtins:
-            return ErrorObj(f'cannot override builtin function: {node.name.value}')
-        if not isinstance(node.value, Expression):
-            return ErrorObj(f'not an expression: {node.value.token_literal()}')
-        value = eval(node.value, env)
-        if is_error(value):
-            return value
-        env.put(node.name.value, value)
-        return NullObj()
 
-    elif isinstance(node, Identifier): 
-        return eval_identifier(node.value, env)
-    
-    elif isinstance(node, FunctionLiteral):
-        return FunctionObj(params=node.parameters, body=node.body, env=env)
-    
-    elif isinstance(node, CallExpression):
-        fun = eval(node.function, env)
-        if is_error(fun):
-            return fun
-        return apply_fun(fun, node.arguments, env)
-    
-    elif isinstance(node, StringExpression):
-        str_obj = StringObj(node.value)
-        return str_obj
-    
-    elif isinstance(node, ArrayLiteral):
-        elements = eval_arguments(node.elements, env)
-        if len(elements) == 1 and is_error(elements[0]):
-            return elements[0]
-        arr_obj = ArrayObj(elements=elements)
-        return arr_obj
-    
-    elif isinstance(node, AssignmentStatement):
-        right = eval(node.right, env)
-        if is_error(right):
-            return right
-        ass_obj = AssignmentObj(node.left, right)
-        evaluated = eval_assignment(ass_obj, env)
-        return evaluated
+def eval_program(node: Program, env: Environment) -> Object:
+    return eval_statements(node.statements, env)
 
-    elif isinstance(node, WhileStatement):
-        return eval_while_statement(node, env)
 
-    elif isinstance(node, IndexExpression):
-        return eval_index_operation(node, env)
-          
-    return ErrorObj('cannot evaluate the statement')
+def eval_expression_statement(node: ExpressionStatement, env: Environment) -> Object:
+    return eval(node.expression, env)
+
+
+def eval_integer_literal(node: IntegerLiteral, env: Environment) -> Object:
+    return literal_obj(node)
+
+
+def eval_boolean(node: Boolean, env: Environment) -> Object:
+    if node.value:
+        return EvalConstants.TRUE_BOOLEAN_OBJ # As all boolean true objs are same follow singleton approach
+    else:
+        return EvalConstants.FALSE_BOOLEAN_OBJ
+
+
+def eval_prefix(node: PrefixExpression, env: Environment) -> Object:
+    right = eval(node.right, env)
+    if is_error(right):
+        return right
+    return eval_prefix_expression(node.operator, right)
+
+
+def eval_infix(node: InfixExpression, env: Environment) -> Object:
+    left = eval(node.left, env)
+    if is_error(left):
+        return left
+    right = eval(node.right, env)
+    if is_error(right):
+        return right
+    return eval_infix_expression(node.operator, left, right)
+
+
+def eval_block(node: BlockStatement, env: Environment) -> Object:
+    return eval_block_statements(node.statements, env)
+
+
+def eval_return_statement(node: ReturnStatement, env: Environment) -> Object:
+    value = eval(node.value, env)
+    if is_error(value):
+        return value
+    return ReturnObj(value=value)
+
+
+def eval_let_statement(node: LetStatement, env: Environment) -> Object:
+    if node.name.value in builtins:
+        return ErrorObj(f'cannot override builtin function: {node.name.value}')
+    if not isinstance(node.value, Expression):
+        return ErrorObj(f'not an expression: {node.value.token_literal()}')
+    value = eval(node.value, env)
+    if is_error(value):
+        return value
+    name = node.name
+    if isinstance(name, ResolvedIdentifier) and name.slot != GLOBAL_SLOT:
+        env.slots[name.slot] = value
+    else:
+        env.put(name.value, value)
+    return NULL_OBJ
+
+
+def eval_identifier_node(node: Identifier, env: Environment) -> Object:
+    return eval_identifier(node.value, env)
+
+
+def eval_resolved_function_literal(node: ResolvedFunctionLiteral, env: Environment) -> Object:
+    return FunctionObj(params=node.parameters, body=node.body, env=env, scope=node.scope)
+
+
+def eval_function_literal(node: FunctionLiteral, env: Environment) -> Object:
+    return FunctionObj(params=node.parameters, body=node.body, env=env)
+
+
+def eval_call_expression(node: CallExpression, env: Environment) -> Object:
+    fun = eval(node.function, env)
+    if is_error(fun):
+        return fun
+    return apply_fun(fun, node.arguments, env)
+
+
+def eval_string_expression(node: StringExpression, env: Environment) -> Object:
+    return literal_obj(node)
+
+
+def eval_array_literal(node: ArrayLiteral, env: Environment) -> Object:
+    elements = eval_arguments(node.elements, env)
+    if len(elements) == 1 and is_error(elements[0]):
+        return elements[0]
+    arr_obj = ArrayObj(elements=elements)
+    return arr_obj
+
+
+def eval_assignment_statement(node: AssignmentStatement, env: Environment) -> Object:
+    right = eval(node.right, env)
+    if is_error(right):
+        return right
+    ass_obj = AssignmentObj(node.left, right)
+    evaluated = eval_assignment(ass_obj, env)
+    return evaluated
 
 
 def apply_fun(fun: Object, raw_args: list[Expression], env: Environment) -> Object:
@@ -143,6 +179,8 @@ def apply_fun(fun: Object, raw_args: list[Expression], env: Environment) -> Obje
         return args[0]
 
     if isinstance(fun, FunctionObj):
+        if isinstance(fun.body, LazyBlockStatement) and fun.body.parse() is None:
+            return ErrorObj(f"syntax error in function body: {'; '.join(fun.body.errors)}")
         extended_env = get_extended_env(fun, args)
         if is_error(extended_env):
             return extended_env
@@ -156,11 +194,17 @@ def apply_fun(fun: Object, raw_args: list[Expression], env: Environment) -> Obje
     
 
 def get_extended_env(fun: FunctionObj, args: list[Object]):
-    extended_env = Environment.new_enclosing_environment(fun.env)
+    extended_env = Environment.new_enclosing_environment(fun.env, fun.scope)
     
     if len(fun.params) != len(args):
         return ErrorObj(f'expected {len(fun.params)} arguments. but passed {len(args)}.')
 
+    if fun.scope is not None:
+        slots = extended_env.slots
+        for i, param in enumerate(fun.params):
+            slots[param.slot] = args[i]
+        return extended_env
+
     for i, param in enumerate(fun.params):
         extended_env.put(param.value, args[i])
 
@@ -224,7 +268,7 @@ def eval_minus_operator(right: Object) -> Object:
         return right
 
     if isinstance(right, IntegerObj):
-        return IntegerObj(-right.value)
+        return integer_obj(-right.value)
     
     return ErrorObj(f'unknown operator: -{right.get_type()}')
 
@@ -234,6 +278,7 @@ def eval_bang_operator(right: Object) -> Object:
         return right
 
     if isinstance(right, BooleanObj):
+        # every boolean is one of the two interned objects, comparison results included
         if right is EvalConstants.TRUE_BOOLEAN_OBJ:
             return EvalConstants.FALSE_BOOLEAN_OBJ
         return EvalConstants.TRUE_BOOLEAN_OBJ
@@ -270,28 +315,28 @@ def eval_infix_expression(operator: str, left: Object, right: Object) -> Object:
             return ErrorObj(f'unknown operator: {left.get_type()} {operator} {right.get_type()}')
         
         if operator == '+':
-            return IntegerObj(left.value + right.value)
+            return integer_obj(left.value + right.value)
         
         if operator == '-':
-            return IntegerObj(left.value - right.value)
+            return integer_obj(left.value - right.value)
         
         if operator == '*':
-            return IntegerObj(left.value * right.value)
+            return integer_obj(left.value * right.value)
         
         if operator == '/':
-            return IntegerObj(left.value // right.value)
+            return integer_obj(left.value // right.value)
         
         if operator == '>':
-            return BooleanObj(left.value > right.value)
+            return boolean_obj(left.value > right.value)
         
         if operator == '<':
-            return BooleanObj(left.value < right.value)
+            return boolean_obj(left.value < right.value)
         
         if operator == '==':
-            return BooleanObj(left.value == right.value)
+            return boolean_obj(left.value == right.value)
         
         if operator == '!=':
-            return BooleanObj(left.value != right.value)
+            return boolean_obj(left.value != right.value)
     
     return EvalConstants.NULL_OBJ
 
@@ -373,7 +418,52 @@ def eval_identifier(name, env: Environment):
         return res
     return ErrorObj(f'identifier not found: {name}')
 
+def lookup_resolved(iden: ResolvedIdentifier, env: Environment) -> Object | None:
+    # what env.get(iden.value) returns, going straight to the environment that declares it
+    for _ in range(iden.depth):
+        env = env.outer
+    if iden.slot != GLOBAL_SLOT:
+        res = env.slots[iden.slot]
+        if res is not None:
+            return res
+        # declared in this scope but not set yet, so it is looked up further out
+        env = env.outer
+    return env.get(iden.value)
+
+def eval_resolved_identifier(iden: ResolvedIdentifier, env: Environment):
+    res = lookup_resolved(iden, env)
+    if res:
+        return res
+    res = builtins.get(iden.value, None)
+    if res:
+        return res
+    return ErrorObj(f'identifier not found: {iden.value}')
+
+def eval_shared_expression(node: SharedExpression, env: Environment) -> Object:
+    # blocks share their environment, so later occurrences find the value in env.store
+    if node.first:
+        value = eval(node.value, env)
+        if not is_error(value):
+            env.store[node.name] = value
+        return value
+    value = env.store.get(node.name)
+    if value is None:
+        # the first occurrence did not run in this environment
+        return eval(node.value, env)
+    return value
+
 def eval_assignment(obj: AssignmentObj, env: Environment):
+    if isinstance(obj.left, ResolvedIdentifier):
+        iden: ResolvedIdentifier = obj.left
+        if not lookup_resolved(iden, env):
+            return ErrorObj(f'identifier not declared: {iden.value}')
+        # assignment writes to the current environment, which declares the name
+        if iden.slot == GLOBAL_SLOT:
+            env.put(iden.value, obj.right)
+        else:
+            env.slots[iden.slot] = obj.right
+        return EvalConstants.NULL_OBJ
+
     if isinstance(obj.left, Identifier):
         iden: Identifier = obj.left
         prev = env.get(iden.value)
@@ -400,5 +490,31 @@ def eval_index_operation(ie: IndexExpression, env: Environment):
         return ErrorObj(f'Array index out of bounds for length {len(elements)}: {index.value}')
     return elements[index.value]
 
+# node class -> function evaluating it, for eval
+eval_handlers: dict[type, Callable[[Node, Environment], Object]] = {
+    Program: eval_program,
+    ExpressionStatement: eval_expression_statement,
+    IntegerLiteral: eval_integer_literal,
+    Boolean: eval_boolean,
+    PrefixExpression: eval_prefix,
+    InfixExpression: eval_infix,
+    BlockStatement: eval_block,
+    IfExpression: eval_if_expression,
+    ReturnStatement: eval_return_statement,
+    LetStatement: eval_let_statement,
+    ResolvedIdentifier: eval_resolved_identifier,
+    Identifier: eval_identifier_node,
+    ResolvedFunctionLiteral: eval_resolved_function_literal,
+    FunctionLiteral: eval_function_literal,
+    CallExpression: eval_call_expression,
+    StringExpression: eval_string_expression,
+    ArrayLiteral: eval_array_literal,
+    AssignmentStatement: eval_assignment_statement,
+    WhileStatement: eval_while_statement,
+    IndexExpression: eval_index_operation,
+    SharedExpression: eval_shared_expression,
+}
+
+
 def is_error(err: Object) -> bool:
     return err and isinstance(err, ErrorObj)
\ No newline at end of file
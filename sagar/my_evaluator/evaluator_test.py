@@ -1,11 +1,17 @@
 import unittest
 from sagar.lexer.Lexer import new_lexer
 from sagar.my_parser.parser import Parser
-from sagar.my_evaluator.evaluator import eval
+from sagar.my_ast.ast import Node, Expression, InfixExpression
+from sagar.my_evaluator.evaluator import eval, eval_handlers
 from sagar.my_object.object import *
 
 
 class TestEvaluator(unittest.TestCase):
+    # Backends other than eval subclass this and override evaluate, so they run the
+    # same tests (see closures_test.py)
+
+    def evaluate(self, program: Node, env: Environment) -> Object:
+        return eval(program, env)
 
     def test_eval_integer_expression(self):
         inps = [("5", 5),
@@ -56,7 +62,12 @@ class TestEvaluator(unittest.TestCase):
                 ("!5", False),
                 ("!!true", True),
                 ("!!false", False),
-                ("!!5", True),]
+                ("!!5", True),
+                # comparisons give the interned booleans, so ! sees what they are
+                ("!(1 < 2)", False),
+                ("!(1 > 2)", True),
+                ("maan_le a = 1 == 1; !a", False),
+                ("!!(2 != 3)", True),]
         for i, (inp, exp) in enumerate(inps):
             evaluated = self.get_eval(inp)
             self.validate_boolean_obj(evaluated, exp, idx = i)
@@ -256,6 +267,10 @@ class TestEvaluator(unittest.TestCase):
             ('maan_le a = 10; maan_le b = 20; print(a, " ",  b, " ", a + b);', ['10 20 30']),
             ('maan_le a = 10; maan_le b = 20; maan_le c = a * b; print(a, b, c);', ['1020200']),
             ('maan_le a = 10; maan_le b = 20; maan_le c = a * b; print(a, b, c, c / a);', ['102020020']),
+            # a function prints its body; strings keep their quotes
+            ('print(golmaal() { "hi" });', ['golmaal (  ) { "hi" }']),
+            ('maan_le f = golmaal(x) { maan_le s = "a b"; x = x + 1; while (x < 3) { x = x + 1; } ye_lo s; }; print(f);',
+             ['golmaal ( x ) { maan_le s = "a b"; x = (x + 1); while(x < 3) x = (x + 1); ye_lo s }']),
         ]
 
         for i, (test, exp) in enumerate(tests):
@@ -263,7 +278,7 @@ class TestEvaluator(unittest.TestCase):
             l = new_lexer(test)
             p = Parser(l)
             program = p.parse_program()
-            eval(program, env)
+            self.evaluate(program, env)
             self.assertTrue(len(env.print_statements) == len(exp), f'len(env.print_statements) -> {i} = {len(env.print_statements)} != {len(exp)}')
             for j, s in enumerate(exp):
                 self.assertTrue(env.print_statements[j] == s, f'env.print_statements[{j}] = {env.print_statements[j]} != {s}')
@@ -294,7 +309,7 @@ class TestEvaluator(unittest.TestCase):
             p = Parser(l)
             program = p.parse_program()
 
-            evaluated = eval(program, env)
+            evaluated = self.evaluate(program, env)
             if isinstance(evaluated, ErrorObj):
                 print(evaluated.message)
             self.assertTrue(isinstance(evaluated, NullObj), f'evaluated -> {i} is not a NullObj. Its a {type(evaluated)}')
@@ -337,6 +352,48 @@ class TestEvaluator(unittest.TestCase):
             else:
                 self.assertTrue(env.print_statements == exp[i], f'env.print_statements -> {i} = {env.print_statements} != {exp[i]}')
 
+    def test_lazy_function_bodies(self):
+        tests = [
+            ('maan_le add = golmaal(a, b) { maan_le twice = golmaal(x) { ye_lo x * 2; }; ye_lo twice(a) + b; }; print(add(1, 2), add(3, 4));', None, ['410']),
+            ('maan_le unused = golmaal() { maan_le = 1; }; print("ok");', None, ['ok']),
+            ('maan_le bad = golmaal() { maan_le = 1; }; print("before"); bad(); print("after");',
+             "syntax error in function body: Expected 'IDENT'. But found '=' (line 1, column 35)", ['before']),
+        ]
+        for i, (inp, error, exp) in enumerate(tests):
+            p = Parser(new_lexer(inp), lazy_functions=True)
+            program = p.parse_program()
+            self.assertTrue(p.errors == [], f'p.errors -> {i} = {p.errors}')
+            env = Environment(print_statements=[])
+            evaluated = self.evaluate(program, env)
+            if error is None:
+                self.assertTrue(not isinstance(evaluated, ErrorObj), f'evaluated -> {i} = {evaluated}')
+            else:
+                self.assertTrue(isinstance(evaluated, ErrorObj) and evaluated.message == error, f'evaluated -> {i} = {evaluated}')
+            self.assertTrue(env.print_statements == exp, f'env.print_statements -> {i} = {env.print_statements} != {exp}')
+
+    def test_dispatch(self):
+        class TracedInfix(InfixExpression):
+            __slots__ = ()
+
+        class Unknown(Expression):
+            def token_literal(self):
+                return ''
+
+            def expression_node(self):
+                pass
+
+        program = Parser(new_lexer('2 * 3 + 4')).parse_program()
+        infix = program.statements[0].expression
+        traced = TracedInfix(infix.token, infix.left, infix.operator, infix.right)
+        for i in range(2):
+            # looked up through the MRO the first time, from the table after
+            self.validate_integer_obj(eval(traced, Environment()), 10, i)
+        self.assertTrue(eval_handlers[TracedInfix] is eval_handlers[InfixExpression], 'the subclass handler was not cached')
+
+        for i, node in enumerate([Unknown(), None]):
+            evaluated = self.evaluate(node, Environment())
+            self.assertTrue(isinstance(evaluated, ErrorObj) and evaluated.message == 'cannot evaluate the statement', f'evaluated -> {i} = {evaluated}')
+
 
     def get_eval_env(self, inp: str):
         l = new_lexer(inp)
@@ -344,7 +401,7 @@ class TestEvaluator(unittest.TestCase):
         program = p.parse_program()
 
         env = Environment(print_statements=[])
-        evaluated = eval(program, env)
+        evaluated = self.evaluate(program, env)
         return evaluated, env
     
     def get_eval(self, inp: str) -> Object:
@@ -352,7 +409,7 @@ class TestEvaluator(unittest.TestCase):
         p = Parser(l)
 
         program = p.parse_program()
-        return eval(program, Environment(print_statements=[]))
+        return self.evaluate(program, Environment(print_statements=[]))
     
 
 if __name__ == '__main__':
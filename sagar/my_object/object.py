@@ -1,7 +1,7 @@
 from __future__ import annotations 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from sagar.my_ast.ast import Identifier, BlockStatement
+from sagar.my_ast.ast import Identifier, BlockStatement, Scope, IntegerLiteral, StringExpression
 from typing import Callable
 
 ObjectType = str
@@ -94,16 +94,24 @@ class ErrorObj(Object):
         return f"Error: {self.message}"
     
 class Environment:
-    def __init__(self, outer: Environment | None = None, print_statements: list[str] | None = None ):
+    def __init__(self, outer: Environment | None = None, print_statements: list[str] | None = None, scope: Scope | None = None):
         self.store = {}
         self.outer = outer
         self.print_statements = print_statements
+        # Environment of a resolved function call: the variables of its scope live in
+        # slots (None while unset), anything else in store
+        self.scope = scope
+        self.slots: list[Object | None] | None = [None] * len(scope.names) if scope else None
 
     @classmethod
-    def new_enclosing_environment(cls, env: Environment):
-        return cls(outer = env)
+    def new_enclosing_environment(cls, env: Environment, scope: Scope | None = None):
+        return cls(outer = env, scope = scope)
 
     def get(self, name):
+        if self.scope is not None:
+            slot = self.scope.index.get(name)
+            if slot is not None and self.slots[slot] is not None:
+                return self.slots[slot]
 
         if name in self.store:
             return self.store.get(name, None)
@@ -114,6 +122,11 @@ class Environment:
         return None
 
     def put(self, name, val):
+        if self.scope is not None:
+            slot = self.scope.index.get(name)
+            if slot is not None:
+                self.slots[slot] = val
+                return val
         self.store[name] = val
         return val
     
@@ -126,10 +139,12 @@ class Environment:
             return self.outer.print(obj)
     
 class FunctionObj(Object):
-    def __init__(self, params: list[Identifier], body: BlockStatement, env: Environment):
+    def __init__(self, params: list[Identifier], body: BlockStatement, env: Environment, scope: Scope | None = None):
         self.params = params
         self.body = body
         self.env = env
+        # set for a resolved function literal: its calls get slot environments
+        self.scope = scope
 
     def get_type(self):
         return ObjConstants.FUNCTION_OBJ
@@ -185,7 +200,7 @@ class BuiltinKeywordFunction:
         return self.inspect()
 
 def null_function(*args):
-    return NullObj()
+    return NULL_OBJ
 
 class ArrayObj(Object):
     def __init__(self, elements: list[Object]):
@@ -212,4 +227,50 @@ class AssignmentObj(Object):
         return ' '.join([str(self.left), '=', str(self.right)])
     
     def __str__(self):
-        return self.inspect()
\ No newline at end of file
+        return self.inspect()
+
+
+# Interned objects. Objects are never changed once made (assignment rebinds a name, and
+# arrays cannot be assigned into), so equal values can share one object: the booleans and
+# null have one object each, integers in the small int range are made once, up front, and
+# the object of an integer or string literal is kept on its node. Every backend makes its
+# booleans with boolean_obj, so ! (which tests identity with TRUE_OBJ) sees a comparison's
+# result as the boolean it is.
+TRUE_OBJ = BooleanObj(True)
+FALSE_OBJ = BooleanObj(False)
+NULL_OBJ = NullObj()
+
+SMALL_INT_MIN = -5
+# loops stop after 1000 iterations, so counters stay in range
+SMALL_INT_MAX = 1024
+small_ints: list[IntegerObj] = []
+
+
+def set_small_int_range(low: int, high: int):
+    # integers made before keep working; they are just not shared
+    global SMALL_INT_MIN, SMALL_INT_MAX
+    small_ints[:] = [IntegerObj(value) for value in range(low, high + 1)]
+    SMALL_INT_MIN, SMALL_INT_MAX = low, high
+
+
+set_small_int_range(SMALL_INT_MIN, SMALL_INT_MAX)
+
+
+def integer_obj(value: int) -> IntegerObj:
+    if SMALL_INT_MIN <= value <= SMALL_INT_MAX:
+        return small_ints[value - SMALL_INT_MIN]
+    return IntegerObj(value)
+
+
+def boolean_obj(value: bool) -> BooleanObj:
+    return TRUE_OBJ if value else FALSE_OBJ
+
+
+def literal_obj(node: IntegerLiteral | StringExpression) -> IntegerObj | StringObj:
+    # The object made for the node by sagar/my_optimizer/literals.py, or a new one. The
+    # node may be shared between threads (ParseCache), so it is never written here. Nodes
+    # loaded by serialize or made by flat do not run __init__, so the slot may be unset.
+    obj = getattr(node, 'obj_cache', None)
+    if obj is None:
+        return integer_obj(node.value) if isinstance(node, IntegerLiteral) else StringObj(node.value)
+    return obj
@@ -0,0 +1,56 @@
+import unittest
+from sagar.my_ast.ast import updated
+from sagar.my_evaluator.backends import BACKENDS
+from sagar.my_object import object as objects
+from sagar.my_object.object import *
+from sagar.my_optimizer.literals import attach_literal_objects
+from sagar.my_optimizer.passes import optimize
+from sagar.my_optimizer.resolver_test import parse
+
+
+class TestInterning(unittest.TestCase):
+
+    def test_small_ints(self):
+        for value in [SMALL_INT_MIN, -1, 0, 1, 500, SMALL_INT_MAX]:
+            obj = integer_obj(value)
+            self.assertTrue(obj is integer_obj(value) and obj.value == value, f'{value} is not interned')
+        for value in [SMALL_INT_MIN - 1, SMALL_INT_MAX + 1, 10 ** 20]:
+            obj = integer_obj(value)
+            self.assertTrue(obj is not integer_obj(value) and obj.value == value, f'{value} is interned')
+
+    def test_set_small_int_range(self):
+        low, high = objects.SMALL_INT_MIN, objects.SMALL_INT_MAX
+        try:
+            set_small_int_range(0, 10)
+            self.assertTrue(integer_obj(10) is integer_obj(10), '10 is not interned')
+            self.assertTrue(integer_obj(11) is not integer_obj(11) and integer_obj(-1).value == -1, 'the range did not change')
+            env = Environment(print_statements=[])
+            BACKENDS['tree'](parse('print(5 * 4, -1 + 1);'), env)
+            self.assertTrue(env.print_statements == ['200'], f'env.print_statements = {env.print_statements}')
+        finally:
+            set_small_int_range(low, high)
+        self.assertTrue(integer_obj(high) is integer_obj(high), 'the range was not restored')
+
+    def test_booleans_and_null(self):
+        self.assertTrue(boolean_obj(True) is TRUE_OBJ and boolean_obj(1 > 2) is FALSE_OBJ, 'booleans are not interned')
+        program = optimize(parse('maan_le a = 1; maan_le f = golmaal() { maan_le b = 1; }; [a < 2, a == 1, a > 2, f(), print()];'))
+        for name, backend in BACKENDS.items():
+            res = backend(program, Environment(print_statements=[]))
+            exp = [TRUE_OBJ, TRUE_OBJ, FALSE_OBJ, NULL_OBJ, NULL_OBJ]
+            self.assertTrue(isinstance(res, ArrayObj) and len(res.elements) == 5 and all(a is b for a, b in zip(res.elements, exp)), f'{name}: res = {res}')
+
+    def test_literal_objects(self):
+        source = 'maan_le f = golmaal() { ye_lo [7, "s", 2000]; }; [f(), f()];'
+        for program in [attach_literal_objects(parse(source)), optimize(parse(source))]:
+            for name, backend in BACKENDS.items():
+                res = backend(program, Environment(print_statements=[]))
+                first, second = res.elements
+                self.assertTrue(all(a is b for a, b in zip(first.elements, second.elements)), f'{name}: literals were made twice')
+        node = parse('2000;').statements[0].expression
+        obj = literal_obj(node)
+        self.assertTrue(obj.value == 2000 and node.obj_cache is None and literal_obj(node) is not obj, 'the object was kept on the node')
+        copy = updated(node, value=3000, obj_cache=obj)
+        self.assertTrue(literal_obj(copy) is obj and updated(copy, value=4000).obj_cache is None, 'a copied node kept the object')
+
+if __name__ == '__main__':
+    unittest.main()
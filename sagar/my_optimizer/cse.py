@@ -0,0 +1,265 @@
+from sagar.my_ast.ast import *
+from sagar.my_ast.hashing import structural_hash
+
+# Common subexpression elimination within a block. A pure expression (arithmetic,
+# comparisons, indexing and len() over variables and literals) that is evaluated again
+# later in the same block, with none of its variables assigned in between, is evaluated
+# once: the first occurrence becomes a SharedExpression that keeps its value, and the
+# later ones SharedExpressions that read it. Occurrences are matched by structural hash.
+#
+# Why this is safe in Golmaal:
+#   - only code running in an environment assigns to it (assignment in a called function
+#     writes to the function's own environment), and blocks share their function's
+#     environment, so the variables of a block only change by maan_le / = statements in
+#     the block or its nested if / while blocks. Those kill the expressions using them.
+#   - objects are never mutated, so arrays cannot change under an unchanged name
+#   - len cannot be redefined (maan_le len is an error), unless it is a parameter name
+#   - only straight-line code is matched: an occurrence is only reused by ones evaluated
+#     after it in the same run of the block. Nested blocks are matched on their own, and
+#     while conditions (evaluated again after the body) are left alone.
+# Errors and evaluation order are unchanged, since the first occurrence is still where
+# the value is first computed. Like the other passes, the input tree is never mutated.
+
+PURE_BUILTINS = {'len'}
+
+
+def eliminate_common_subexpressions(program: Program) -> Program:
+    try:
+        return CommonSubexpressions(program).eliminate_program(program)
+    except RecursionError:
+        # nested too deeply; the program evaluates the same without the pass
+        return program
+
+
+def assigned_names(node: Node | None) -> set[str]:
+    # names a statement or block assigns with maan_le or =, outside of nested functions
+    names: set[str] = set()
+    stack: list = [node]
+    while stack:
+        node = stack.pop()
+        if node is None or isinstance(node, (FunctionLiteral, LazyBlockStatement)):
+            continue
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, LetStatement):
+            if node.name is not None:
+                names.add(node.name.value)
+            stack.append(node.value)
+        elif isinstance(node, AssignmentStatement):
+            if isinstance(node.left, Identifier):
+                names.add(node.left.value)
+            stack.append(node.right)
+        elif isinstance(node, (BlockStatement, Program)):
+            stack.append(node.statements)
+        elif isinstance(node, ExpressionStatement):
+            stack.append(node.expression)
+        elif isinstance(node, ReturnStatement):
+            stack.append(node.value)
+        elif isinstance(node, WhileStatement):
+            stack.extend((node.condition, node.body))
+        elif isinstance(node, IfExpression):
+            stack.extend((node.condition, node.consequence, node.alternative))
+        elif isinstance(node, PrefixExpression):
+            stack.append(node.right)
+        elif isinstance(node, InfixExpression):
+            stack.extend((node.left, node.right))
+        elif isinstance(node, CallExpression):
+            stack.append(node.function)
+            stack.append(node.arguments)
+        elif isinstance(node, ArrayLiteral):
+            stack.append(node.elements)
+        elif isinstance(node, IndexExpression):
+            stack.extend((node.left, node.index))
+    return names
+
+
+def parameter_names(program: Program) -> set[str]:
+    names: set[str] = set()
+    stack: list = [program]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, FunctionLiteral):
+            names.update(param.value for param in node.parameters or [])
+            if not isinstance(node.body, LazyBlockStatement):
+                stack.append(node.body)
+        elif isinstance(node, Node) and not isinstance(node, LazyBlockStatement):
+            for cls in type(node).__mro__:
+                stack.extend(getattr(node, slot, None) for slot in getattr(cls, '__slots__', ()) if slot != 'printed')
+    return names
+
+
+class Block:
+    # the state of one walk over the statements of a block
+    def __init__(self, counts: list[int] | None = None):
+        # occurrences of each group (an expression and its repeats), numbered in walk
+        # order: counted by the first walk, read by the rewriting walk
+        self.counting = counts is None
+        self.counts = [] if counts is None else counts
+        self.next_group = 0
+        # structural hash -> (group, variable names) of expressions computed so far
+        self.available: dict[bytes, tuple[int, set[str]]] = {}
+        # group -> environment name of its value
+        self.names: dict[int, str] = {}
+
+    def kill(self, names: set[str]):
+        if names:
+            self.available = {h: entry for h, entry in self.available.items() if not entry[1] & names}
+
+
+class CommonSubexpressions:
+    def __init__(self, program: Program):
+        # a parameter named like a builtin hides it, so calls to it are not pure
+        self.pure_builtins = PURE_BUILTINS - parameter_names(program)
+        self.names = 0
+        # id -> variable names of pure candidate expressions, None if impure
+        self.purity: dict[int, set[str] | None] = {}
+
+    def eliminate_program(self, program: Program) -> Program:
+        return updated(program, statements=self.eliminate_statements(program.statements))
+
+    def eliminate_statements(self, statements: list[Statement]) -> list[Statement]:
+        # count the occurrences in a first walk, then rewrite the repeated ones
+        counting = Block()
+        for statement in statements:
+            self.statement(statement, counting)
+        block = Block(counting.counts)
+        res = [self.statement(statement, block) for statement in statements]
+        if all(new is old for new, old in zip(res, statements)):
+            return statements
+        return res
+
+    def eliminate_block(self, node: BlockStatement | None, block: Block) -> BlockStatement | None:
+        if node is None or isinstance(node, LazyBlockStatement):
+            return node
+        if block.counting:
+            return node
+        return updated(node, statements=self.eliminate_statements(node.statements))
+
+    def statement(self, node: Statement | None, block: Block) -> Statement | None:
+        if isinstance(node, ExpressionStatement):
+            return updated(node, expression=self.expression(node.expression, block))
+
+        elif isinstance(node, LetStatement):
+            node = updated(node, value=self.expression(node.value, block))
+            if node.name is not None:
+                block.kill({node.name.value})
+            return node
+
+        elif isinstance(node, ReturnStatement):
+            return updated(node, value=self.expression(node.value, block))
+
+        elif isinstance(node, AssignmentStatement):
+            node = updated(node, right=self.expression(node.right, block))
+            if isinstance(node.left, Identifier):
+                block.kill({node.left.value})
+            return node
+
+        elif isinstance(node, WhileStatement):
+            # the condition is evaluated again after the body, so it is not matched
+            block.kill(assigned_names(node.body))
+            return updated(node, body=self.eliminate_block(node.body, block))
+
+        elif isinstance(node, BlockStatement):
+            block.kill(assigned_names(node))
+            return self.eliminate_block(node, block)
+
+        return node
+
+    def expressions(self, expressions: list[Expression] | None, block: Block) -> list[Expression] | None:
+        if expressions is None:
+            return None
+        res = [self.expression(expression, block) for expression in expressions]
+        if all(new is old for new, old in zip(res, expressions)):
+            return expressions
+        return res
+
+    def expression(self, node: Expression | None, block: Block) -> Expression | None:
+        # walks in evaluation order, so an occurrence is only reused after it is computed
+        names = self.pure(node)
+        if names is not None and not isinstance(node, (Identifier, IntegerLiteral, Boolean, StringExpression)):
+            h = structural_hash(node)
+            entry = block.available.get(h)
+            if entry is not None:
+                return self.occurrence(node, entry[0], block, first=False)
+            group = block.next_group
+            block.next_group += 1
+            if block.counting:
+                block.counts.append(1)
+            rewritten = self.children(node, block)
+            block.available[h] = (group, names)
+            return self.occurrence(rewritten, group, block, first=True)
+        return self.children(node, block)
+
+    def occurrence(self, node: Expression, group: int, block: Block, first: bool) -> Expression:
+        if block.counting:
+            if not first:
+                block.counts[group] += 1
+            return node
+        if block.counts[group] < 2:
+            return node
+        name = block.names.get(group)
+        if name is None:
+            # '$' cannot start an identifier, so this never hides a variable
+            name = block.names[group] = f'${self.names}'
+            self.names += 1
+        return SharedExpression(node.token, name, node, first)
+
+    def children(self, node: Expression | None, block: Block) -> Expression | None:
+        if isinstance(node, PrefixExpression):
+            return updated(node, right=self.expression(node.right, block))
+
+        elif isinstance(node, InfixExpression):
+            return updated(node, left=self.expression(node.left, block), right=self.expression(node.right, block))
+
+        elif isinstance(node, IfExpression):
+            condition = self.expression(node.condition, block)
+            # one of the branches runs next, in the same environment
+            block.kill(assigned_names(node.consequence) | assigned_names(node.alternative))
+            return updated(node, condition=condition, consequence=self.eliminate_block(node.consequence, block), alternative=self.eliminate_block(node.alternative, block))
+
+        elif isinstance(node, FunctionLiteral):
+            if block.counting or node.body is None or isinstance(node.body, LazyBlockStatement):
+                return node
+            return updated(node, body=self.eliminate_block(node.body, block))
+
+        elif isinstance(node, CallExpression):
+            return updated(node, function=self.expression(node.function, block), arguments=self.expressions(node.arguments, block))
+
+        elif isinstance(node, ArrayLiteral):
+            return updated(node, elements=self.expressions(node.elements, block))
+
+        elif isinstance(node, IndexExpression):
+            return updated(node, left=self.expression(node.left, block), index=self.expression(node.index, block))
+
+        return node
+
+    def pure(self, node: Expression | None) -> set[str] | None:
+        # the variables of a pure expression, None if it is not pure
+        if node is None:
+            return None
+        key = id(node)
+        if key in self.purity:
+            return self.purity[key]
+        res: set[str] | None = None
+        if isinstance(node, Identifier):
+            res = {node.value}
+        elif isinstance(node, (IntegerLiteral, Boolean, StringExpression)):
+            res = set()
+        elif isinstance(node, PrefixExpression):
+            res = self.pure(node.right)
+        elif isinstance(node, (InfixExpression, IndexExpression)):
+            left = self.pure(node.left)
+            right = self.pure(node.right if isinstance(node, InfixExpression) else node.index)
+            res = left | right if left is not None and right is not None else None
+        elif isinstance(node, CallExpression) and isinstance(node.function, Identifier) and node.function.value in self.pure_builtins and node.arguments is not None:
+            res = set()
+            for arg in node.arguments:
+                names = self.pure(arg)
+                if names is None:
+                    res = None
+                    break
+                res |= names
+        self.purity[key] = res
+        return res
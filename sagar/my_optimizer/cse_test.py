@@ -0,0 +1,114 @@
+import unittest
+from sagar.my_ast.ast import *
+from sagar.my_ast.flat_test import flatten
+from sagar.my_optimizer.cse import eliminate_common_subexpressions
+from sagar.my_optimizer.folding_test import run
+from sagar.my_optimizer.passes import optimize
+from sagar.my_optimizer.resolver import resolve
+from sagar.my_optimizer.resolver_test import PROGRAMS as RESOLVER_PROGRAMS, parse
+from sagar.my_parser.parser import IterativeParser
+
+PROGRAMS = RESOLVER_PROGRAMS + [
+    'maan_le arr = [1, 2, 3]; maan_le a = len(arr) * 2; maan_le b = len(arr) + 1; print(a, b);',
+    'maan_le x = 2; maan_le y = 3; print(x * y + 1, x * y - 1);',
+    'maan_le x = 2; print(x * 3); x = 5; print(x * 3);',
+    'maan_le x = 2; print(x * 3); maan_le x = 5; print(x * 3);',
+    'maan_le x = 2; print(x * 3, if (x > 0) { x = 10; 1 } else { 2 }, x * 3);',
+    'maan_le x = 2; print(x * 3); if (x > 0) { x = 10; } print(x * 3);',
+    'maan_le i = 0; maan_le s = 0; while (i * 2 < 10) { s = s + i * 2; i = i + 1; } print(s, i * 2);',
+    'maan_le i = 0; maan_le s = ""; while (i < 3) { s = s + (i * i) + "," + (i * i); i = i + 1; } print(s);',
+    'maan_le a = 3; maan_le f = golmaal() { maan_le a = 5; ye_lo a; }; print(a * a, f(), a * a);',
+    'maan_le a = 3; maan_le f = golmaal() { a = 5; ye_lo a; }; print(a * a, f(), a * a);',
+    'maan_le f = golmaal(len) { ye_lo len(1) + len(1); }; print(f(golmaal(x) { ye_lo x + 1; }));',
+    'maan_le a = 4; maan_le b = 5; print((a * b) + 1, a * b, (a * b) + 1);',
+    'maan_le a = "x"; print(a - 1, a - 1);',
+    'print(y + 1, y + 1);',
+    'maan_le z = 0; print(5 / z, 5 / z);',
+    'maan_le f = golmaal(n) { if (n < 2) { ye_lo n; } ye_lo f(n - 1) + f(n - 1) * (n - 1); }; f(8);',
+    'maan_le arr = [5, 6, 7]; maan_le i = 1; print(arr[i] + arr[i], arr[i + 1] * arr[i + 1], arr[i + 5]);',
+    'maan_le a = 1; maan_le b = 2; print(!(a < b), !(a < b), (a < b) == (a < b));',
+    'maan_le s = "abc"; maan_le f = golmaal() { ye_lo len(s) + len(s); }; print(f(), len(s));',
+    'maan_le a = 2; maan_le f = golmaal(x) { ye_lo golmaal() { ye_lo a * x + a * x; }; }; print(f(3)(), a * 2);',
+]
+
+
+def shared(program: Program) -> list[tuple[str, str, bool]]:
+    # (name, expression, first) of the SharedExpressions in the program, in pre-order
+    res = []
+    stack: list = [program]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+        elif isinstance(node, SharedExpression):
+            res.append((node.name, str(node.value), node.first))
+            stack.append(node.value)
+        elif isinstance(node, Node) and not isinstance(node, LazyBlockStatement):
+            for cls in type(node).__mro__:
+                stack.extend(reversed([getattr(node, slot, None) for slot in getattr(cls, '__slots__', ()) if slot != 'hash_cache']))
+    return res
+
+
+class TestCommonSubexpressions(unittest.TestCase):
+
+    def test_same_output(self):
+        for i, source in enumerate(PROGRAMS):
+            expected = run(parse(source))
+            eliminated = run(eliminate_common_subexpressions(parse(source)))
+            self.assertTrue(eliminated == expected, f'program {i} {source!r}: eliminated {eliminated} != {expected}')
+            optimized = run(optimize(parse(source)))
+            self.assertTrue(optimized == expected, f'program {i} {source!r}: optimized {optimized} != {expected}')
+
+    def test_shares(self):
+        inps = [
+            ('maan_le arr = [1, 2]; maan_le a = len(arr) * 2; maan_le b = len(arr) + 1;', [('$0', 'len(arr)', True), ('$0', 'len(arr)', False)]),
+            ('print(x * y + 1, x * y - 1);', [('$0', '(x * y)', True), ('$0', '(x * y)', False)]),
+            ('print((a * b) + 1, a * b, (a * b) + 1);', [('$1', '((a * b) + 1)', True), ('$0', '(a * b)', True), ('$0', '(a * b)', False), ('$1', '((a * b) + 1)', False)]),
+            ('print(arr[i] + arr[i]);', [('$0', '(arr[i])', True), ('$0', '(arr[i])', False)]),
+            # nested blocks are matched on their own
+            ('maan_le f = golmaal(x) { ye_lo -x * -x; }; print(-x, -x);', [('$0', '(-x)', True), ('$0', '(-x)', False), ('$1', '(-x)', True), ('$1', '(-x)', False)]),
+        ]
+        for i, (inp, exp) in enumerate(inps):
+            res = shared(eliminate_common_subexpressions(parse(inp)))
+            self.assertTrue(res == exp, f'{i}: shared = {res} != {exp}')
+
+    def test_keeps(self):
+        inps = [
+            'print(x * 3); x = 5; print(x * 3);',
+            'print(x * 3); maan_le x = 5; print(x * 3);',
+            'print(x * 3, if (c) { x = 10; } else { 1 }, x * 3);',
+            'print(x * 3); while (c) { x = 1; } print(x * 3);',
+            'while (i < 10) { i = i + 1; } while (i < 10) { 1 }',
+            'print(x * 3); if (c) { print(x * 3); }',
+            'print(f(x), f(x));',
+            'print([1, 2], [1, 2]);',
+            'maan_le f = golmaal(len) { ye_lo len(1) + len(1); };',
+            'print(a, a, 1, 1, "s", "s");',
+        ]
+        for i, inp in enumerate(inps):
+            res = shared(eliminate_common_subexpressions(parse(inp)))
+            self.assertTrue(res == [], f'{i}: {inp!r} shared {res}')
+
+    def test_does_not_mutate_input(self):
+        for i, source in enumerate(PROGRAMS):
+            program = parse(source)
+            before = flatten(program)
+            eliminate_common_subexpressions(program)
+            self.assertTrue(flatten(program) == before, f'program {i} {source!r} was mutated')
+
+        program = parse('print(a + 1, b + 1);')
+        self.assertTrue(eliminate_common_subexpressions(program) is program, 'a program without repeats was copied')
+
+    def test_resolved_program(self):
+        source = 'maan_le f = golmaal(x, y) { maan_le d = x * y; ye_lo x * y + d; }; print(f(2, 3), f(4, 5));'
+        program = eliminate_common_subexpressions(resolve(parse(source)))
+        self.assertTrue(len(shared(program)) == 2, f'shared = {shared(program)}')
+        self.assertTrue(run(program) == run(parse(source)), f'{run(program)} != {run(parse(source))}')
+
+    def test_deep_program(self):
+        program = parse('-' * 5000 + 'x;', parser_cls=IterativeParser)
+        self.assertTrue(eliminate_common_subexpressions(program) is program, 'a program too deep for the pass was not returned as is')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+from sagar.my_ast.ast import *
+from sagar.my_evaluator.evaluator import EvalConstants, eval_prefix_expression, eval_infix_expression
+from sagar.my_object.object import Object, IntegerObj, StringObj
+
+# Constant folding between parse_program and eval. Constant sub-expressions are computed
+# with the evaluator's own operator functions, and only folded when the result has a
+# literal node that evaluates to the same object:
+#   - integers and strings become IntegerLiteral / StringExpression
+#   - booleans become Boolean; comparisons and ! both give the interned TRUE/FALSE
+#     objects, which is what a Boolean literal evaluates to
+#   - anything producing an ErrorObj or raising (1 / 0 raises ZeroDivisionError) is left
+#     for the evaluator, so errors happen at run time exactly as before
+#   - an if statement with a literal condition is replaced by the block it takes; an if
+#     used as a value, or one with a false condition and no else (which evaluates to
+#     NULL), is kept
+# A function value prints its body, so a folded function body keeps the parsed one for
+# printing (BlockStatement.printed).
+# The input tree may be shared (ParseCache), so it is never mutated: changed nodes are
+# copied and unchanged subtrees are reused.
+
+
+def fold_constants(program: Program) -> Program:
+    try:
+        return fold_node(program)
+    except RecursionError:
+        # nested too deeply to fold; the unfolded tree evaluates the same
+        return program
+
+
+def fold_node(node: Node) -> Node:
+    if isinstance(node, Program):
+        return updated(node, statements=fold_statements(node.statements))
+    if isinstance(node, Statement):
+        return fold_statement(node)
+    return fold_expression(node)
+
+
+def fold_statements(statements: list[Statement]) -> list[Statement]:
+    folded = [fold_statement(statement) for statement in statements]
+    if all(new is old for new, old in zip(folded, statements)):
+        return statements
+    return folded
+
+
+def fold_statement(node: Statement) -> Statement:
+    if isinstance(node, ExpressionStatement):
+        expression = fold_expression(node.expression)
+        if isinstance(expression, IfExpression):
+            branch = taken_branch(expression)
+            if branch is not None:
+                return branch
+        return updated(node, expression=expression)
+
+    elif isinstance(node, LetStatement):
+        return updated(node, value=fold_expression(node.value))
+
+    elif isinstance(node, ReturnStatement):
+        return updated(node, value=fold_expression(node.value))
+
+    elif isinstance(node, AssignmentStatement):
+        return updated(node, right=fold_expression(node.right))
+
+    elif isinstance(node, WhileStatement):
+        return updated(node, condition=fold_expression(node.condition), body=fold_block(node.body))
+
+    elif isinstance(node, BlockStatement):
+        return fold_block(node)
+
+    return node
+
+
+def fold_block(node: BlockStatement | None) -> BlockStatement | None:
+    if node is None or isinstance(node, LazyBlockStatement):
+        # lazy function bodies are not parsed yet, and folding must not force them
+        return node
+    return updated(node, statements=fold_statements(node.statements))
+
+
+def fold_expressions(expressions: list[Expression] | None) -> list[Expression] | None:
+    if expressions is None:
+        return None
+    folded = [fold_expression(expression) for expression in expressions]
+    if all(new is old for new, old in zip(folded, expressions)):
+        return expressions
+    return folded
+
+
+def fold_expression(node: Expression | None) -> Expression | None:
+    if isinstance(node, PrefixExpression):
+        right = fold_expression(node.right)
+        value = constant(right)
+        if value is not None:
+            folded = literal(eval_prefix_expression(node.operator, value), node.token)
+            if folded is not None:
+                return folded
+        return updated(node, right=right)
+
+    elif isinstance(node, InfixExpression):
+        left = fold_expression(node.left)
+        right = fold_expression(node.right)
+        folded = fold_infix(node.operator, left, right, node.token)
+        if folded is not None:
+            return folded
+        return updated(node, left=left, right=right)
+
+    elif isinstance(node, IfExpression):
+        return updated(node, condition=fold_expression(node.condition), consequence=fold_block(node.consequence), alternative=fold_block(node.alternative))
+
+    elif isinstance(node, FunctionLiteral):
+        body = fold_block(node.body)
+        if body is not node.body and getattr(body, 'printed', None) is None:
+            # a fresh copy; it still prints as parsed (later passes copy the slot along)
+            body.printed = node.body
+        return updated(node, body=body)
+
+    elif isinstance(node, CallExpression):
+        return updated(node, function=fold_expression(node.function), arguments=fold_expressions(node.arguments))
+
+    elif isinstance(node, ArrayLiteral):
+        return updated(node, elements=fold_expressions(node.elements))
+
+    elif isinstance(node, IndexExpression):
+        return updated(node, left=fold_expression(node.left), index=fold_expression(node.index))
+
+    return node
+
+
+def fold_infix(operator: str, left: Expression, right: Expression, token: Token) -> Expression | None:
+    left_value = constant(left)
+    right_value = constant(right)
+    if left_value is None or right_value is None:
+        return None
+    try:
+        return literal(eval_infix_expression(operator, left_value, right_value), token)
+    except (ZeroDivisionError, ValueError):
+        # division by zero, or an int too large to convert to a string, is left to run time
+        return None
+
+
+def taken_branch(node: IfExpression) -> BlockStatement | None:
+    # eval_if_expression branches on condition.value
+    if not isinstance(node.condition, (Boolean, IntegerLiteral)) or node.consequence is None:
+        return None
+    if node.condition.value:
+        return node.consequence
+    return node.alternative
+
+
+def constant(node: Expression | None) -> Object | None:
+    # the object eval returns for a literal node, None for anything else
+    if isinstance(node, IntegerLiteral):
+        return IntegerObj(node.value)
+    elif isinstance(node, Boolean):
+        return EvalConstants.TRUE_BOOLEAN_OBJ if node.value else EvalConstants.FALSE_BOOLEAN_OBJ
+    elif isinstance(node, StringExpression):
+        return StringObj(node.value)
+    return None
+
+
+def literal(obj: Object, token: Token) -> Expression | None:
+    # the literal node evaluating to obj, None if there is none. The new token keeps the
+    # start of the folded expression, so error positions still point into the source.
+    if isinstance(obj, IntegerObj):
+        return IntegerLiteral(Token(Constants.INT, str(obj.value), token.start, obj.value), obj.value)
+    elif isinstance(obj, StringObj):
+        return StringExpression(Token(Constants.STRING, obj.value, token.start))
+    elif obj is EvalConstants.TRUE_BOOLEAN_OBJ:
+        return Boolean(Token(Constants.TRUE, 'true', token.start), True)
+    elif obj is EvalConstants.FALSE_BOOLEAN_OBJ:
+        return Boolean(Token(Constants.FALSE, 'false', token.start), False)
+    return None
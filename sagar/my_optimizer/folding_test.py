@@ -0,0 +1,158 @@
+import unittest
+from sagar.lexer.Lexer import new_lexer
+from sagar.my_ast.ast import *
+from sagar.my_ast.flat_test import flatten
+from sagar.my_ast.hashing import fingerprint
+from sagar.my_evaluator.backends import BACKENDS
+from sagar.my_evaluator.evaluator import eval
+from sagar.my_object.object import Environment
+from sagar.my_optimizer.folding import fold_constants
+from sagar.my_optimizer.passes import optimize
+from sagar.my_parser.cache import ParseCache
+from sagar.my_parser.parser import Parser, IterativeParser
+
+PROGRAMS = [
+    '5 * 2 + 10',
+    '(5 + 10 * 2 + 15 / 3) * 2 +-10',
+    '"a" + "b"',
+    '"a" + 1 * 2',
+    '1 + "a" - true',
+    '!true',
+    '!!5',
+    '!0',
+    '!(1 < 2)',
+    '!(1 > 2)',
+    'maan_le a = 1 < 2; !a;',
+    '1 == 1',
+    'true == true',
+    'true + 1',
+    '-true',
+    '-"a"',
+    '1 / 0',
+    'maan_le f = golmaal() { ye_lo 10 / (5 - 5); }; print("before"); f();',
+    'if (true) { 10 }',
+    'if (false) { 10 }',
+    'if (false) { 10 } else { 20 }',
+    'if (1 < 2) { 10 } else { 20 }',
+    'if (!(1 < 2)) { 10 } else { 20 }',
+    'if (-1) { 10 } else { 20 }',
+    'if (5 * 0) { 10 } else { 20 }',
+    'if ("x") { 10 }',
+    'if ("a" == "a") { 10 }',
+    'maan_le a = if (2 > 1) { 5 }; a;',
+    'maan_le a = if (true) { 5 }; a;',
+    'maan_le f = golmaal() { if (true) { ye_lo 1 + 1; }; ye_lo 3; }; f();',
+    'maan_le i = 0; while (i < 2 * 5) { if (1 == 1) { i = i + 1 + 0; } } print(i);',
+    'maan_le i = 0; while (true) { i = i + 1; if (i > 3 - 1) { break } } print(i);',
+    'while (1 < 2) { print("x" + 1); }',
+    'while (2 < 1) { print("never"); }',
+    'maan_le arr = [1 + 1, "a" + "b", !false]; print(arr[2 - 1], arr, len("ab" + "c"));',
+    'maan_le s = "n" + 5 / 2; print(s, -(-3), 2 * -3);',
+    'print(1); if (true) { print(2) } else { print(3) }; print(4 * 1);',
+    'maan_le add = golmaal(a, b) { ye_lo a + b * (2 - 1); }; add(1, 2 * 3);',
+    '99999999999999 * 99999999999999 * 99999999999999',
+    'maan_le f = golmaal() { if (1 < 2) { 5 } }; print(f);',
+    'maan_le f = golmaal() { ye_lo "a" + "b"; }; print(f, f());',
+    'maan_le f = golmaal(x) { maan_le g = golmaal() { ye_lo x * (2 + 3); }; ye_lo g; }; print(f(1), f);',
+]
+
+
+def run(program: Program) -> tuple:
+    env = Environment(print_statements=[])
+    try:
+        res = eval(program, env)
+    except Exception as e:
+        return type(e).__name__, str(e), env.print_statements
+    return type(res).__name__, str(res), env.print_statements
+
+
+class TestConstantFolding(unittest.TestCase):
+
+    def parse(self, source: str, parser_cls=Parser) -> Program:
+        p = parser_cls(new_lexer(source))
+        program = p.parse_program()
+        self.assertTrue(p.errors == [], f'p.errors = {p.errors}')
+        return program
+
+    def test_same_output(self):
+        for i, source in enumerate(PROGRAMS):
+            program = self.parse(source)
+            expected = run(program)
+            folded = run(fold_constants(program))
+            self.assertTrue(folded == expected, f'program {i} {source!r}: folded {folded} != {expected}')
+
+    def test_folds(self):
+        inps = [
+            ('5 * 2 + 10;', '20'),
+            ('"a" + "b";', '"ab"'),
+            ('"a" + 1 * 2;', '"a2"'),
+            ('-(3 - 5);', '2'),
+            ('!true;', 'False'),
+            ('!0;', 'True'),
+            ('(1 < 2);', 'True'),
+            ('!(1 < 2);', 'False'),
+            ('maan_le a = 2 > 3;', 'maan_le a = False'),
+            ('if (1 < 2) { 10 } else { 20 };', '10'),
+            ('if (false) { 10 } else { 20 };', '20'),
+            ('while (1 < 2) { 1 };', 'whileTrue 1'),
+            ('print([1 + 1][0], x + (1 + 1));', 'print(([2][0]), (x + 2))'),
+        ]
+        for i, (inp, exp) in enumerate(inps):
+            folded = fold_constants(self.parse(inp))
+            self.assertTrue(str(folded) == exp, f'{i}: str(folded) = {str(folded)} != {exp}')
+
+    def test_function_bodies(self):
+        program = self.parse('maan_le f = golmaal(x) { ye_lo x * (2 + 3); };')
+        folded = fold_constants(program)
+        body = folded.statements[0].value.body
+        self.assertTrue(str(body.statements[0]) == 'ye_lo (x * 5)', f'str(body.statements[0]) = {str(body.statements[0])}')
+        # a function value prints its body as parsed
+        self.assertTrue(str(folded) == str(program), f'str(folded) = {str(folded)} != {str(program)}')
+        written = fold_constants(self.parse('maan_le f = golmaal(x) { ye_lo x * 5; };'))
+        self.assertTrue(fingerprint(folded) != fingerprint(written), 'bodies printing differently share a fingerprint')
+        for name, backend in BACKENDS.items():
+            env = Environment(print_statements=[])
+            backend(optimize(self.parse('maan_le f = golmaal(x) { ye_lo x * (2 + 3); }; print(f);')), env)
+            self.assertTrue(env.print_statements == ['golmaal ( x ) { ye_lo (x * (2 + 3)) }'], f'{name}: env.print_statements = {env.print_statements}')
+
+    def test_keeps(self):
+        inps = [
+            '1 / 0;',
+            'true + 1;',
+            '-"a";',
+            'if (false) { 10 };',
+            'maan_le a = if (true) { 5 };',
+            'if (x) { 10 } else { 20 };',
+        ]
+        for i, inp in enumerate(inps):
+            program = self.parse(inp)
+            folded = fold_constants(program)
+            self.assertTrue(str(folded) == str(program), f'{i}: str(folded) = {str(folded)} != {str(program)}')
+
+    def test_does_not_mutate_input(self):
+        for i, source in enumerate(PROGRAMS):
+            program = self.parse(source)
+            before = flatten(program)
+            fold_constants(program)
+            self.assertTrue(flatten(program) == before, f'program {i} {source!r} was mutated')
+
+        program = self.parse('maan_le add = golmaal(a, b) { ye_lo a + b; }; add(x, y);')
+        self.assertTrue(fold_constants(program) is program, 'a program without constants was copied')
+
+    def test_deep_program(self):
+        depth = 5000
+        source = '-' * depth + '1;'
+        program = self.parse(source, parser_cls=IterativeParser)
+        self.assertTrue(fold_constants(program) is program, 'a program too deep to fold was not returned as is')
+
+    def test_parse_cache_toggle(self):
+        source = 'maan_le a = 5 * 2 + 10; print(a, "x" + "y");'
+        plain, _ = ParseCache().parse(source)
+        folded, _ = ParseCache(optimize=True).parse(source)
+        self.assertTrue(str(plain) == 'maan_le a = ((5 * 2) + 10)print(a, ("x" + "y"))', f'str(plain) = {str(plain)}')
+        self.assertTrue(str(folded) == 'maan_le a = 20print(a, "xy")', f'str(folded) = {str(folded)}')
+        self.assertTrue(run(folded) == run(plain), f'{run(folded)} != {run(plain)}')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+from sagar.my_ast.ast import *
+from sagar.my_ast.hashing import layout
+from sagar.my_ast.flat import NODE, LIST
+from sagar.my_object.object import literal_obj
+
+# Gives every IntegerLiteral and StringExpression the object it evaluates to (obj_cache),
+# so evaluating a literal returns one object made here instead of a new one each time.
+# It runs before a program is cached (ParseCache) or evaluated: cached programs are shared
+# between threads, so the evaluator never writes to them.
+#
+# Like the other passes, the input tree is never mutated: literals and the nodes above
+# them are copied. The objects do not change what a node hashes to, so the copies keep
+# the hashes of the nodes they were made from. Lazy function bodies are left alone, so
+# their literals get a new object each time they are evaluated (small integers are still
+# interned).
+
+
+def attach_literal_objects(node: Node) -> Node:
+    # pre-order listing without recursion, so deeply nested programs are handled; reversed,
+    # every node comes after its children
+    order = []
+    seen: set[int] = set()
+    stack: list = [node]
+    while stack:
+        current = stack.pop()
+        if current is None or id(current) in seen:
+            continue
+        seen.add(id(current))
+        order.append(current)
+        cls = type(current)
+        if cls is SharedExpression:
+            stack.append(current.value)
+        elif cls is not LazyBlockStatement and cls is not IntegerLiteral and cls is not StringExpression:
+            for field, kind in layout(cls)[1]:
+                if kind == NODE:
+                    stack.append(getattr(current, field))
+                elif kind == LIST:
+                    value = getattr(current, field)
+                    if value:
+                        stack.extend(value)
+
+    # id of a node -> its copy with literal objects
+    copies: dict[int, Node] = {}
+    for current in reversed(order):
+        cls = type(current)
+        if cls is LazyBlockStatement:
+            continue
+        fields = {}
+        if cls is IntegerLiteral or cls is StringExpression:
+            if getattr(current, 'obj_cache', None) is None:
+                fields['obj_cache'] = literal_obj(current)
+        elif cls is SharedExpression:
+            fields['value'] = copies.get(id(current.value), current.value)
+        else:
+            for field, kind in layout(cls)[1]:
+                value = getattr(current, field)
+                if kind == NODE and value is not None:
+                    fields[field] = copies.get(id(value), value)
+                elif kind == LIST and value:
+                    items = [copies.get(id(item), item) if item is not None else None for item in value]
+                    if any(new is not old for new, old in zip(items, value)):
+                        fields[field] = items
+        copy = updated(current, **fields)
+        if copy is not current:
+            copy.hash_cache = getattr(current, 'hash_cache', None)
+            copies[id(current)] = copy
+    return copies.get(id(node), node)
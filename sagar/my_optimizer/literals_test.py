@@ -0,0 +1,82 @@
+import unittest
+from sagar.my_ast.ast import *
+from sagar.my_ast.flat_test import flatten
+from sagar.my_ast.hashing import structural_hash, fingerprint
+from sagar.my_optimizer.cse import eliminate_common_subexpressions
+from sagar.my_optimizer.cse_test import PROGRAMS, shared
+from sagar.my_optimizer.folding_test import run
+from sagar.my_optimizer.literals import attach_literal_objects
+from sagar.my_optimizer.resolver_test import parse
+from sagar.my_parser.cache_test import snapshot
+from sagar.my_parser.parser import IterativeParser
+
+
+def literals(node: Node) -> list:
+    # the IntegerLiteral and StringExpression nodes of a tree, in pre-order
+    res = []
+    stack: list = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+        elif isinstance(node, (IntegerLiteral, StringExpression)):
+            res.append(node)
+        elif isinstance(node, SharedExpression):
+            stack.append(node.value)
+        elif isinstance(node, Node) and not isinstance(node, LazyBlockStatement):
+            for cls in type(node).__mro__:
+                stack.extend(reversed([getattr(node, slot, None) for slot in getattr(cls, '__slots__', ()) if slot not in ('hash_cache', 'printed')]))
+    return res
+
+
+class TestLiteralObjects(unittest.TestCase):
+
+    def test_same_output(self):
+        for i, source in enumerate(PROGRAMS):
+            expected = run(parse(source))
+            attached = run(attach_literal_objects(parse(source)))
+            self.assertTrue(attached == expected, f'program {i} {source!r}: {attached} != {expected}')
+
+    def test_input_not_mutated(self):
+        for i, source in enumerate(PROGRAMS):
+            for program in [parse(source), eliminate_common_subexpressions(parse(source))]:
+                before = snapshot(program)
+                attached = attach_literal_objects(program)
+                self.assertTrue(snapshot(program) == before, f'program {i} {source!r}: the input was mutated')
+                self.assertTrue(str(attached) == str(program) and shared(attached) == shared(program), f'program {i} {source!r}: the tree changed')
+                nodes = literals(attached)
+                self.assertTrue(all(node.obj_cache is not None and node.obj_cache.value == node.value for node in nodes), f'program {i} {source!r}: a literal has no object')
+                self.assertTrue(attach_literal_objects(attached) is attached, f'program {i} {source!r}: a second run copied the tree')
+
+    def test_keeps_hashes_and_sharing(self):
+        program = eliminate_common_subexpressions(parse('maan_le a = 4; print((a * 2) + 1, a * 2, (a * 2) + 1);'))
+        h = structural_hash(program)
+        attached = attach_literal_objects(program)
+        self.assertTrue(attached.hash_cache == h and fingerprint(attached) == h.hex(), 'the copies lost their hashes')
+        self.assertTrue(flatten(attach_literal_objects(parse('[1, "a"];'))) == flatten(parse('[1, "a"];')), 'the tree changed')
+        # nodes reached twice are copied once
+        line = parse('maan_le x = 1;').statements[0]
+        program = Program()
+        program.statements = [line, line]
+        attached = attach_literal_objects(program)
+        first, second = attached.statements
+        self.assertTrue(first is second and first is not line and first.value.obj_cache is not None, 'a node reached twice was copied twice')
+
+    def test_deep_program(self):
+        program = parse('-' * 5000 + '1;', parser_cls=IterativeParser)
+        attached = attach_literal_objects(program)
+        node = attached.statements[0].expression
+        while isinstance(node, PrefixExpression):
+            node = node.right
+        self.assertTrue(node.obj_cache is not None and node.obj_cache.value == 1, 'the deep literal has no object')
+
+    def test_lazy_bodies(self):
+        program = parse('maan_le f = golmaal() { ye_lo 1; }; 2;', lazy_functions=True)
+        attached = attach_literal_objects(program)
+        body = attached.statements[0].value.body
+        self.assertTrue(body is program.statements[0].value.body and body.errors is None, 'a lazy body was parsed or copied')
+        self.assertTrue(attached.statements[1].expression.obj_cache.value == 2, 'the literal has no object')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,16 @@
+from sagar.my_ast.ast import Program
+from sagar.my_optimizer.cse import eliminate_common_subexpressions
+from sagar.my_optimizer.folding import fold_constants
+from sagar.my_optimizer.literals import attach_literal_objects
+from sagar.my_optimizer.resolver import resolve
+
+# The AST passes run between parse_program and eval, in order. Each one returns a new
+# tree (sharing unchanged subtrees) and never mutates its input. attach_literal_objects
+# comes last, so it also covers the literals folding made.
+PASSES = [fold_constants, resolve, eliminate_common_subexpressions, attach_literal_objects]
+
+
+def optimize(program: Program) -> Program:
+    for run_pass in PASSES:
+        program = run_pass(program)
+    return program
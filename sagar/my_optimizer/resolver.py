@@ -0,0 +1,149 @@
+from sagar.my_ast.ast import *
+from sagar.my_ast.flat import node_fields, VALUE
+
+# Resolves variables to (depth, slot) addresses, so the evaluator reads them from slot
+# arrays instead of walking the environment chain with a dict lookup at each level.
+#
+# Only function calls create environments (blocks share the enclosing one), so each
+# function body is a scope. Its variables are its parameters and every name it declares
+# with maan_le or assigns to, since assignment writes to the current environment (and
+# shadows an outer variable). Nested function literals are separate scopes.
+#
+# Scopes are still dynamic at run time: a slot stays unset until its maan_le or
+# assignment runs, and until then the name is looked up further out, as before. Names
+# of the program itself (globals) are kept by name in the environment the program runs
+# in, so a REPL environment can be shared by programs resolved separately.
+#
+# Like folding, the input tree is never mutated. Identifiers become ResolvedIdentifier
+# and function literals ResolvedFunctionLiteral (with their Scope). Function literals
+# with a lazy body are left unresolved, with everything inside them.
+
+
+def resolve(program: Program) -> Program:
+    try:
+        return Resolver().resolve_program(program)
+    except RecursionError:
+        # nested too deeply to resolve; the unresolved tree evaluates the same
+        return program
+
+
+def declared_names(body: BlockStatement) -> list[str]:
+    # names assigned by maan_le or = anywhere in body outside of nested functions, in order
+    names: dict[str, None] = {}
+    stack: list = [body]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+            continue
+        cls = type(node)
+        if node is None or cls not in node_fields or cls is FunctionLiteral:
+            continue
+        if cls is LetStatement and node.name is not None:
+            names[node.name.value] = None
+        elif cls is AssignmentStatement and isinstance(node.left, Identifier):
+            names[node.left.value] = None
+        stack.extend(getattr(node, name) for name, kind in reversed(node_fields[cls]) if kind != VALUE)
+    return list(names)
+
+
+class Resolver:
+    def __init__(self):
+        # the scope of each function being resolved, innermost last; globals are not in it
+        self.scopes: list[Scope] = []
+
+    def address(self, name: str) -> tuple[int, int]:
+        for i in range(len(self.scopes) - 1, -1, -1):
+            slot = self.scopes[i].index.get(name)
+            if slot is not None:
+                return len(self.scopes) - 1 - i, slot
+        return len(self.scopes), GLOBAL_SLOT
+
+    def resolve_identifier(self, node: Identifier) -> ResolvedIdentifier:
+        depth, slot = self.address(node.value)
+        return ResolvedIdentifier(node.token, node.value, depth, slot)
+
+    def resolve_program(self, program: Program) -> Program:
+        return updated(program, statements=self.resolve_statements(program.statements))
+
+    def resolve_statements(self, statements: list[Statement] | None) -> list[Statement] | None:
+        if statements is None:
+            return None
+        return [self.resolve_statement(statement) for statement in statements]
+
+    def resolve_block(self, node: BlockStatement | None) -> BlockStatement | None:
+        if node is None:
+            return None
+        return updated(node, statements=self.resolve_statements(node.statements))
+
+    def resolve_statement(self, node: Statement | None) -> Statement | None:
+        if isinstance(node, ExpressionStatement):
+            return updated(node, expression=self.resolve_expression(node.expression))
+
+        elif isinstance(node, LetStatement):
+            name = self.resolve_identifier(node.name) if node.name is not None else None
+            return updated(node, name=name, value=self.resolve_expression(node.value))
+
+        elif isinstance(node, ReturnStatement):
+            return updated(node, value=self.resolve_expression(node.value))
+
+        elif isinstance(node, AssignmentStatement):
+            # anything but an identifier is an error at run time, reported with str(left)
+            left = self.resolve_identifier(node.left) if isinstance(node.left, Identifier) else node.left
+            return updated(node, left=left, right=self.resolve_expression(node.right))
+
+        elif isinstance(node, WhileStatement):
+            return updated(node, condition=self.resolve_expression(node.condition), body=self.resolve_block(node.body))
+
+        elif isinstance(node, BlockStatement):
+            return self.resolve_block(node)
+
+        return node
+
+    def resolve_expressions(self, expressions: list[Expression] | None) -> list[Expression] | None:
+        if expressions is None:
+            return None
+        return [self.resolve_expression(expression) for expression in expressions]
+
+    def resolve_expression(self, node: Expression | None) -> Expression | None:
+        if isinstance(node, Identifier):
+            return self.resolve_identifier(node)
+
+        elif isinstance(node, PrefixExpression):
+            return updated(node, right=self.resolve_expression(node.right))
+
+        elif isinstance(node, InfixExpression):
+            return updated(node, left=self.resolve_expression(node.left), right=self.resolve_expression(node.right))
+
+        elif isinstance(node, IfExpression):
+            return updated(node, condition=self.resolve_expression(node.condition), consequence=self.resolve_block(node.consequence), alternative=self.resolve_block(node.alternative))
+
+        elif isinstance(node, FunctionLiteral):
+            return self.resolve_function(node)
+
+        elif isinstance(node, CallExpression):
+            return updated(node, function=self.resolve_expression(node.function), arguments=self.resolve_expressions(node.arguments))
+
+        elif isinstance(node, ArrayLiteral):
+            return updated(node, elements=self.resolve_expressions(node.elements))
+
+        elif isinstance(node, IndexExpression):
+            return updated(node, left=self.resolve_expression(node.left), index=self.resolve_expression(node.index))
+
+        return node
+
+    def resolve_function(self, node: FunctionLiteral) -> FunctionLiteral:
+        if node.body is None or node.parameters is None or isinstance(node.body, LazyBlockStatement):
+            # a lazy body is not parsed yet, so its variables are unknown: the function
+            # gets a dict environment and everything inside it is looked up by name
+            return node
+        params = list(dict.fromkeys(param.value for param in node.parameters))
+        names = params + [name for name in declared_names(node.body) if name not in params]
+        scope = Scope(names)
+        self.scopes.append(scope)
+        try:
+            parameters = [self.resolve_identifier(param) for param in node.parameters]
+            body = self.resolve_block(node.body)
+        finally:
+            self.scopes.pop()
+        return ResolvedFunctionLiteral(node.token, parameters, body, scope)
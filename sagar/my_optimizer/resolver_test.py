@@ -0,0 +1,126 @@
+import unittest
+from sagar.lexer.Lexer import new_lexer
+from sagar.my_ast.ast import *
+from sagar.my_ast.flat_test import flatten
+from sagar.my_evaluator.evaluator import eval
+from sagar.my_object.object import Environment
+from sagar.my_optimizer.folding_test import PROGRAMS as FOLDING_PROGRAMS, run
+from sagar.my_optimizer.resolver import resolve
+from sagar.my_parser.cache import ParseCache
+from sagar.my_parser.parser import Parser, IterativeParser
+
+PROGRAMS = FOLDING_PROGRAMS + [
+    'maan_le a = 1; maan_le f = golmaal() { a = 2; ye_lo a; }; print(f(), a);',
+    'maan_le a = 1; maan_le f = golmaal() { print(a); maan_le a = 2; print(a); }; f(); print(a);',
+    'maan_le a = 1; maan_le f = golmaal(c) { if (c) { maan_le a = 2; } ye_lo a; }; print(f(true), f(false));',
+    'maan_le f = golmaal() { b = 2; ye_lo b; }; f();',
+    'maan_le f = golmaal() { maan_le b = 1; maan_le g = golmaal() { b = b + 1; ye_lo b; }; print(g(), g(), b); }; f();',
+    'maan_le counter = golmaal() { maan_le n = 0; ye_lo golmaal() { maan_le n = n + 1; ye_lo n; }; }; maan_le c = counter(); print(c(), c());',
+    'maan_le adder = golmaal(x) { ye_lo golmaal(y) { ye_lo golmaal(z) { ye_lo x + y + z; }; }; }; adder(1)(2)(3);',
+    'maan_le fib = golmaal(n) { if (n < 2) { ye_lo n; } ye_lo fib(n - 1) + fib(n - 2); }; fib(12);',
+    'maan_le f = golmaal(arr) { ye_lo len(arr) + first(arr); }; f([4, 5, 6]);',
+    'maan_le f = golmaal() { maan_le len = 1; }; f();',
+    'maan_le f = golmaal(a, a) { ye_lo a; }; f(1, 2);',
+    'maan_le f = golmaal(x) { ye_lo y; }; f(1);',
+    'maan_le f = golmaal() { maan_le i = 0; maan_le s = ""; while (i < 3) { s = s + i; i = i + 1; } ye_lo s; }; f();',
+    'maan_le f = golmaal() { maan_le i = 0; while (true) { i = i + 1; if (i > 4) { break } } ye_lo i; }; f();',
+    'maan_le f = golmaal(x) { x = x * 2; ye_lo x; }; maan_le x = 5; print(f(3), x);',
+    'maan_le f = golmaal() { ye_lo g(); }; maan_le g = golmaal() { ye_lo 7; }; f();',
+    'maan_le f = golmaal() { [1][0] = 2; }; f();',
+]
+
+
+def parse(source: str, parser_cls=Parser, lazy_functions=False) -> Program:
+    p = parser_cls(new_lexer(source), lazy_functions=lazy_functions)
+    program = p.parse_program()
+    assert p.errors == [], f'p.errors = {p.errors}'
+    return program
+
+
+def function(node: Node) -> FunctionLiteral:
+    # the function literal of maan_le f = golmaal...
+    return node.value
+
+
+class TestResolver(unittest.TestCase):
+
+    def test_same_output(self):
+        for i, source in enumerate(PROGRAMS):
+            expected = run(parse(source))
+            resolved = run(resolve(parse(source)))
+            self.assertTrue(resolved == expected, f'program {i} {source!r}: resolved {resolved} != {expected}')
+
+    def test_same_output_lazy(self):
+        # lazy bodies are left unresolved, and run by name inside resolved code
+        for i, source in enumerate(PROGRAMS):
+            expected = run(parse(source))
+            resolved = run(resolve(parse(source, lazy_functions=True)))
+            self.assertTrue(resolved == expected, f'program {i} {source!r}: resolved {resolved} != {expected}')
+
+    def test_addresses(self):
+        source = 'maan_le a = 1; maan_le f = golmaal(x, y) { maan_le z = x; ye_lo golmaal(w) { a = w; ye_lo w + z + a + b; }; };'
+        program = resolve(parse(source))
+        let_a, let_f = program.statements
+        self.assertTrue((let_a.name.depth, let_a.name.slot) == (0, GLOBAL_SLOT), f'a = {let_a.name.depth, let_a.name.slot}')
+
+        f = function(let_f)
+        self.assertTrue(isinstance(f, ResolvedFunctionLiteral), f'f is {type(f).__name__}')
+        self.assertTrue(f.scope.names == ['x', 'y', 'z'], f'f.scope.names = {f.scope.names}')
+        self.assertTrue([(p.depth, p.slot) for p in f.parameters] == [(0, 0), (0, 1)], f'f.parameters')
+        let_z, ret = f.body.statements
+        self.assertTrue((let_z.name.slot, let_z.value.slot) == (2, 0), f'z = x: {let_z.name.slot}, {let_z.value.slot}')
+
+        inner = ret.value
+        self.assertTrue(inner.scope.names == ['w', 'a'], f'inner.scope.names = {inner.scope.names}')
+        assign, inner_ret = inner.body.statements
+        self.assertTrue((assign.left.depth, assign.left.slot) == (0, 1), f'a = w: {assign.left.depth, assign.left.slot}')
+        # ((w + z) + a) + b
+        expr = inner_ret.value
+        b, a, z, w = expr.right, expr.left.right, expr.left.left.right, expr.left.left.left
+        addresses = [(iden.value, iden.depth, iden.slot) for iden in (w, z, a, b)]
+        exp = [('w', 0, 0), ('z', 1, 2), ('a', 0, 1), ('b', 2, GLOBAL_SLOT)]
+        self.assertTrue(addresses == exp, f'addresses = {addresses} != {exp}')
+
+    def test_lazy_function_unresolved(self):
+        program = resolve(parse('maan_le f = golmaal(x) { ye_lo x; }; f(1);', lazy_functions=True))
+        f = function(program.statements[0])
+        self.assertTrue(type(f) is FunctionLiteral, f'f is {type(f).__name__}')
+        self.assertTrue(isinstance(f.body, LazyBlockStatement), f'f.body is {type(f.body).__name__}')
+        self.assertTrue(f.body.errors is None, 'resolving parsed a lazy body')
+
+    def test_shared_environment(self):
+        # programs resolved separately share globals, as lines in the REPL do
+        env = Environment(print_statements=[])
+        sources = [
+            'maan_le a = 1; maan_le f = golmaal() { ye_lo a; };',
+            'a = 2; maan_le g = golmaal(x) { ye_lo f() + x; };',
+            'print(g(10)); print(a);',
+        ]
+        for source in sources:
+            res = eval(resolve(parse(source)), env)
+            self.assertTrue(type(res).__name__ == 'NullObj', f'{source!r} = {res.inspect()}')
+        self.assertTrue(env.print_statements == ['12', '2'], f'env.print_statements = {env.print_statements}')
+
+    def test_does_not_mutate_input(self):
+        for i, source in enumerate(PROGRAMS):
+            program = parse(source)
+            before = flatten(program)
+            resolve(program)
+            self.assertTrue(flatten(program) == before, f'program {i} {source!r} was mutated')
+
+    def test_deep_program(self):
+        source = 'maan_le f = golmaal(x) { ye_lo ' + '-' * 5000 + 'x; };'
+        program = parse(source, parser_cls=IterativeParser)
+        self.assertTrue(resolve(program) is program, 'a program too deep to resolve was not returned as is')
+
+    def test_parse_cache(self):
+        source = 'maan_le f = golmaal(x) { maan_le y = x * 2; ye_lo y; }; print(f(3));'
+        program, _ = ParseCache(optimize=True).parse(source)
+        f = function(program.statements[0])
+        self.assertTrue(isinstance(f, ResolvedFunctionLiteral), f'f is {type(f).__name__}')
+        plain, _ = ParseCache().parse(source)
+        self.assertTrue(run(program) == run(plain), f'{run(program)} != {run(plain)}')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,236 @@
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from sagar.lexer.Lexer import new_lexer, REGEX_ENGINE
+from sagar.my_ast.ast import Program, LazyBlockStatement
+from sagar.my_ast.serialize import dumps, load
+from sagar.my_optimizer.literals import attach_literal_objects
+from sagar.my_optimizer.passes import optimize
+from sagar.my_parser.parser import Parser, IterativeParser
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_RESULT_MAX_BYTES = 16 * 1024 * 1024
+
+
+def source_key(source: str) -> bytes:
+    return hashlib.blake2b(source.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+
+def estimate_size(program: Program, errors: list[str]) -> int:
+    # rough deep size of the parsed program: nodes, their attribute storage, tokens and strings
+    seen: set[int] = set()
+    stack: list = [program, errors]
+    size = 0
+    while stack:
+        obj = stack.pop()
+        if obj is None or id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, (str, int, bool)):
+            continue
+        if isinstance(obj, LazyBlockStatement):
+            # reading its statements would parse it; a body parsed later is not counted
+            continue
+        if isinstance(obj, (list, tuple)):
+            stack.extend(obj)
+            continue
+        attrs = getattr(obj, '__dict__', None)
+        if attrs is not None:
+            size += sys.getsizeof(attrs)
+            stack.extend(attrs.values())
+        for cls in type(obj).__mro__:
+            for slot in getattr(cls, '__slots__', ()):
+                stack.append(getattr(obj, slot, None))
+    return size
+
+
+def estimate_result_size(result: dict) -> int:
+    # rough deep size of a response: {'Output': [str, ...]} and maybe an 'Error' message
+    size = sys.getsizeof(result)
+    for value in result.values():
+        size += sys.getsizeof(value)
+        if isinstance(value, list):
+            size += sum(sys.getsizeof(item) for item in value)
+    return size
+
+
+class DiskCache:
+    # Serialized parse results in a directory that several worker processes can share,
+    # one file per source hash. Files are written to a temporary name and renamed into
+    # place, so readers never see a partial file.
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key: bytes) -> str:
+        return os.path.join(self.directory, f'{key.hex()}.gast')
+
+    def get(self, key: bytes) -> tuple[Program, list[str]] | None:
+        try:
+            return load(self.path(key))
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # written by another format version or node layout, damaged or unreadable: a
+            # miss, so the source is parsed again and the file overwritten
+            return None
+
+    def put(self, key: bytes, source: str, program: Program, errors: list[str]):
+        try:
+            data = dumps(program, source, errors)
+        except ValueError:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+class ParseCache:
+    # LRU cache of parse results keyed by a hash of the source. Parsed programs are
+    # shared between requests, so whatever consumes them (the evaluator) must treat
+    # the AST as read only. With optimize, cached programs go through the optimizer
+    # passes (the disk cache keeps the parsed tree, since optimized nodes no longer match
+    # the source).
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, engine: str = REGEX_ENGINE, disk_cache: DiskCache | None = None, optimize: bool = False, lazy_functions: bool = False):
+        self.max_bytes = max_bytes
+        self.engine = engine
+        self.optimize = optimize
+        # programs with lazy function bodies cannot be serialized, so are not written to disk
+        self.lazy_functions = lazy_functions
+        # second level shared with other processes, consulted on a miss
+        self.disk_cache = disk_cache
+        self.entries: OrderedDict[bytes, tuple[Program, list[str], int]] = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+        self.lock = threading.Lock()
+
+    def parse(self, source: str) -> tuple[Program, list[str]]:
+        key = source_key(source)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0], list(entry[1])
+            self.misses += 1
+
+        entry = self.disk_cache.get(key) if self.disk_cache is not None else None
+        if entry is not None:
+            program, errors = entry
+            with self.lock:
+                self.disk_hits += 1
+        else:
+            program, errors = self.parse_source(source)
+            if self.disk_cache is not None and not self.lazy_functions:
+                self.disk_cache.put(key, source, program, errors)
+        if self.optimize and not errors:
+            program = optimize(program)
+        elif not errors:
+            # the objects literals evaluate to are made here, before the program is shared
+            program = attach_literal_objects(program)
+        size = estimate_size(program, errors)
+
+        with self.lock:
+            if size <= self.max_bytes and key not in self.entries:
+                self.entries[key] = (program, errors, size)
+                self.current_bytes += size
+                while self.current_bytes > self.max_bytes:
+                    _, (_, _, evicted_size) = self.entries.popitem(last=False)
+                    self.current_bytes -= evicted_size
+                    self.evictions += 1
+        return program, list(errors)
+
+    def parse_source(self, source: str) -> tuple[Program, list[str]]:
+        try:
+            p = Parser(new_lexer(source, engine=self.engine), lazy_functions=self.lazy_functions)
+            program = p.parse_program()
+        except RecursionError:
+            # nested too deeply for the recursive parser
+            p = IterativeParser(new_lexer(source, engine=self.engine), lazy_functions=self.lazy_functions)
+            program = p.parse_program()
+        return program, p.errors
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'disk_hits': self.disk_hits,
+                'entries': len(self.entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+class ResultCache:
+    # LRU cache of evaluation results keyed by program fingerprint (structural hash), so
+    # the same program formatted differently hits. Golmaal programs cannot read input,
+    # time or randomness, so a program always produces the same result. Bounded by entry
+    # count and by the estimated size of the results, since one result can hold 1000
+    # printed strings of any length; a result larger than max_bytes is not cached.
+    def __init__(self, max_entries: int = 1024, max_bytes: int = DEFAULT_RESULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[str, tuple[dict, int]] = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> dict | None:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, result: dict):
+        if self.max_entries <= 0:
+            return
+        size = estimate_result_size(result)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self.entries[key] = (result, size)
+            self.current_bytes += size
+            while len(self.entries) > self.max_entries or self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def stats(self) -> dict[str, int]:
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+            }
@@ -0,0 +1,201 @@
+import os
+import tempfile
+import unittest
+from sagar.my_ast.ast import Node
+from sagar.my_evaluator.evaluator import eval
+from sagar.my_object.object import Environment
+from sagar.my_ast.hashing import fingerprint
+from sagar.my_ast.serialize import dumps
+from sagar.my_parser.cache import ParseCache, DiskCache, ResultCache, source_key, estimate_result_size
+from sagar.my_token.token import Token
+
+
+def snapshot(obj):
+    if isinstance(obj, Token):
+        return ('Token', obj.token_type, obj.literal, obj.start)
+    if isinstance(obj, list):
+        return [snapshot(item) for item in obj]
+    if isinstance(obj, Node):
+        attrs = {}
+        for cls in type(obj).__mro__:
+            for slot in getattr(cls, '__slots__', ()):
+                attrs[slot] = getattr(obj, slot, None)
+        attrs.update(getattr(obj, '__dict__', {}))
+        return (type(obj).__name__, id(obj), {name: snapshot(value) for name, value in sorted(attrs.items())})
+    return obj
+
+
+class TestParseCache(unittest.TestCase):
+
+    def test_hits_and_misses(self):
+        cache = ParseCache()
+        program1, errors1 = cache.parse('maan_le a = 5; a + 1;')
+        program2, errors2 = cache.parse('maan_le a = 5; a + 1;')
+        cache.parse('maan_le b = 5;')
+
+        self.assertTrue(program1 is program2, 'the second parse of the same source was not served from the cache')
+        self.assertTrue(errors1 == errors2 == [], f'errors1 = {errors1}, errors2 = {errors2}')
+        stats = cache.stats()
+        self.assertTrue(stats['hits'] == 1, f"stats['hits'] = {stats['hits']} != 1")
+        self.assertTrue(stats['misses'] == 2, f"stats['misses'] = {stats['misses']} != 2")
+        self.assertTrue(stats['entries'] == 2, f"stats['entries'] = {stats['entries']} != 2")
+        self.assertTrue(stats['bytes'] > 0, f"stats['bytes'] = {stats['bytes']}")
+
+    def test_errors_are_cached(self):
+        cache = ParseCache()
+        _, errors1 = cache.parse('maan_le = 5;')
+        expected = list(errors1)
+        errors1.append('caller side mutation')
+        _, errors2 = cache.parse('maan_le = 5;')
+        self.assertTrue(len(expected) > 0, 'expected parse errors for maan_le = 5;')
+        self.assertTrue(errors2 == expected, f'errors2 = {errors2} != {expected}')
+        self.assertTrue(cache.stats()['hits'] == 1, f"cache.stats()['hits'] = {cache.stats()['hits']} != 1")
+
+    def test_deeply_nested_source(self):
+        cache = ParseCache()
+        program, errors = cache.parse('-' * 5000 + '1;')
+        self.assertTrue(errors == [], f'errors = {errors[:3]}')
+        self.assertTrue(len(program.statements) == 1, f'len(program.statements) = {len(program.statements)} != 1')
+
+    def test_byte_limit(self):
+        cache = ParseCache()
+        cache.parse('maan_le a = 1;')
+        size = cache.stats()['bytes']
+
+        cache = ParseCache(max_bytes=size * 2)
+        for name in ['a', 'b', 'c', 'd']:
+            cache.parse(f'maan_le {name} = 1;')
+        stats = cache.stats()
+        self.assertTrue(stats['bytes'] <= size * 2, f"stats['bytes'] = {stats['bytes']} > {size * 2}")
+        self.assertTrue(stats['evictions'] == 2, f"stats['evictions'] = {stats['evictions']} != 2")
+
+        # least recently used entries are evicted first
+        cache.parse('maan_le c = 1;')
+        cache.parse('maan_le e = 1;')
+        cache.parse('maan_le c = 1;')
+        self.assertTrue(cache.stats()['hits'] == 2, f"cache.stats()['hits'] = {cache.stats()['hits']} != 2")
+
+    def test_disk_cache_is_shared(self):
+        inp = 'maan_le add = golmaal(a, b) { ye_lo a + b; }; print(add(1, 2), "x");'
+        with tempfile.TemporaryDirectory() as directory:
+            # two caches on one directory stand in for two worker processes
+            first = ParseCache(disk_cache=DiskCache(directory))
+            second = ParseCache(disk_cache=DiskCache(directory))
+            program1, _ = first.parse(inp)
+            program2, errors2 = second.parse(inp)
+            program3, _ = second.parse(inp)
+
+            self.assertTrue(str(program2) == str(program1), f'str(program2) = {str(program2)} != {str(program1)}')
+            self.assertTrue(errors2 == [], f'errors2 = {errors2}')
+            self.assertTrue(program3 is program2, 'the disk hit was not kept in memory')
+            stats = second.stats()
+            self.assertTrue(stats['disk_hits'] == 1 and stats['hits'] == 1, f'stats = {stats}')
+            self.assertTrue(os.listdir(directory) == [f'{source_key(inp).hex()}.gast'], f'files = {os.listdir(directory)}')
+
+    def test_disk_cache_ignores_bad_files(self):
+        inp = 'maan_le a = 5;'
+        program, errors = ParseCache().parse(inp)
+        data = dumps(program, inp, errors)
+        damaged = [b'', b'not an AST'] + [data[:i] + bytes([data[i] ^ 0x41]) + data[i + 1:] for i in range(0, len(data), 7)]
+        for i, bad in enumerate(damaged):
+            with tempfile.TemporaryDirectory() as directory:
+                disk_cache = DiskCache(directory)
+                with open(disk_cache.path(source_key(inp)), 'wb') as f:
+                    f.write(bad)
+                cache = ParseCache(disk_cache=disk_cache)
+                program, errors = cache.parse(inp)
+                self.assertTrue(str(program) == 'maan_le a = 5' and errors == [], f'{i}: program = {program}, errors = {errors}')
+                self.assertTrue(cache.stats()['disk_hits'] == 0, f"{i}: cache.stats()['disk_hits'] = {cache.stats()['disk_hits']}")
+                # the bad file is replaced by the fresh parse
+                self.assertTrue(disk_cache.get(source_key(inp)) is not None, f'{i}: the bad cache file was not overwritten')
+
+    def test_evaluation_does_not_mutate_cached_program(self):
+        inp = '''
+            maan_le add = golmaal(a, b) { a = a + 1; ye_lo a + b; };
+            maan_le arr = [1, add(1, 2), "x" + 1];
+            maan_le i = 0;
+            while (i < 5) { if (i == 3) { break; }; i = i + 1; }
+            print(add(i, arr[1]), arr, len("abc"));
+        '''
+        for optimize in [False, True]:
+            cache = ParseCache(optimize=optimize)
+            program, _ = cache.parse(inp)
+            before = snapshot(program)
+
+            outputs = []
+            for _ in range(3):
+                program, _ = cache.parse(inp)
+                env = Environment(print_statements=[])
+                eval(program, env)
+                outputs.append(env.print_statements)
+
+            self.assertTrue(snapshot(program) == before, f'optimize={optimize}: evaluating the cached program mutated its AST')
+            self.assertTrue(outputs[0] == outputs[1] == outputs[2] == ['8[1, 4, x1]3'], f'optimize={optimize}: outputs = {outputs}')
+
+
+class TestResultCache(unittest.TestCase):
+
+    def test_reformatted_program_hits(self):
+        parse_cache = ParseCache(optimize=True)
+        cache = ResultCache(max_entries=2)
+        program, _ = parse_cache.parse('maan_le a = [1, 2]; print(len(a) * 2);')
+        reformatted, _ = parse_cache.parse('maan_le a = [ 1, 2 ]\n// doubled\nprint( len(a)*2 )')
+        cache.put(fingerprint(program), {'Output': ['4']})
+
+        self.assertTrue(cache.get(fingerprint(reformatted)) == {'Output': ['4']}, 'the reformatted program missed')
+        other, _ = parse_cache.parse('maan_le a = [1, 2]; print(len(a) * 3);')
+        self.assertTrue(cache.get(fingerprint(other)) is None, 'a different program hit')
+        stats = cache.stats()
+        self.assertTrue((stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1), f'stats = {stats}')
+
+    def test_printed_literals_miss(self):
+        # the same values, printed differently as part of a function
+        parse_cache = ParseCache(optimize=True)
+        cache = ResultCache()
+        outputs = {}
+        for source in ['print(golmaal() { 007 });', 'print(golmaal() { 7 });']:
+            program, _ = parse_cache.parse(source)
+            key = fingerprint(program)
+            if cache.get(key) is None:
+                env = Environment(print_statements=[])
+                eval(program, env)
+                cache.put(key, {'Output': env.print_statements})
+            outputs[source] = cache.get(key)['Output']
+        exp = {'print(golmaal() { 007 });': ['golmaal (  ) { 007 }'], 'print(golmaal() { 7 });': ['golmaal (  ) { 7 }']}
+        self.assertTrue(outputs == exp, f'outputs = {outputs}')
+
+    def test_lru_eviction(self):
+        cache = ResultCache(max_entries=2)
+        cache.put('a', {'Output': ['a']})
+        cache.put('b', {'Output': ['b']})
+        cache.get('a')
+        cache.put('c', {'Output': ['c']})
+        self.assertTrue(cache.get('b') is None, 'the least recently used entry was kept')
+        self.assertTrue(cache.get('a') is not None and cache.get('c') is not None, 'recent entries were evicted')
+
+        disabled = ResultCache(max_entries=0)
+        disabled.put('a', {'Output': ['a']})
+        self.assertTrue(disabled.get('a') is None, 'a cache with no entries stored a result')
+
+    def test_byte_limit(self):
+        small = {'Output': ['x' * 100]}
+        limit = 3 * estimate_result_size(small)
+        cache = ResultCache(max_bytes=limit)
+        for key in 'abcd':
+            cache.put(key, {'Output': [key * 100]})
+        stats = cache.stats()
+        self.assertTrue(stats['entries'] == 3 and stats['evictions'] == 1 and stats['bytes'] <= limit, f'stats = {stats}')
+        self.assertTrue(cache.get('a') is None and cache.get('d') is not None, 'the least recently used entry was kept')
+
+        # large printed output is not cached at all
+        cache.put('big', {'Output': ['y' * 1000] * 1000, 'Error': 'loop limit'})
+        self.assertTrue(cache.get('big') is None and cache.get('b') is not None, 'an oversized result was cached')
+        self.assertTrue(estimate_result_size({'Output': ['y' * 1000] * 1000}) > 1000 * 1000, 'result size is underestimated')
+
+        # replacing an entry does not count it twice
+        cache.put('b', {'Output': ['b' * 100]})
+        self.assertTrue(cache.stats()['bytes'] == 3 * estimate_result_size(small), f"bytes = {cache.stats()['bytes']}")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,12 @@
 from sagar.lexer.Lexer import Lexer, is_letter_or_digit
-from sagar.my_token.token import Token, Constants, TokenType
+from sagar.lexer.regex_lexer import RegexLexer, bracket_tokens
+from sagar.my_token.token import Token, Constants, TokenType, LineIndex
 from sagar.my_ast.ast import *
-from typing import Callable
+from types import GeneratorType
+from typing import Callable, Generator
 
-prefix_parsing_fn = Callable[[], Expression]
-infix_parsing_fn = Callable[[Expression], Expression]
+prefix_parsing_fn = Callable[['Parser'], Expression]
+infix_parsing_fn = Callable[['Parser', Expression], Expression]
 
 
 LOWEST       = 1   # Placeholder for unknown operations
@@ -17,69 +19,134 @@ PREFIX       = 7   # -X, !X
 CALL         = 8   # function calls: myFunction(x)
 INDEX        = 9   # array indexing: arr[0]
 
-precedences: dict[TokenType, int] = {
-    Constants.EQ: EQUALS,
-    Constants.NOT_EQ: EQUALS,
-    Constants.LT: LESSGREATER,
-    Constants.GT: LESSGREATER,
-    Constants.PLUS: SUM,
-    Constants.MINUS: SUM,
-    Constants.SLASH: PRODUCT,
-    Constants.ASTERISK: PRODUCT,
-    Constants.LPAREN: CALL,
-    Constants.LBRACKET: INDEX,
-    Constants.ASSIGN: EQUALS
+precedences: list[int] = [LOWEST] * len(TokenType)
+precedences[Constants.EQ] = EQUALS
+precedences[Constants.NOT_EQ] = EQUALS
+precedences[Constants.LT] = LESSGREATER
+precedences[Constants.GT] = LESSGREATER
+precedences[Constants.PLUS] = SUM
+precedences[Constants.MINUS] = SUM
+precedences[Constants.SLASH] = PRODUCT
+precedences[Constants.ASTERISK] = PRODUCT
+precedences[Constants.LPAREN] = CALL
+precedences[Constants.LBRACKET] = INDEX
+precedences[Constants.ASSIGN] = EQUALS
+
+# token type -> name of the Parser method handling it
+prefix_parsing_methods: dict[TokenType, str] = {
+    Constants.IDENT: 'parse_identifier',
+    Constants.INT: 'parse_integer_literal',
+    Constants.BANG: 'parse_prefix_expression',
+    Constants.MINUS: 'parse_prefix_expression',
+    Constants.TRUE: 'parse_boolean_expression',
+    Constants.FALSE: 'parse_boolean_expression',
+    Constants.LPAREN: 'parse_grouped_expression',
+    Constants.IF: 'parse_if_expression',
+    Constants.FUNCTION: 'parse_function_literal',
+    Constants.STRING: 'parse_string_literal',
+    Constants.LBRACKET: 'parse_array_literal',
 }
 
+infix_parsing_methods: dict[TokenType, str] = {
+    Constants.PLUS: 'parse_infix_expression',
+    Constants.MINUS: 'parse_infix_expression',
+    Constants.EQ: 'parse_infix_expression',
+    Constants.NOT_EQ: 'parse_infix_expression',
+    Constants.SLASH: 'parse_infix_expression',
+    Constants.ASTERISK: 'parse_infix_expression',
+    Constants.LT: 'parse_infix_expression',
+    Constants.GT: 'parse_infix_expression',
+    Constants.LPAREN: 'parse_lparen_infix',
+    Constants.LBRACKET: 'parse_lbracket_infix',
+    Constants.ASSIGN: 'parse_assignment_statment',
+}
+
+
+def build_dispatch_tables(cls: type):
+    # Plain functions looked up on cls, so a subclass overriding a parse method gets it in its tables
+    prefix_fns: list[prefix_parsing_fn | None] = [None] * len(TokenType)
+    for token_type, name in prefix_parsing_methods.items():
+        prefix_fns[token_type] = getattr(cls, name)
+
+    # (precedence, infix fn) so the Pratt loop needs a single lookup per token
+    infix_fns: list[tuple[int, infix_parsing_fn | None]] = [(precedences[t], None) for t in TokenType]
+    for token_type, name in infix_parsing_methods.items():
+        infix_fns[token_type] = (precedences[token_type], getattr(cls, name))
+
+    cls.prefix_parsing_fns = prefix_fns
+    cls.infix_parsing_fns = infix_fns
+
+
+# bracket pairs skip_block_statement tracks, with and without validate_lazy
+lazy_brace_pairs = {Constants.LBRACE: Constants.RBRACE}
+lazy_validation_pairs = {Constants.LBRACE: Constants.RBRACE, Constants.LPAREN: Constants.RPAREN, Constants.LBRACKET: Constants.RBRACKET}
+lazy_closing_types = frozenset(lazy_validation_pairs.values())
+
+# token types ending a parameter, argument or element list, and following a list item;
+# checked once per token of the list, so sets rather than list literals
+paren_end_types = frozenset((Constants.RPAREN, Constants.EOF))
+bracket_end_types = frozenset((Constants.RBRACKET, Constants.EOF))
+after_item_types = frozenset((Constants.COMMA, Constants.RPAREN))
+
+# token type -> change in the number of open ( and [ (Parser.nesting)
+nesting_steps: list[int] = [0] * len(TokenType)
+nesting_steps[Constants.LPAREN] = nesting_steps[Constants.LBRACKET] = 1
+nesting_steps[Constants.RPAREN] = nesting_steps[Constants.RBRACKET] = -1
+
+
 class Parser:
-    def __init__(self, lexer: Lexer):
+    # built once per class by build_dispatch_tables instead of once per parser
+    prefix_parsing_fns: list[prefix_parsing_fn | None]
+    infix_parsing_fns: list[tuple[int, infix_parsing_fn | None]]
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        build_dispatch_tables(cls)
+
+    def __init__(self, lexer: Lexer, lazy_functions: bool = False, validate_lazy: bool = True):
         self.lexer = lexer
+        # lazy_functions only brace matches function bodies (LazyBlockStatement) and parses
+        # them on first use. That needs the source text, so lexers without one parse eagerly.
+        self.lazy_functions = lazy_functions and isinstance(getattr(lexer, 'input', None), str)
+        # checks bracket nesting and illegal tokens in the skipped bodies, so those errors
+        # are still reported up front
+        self.validate_lazy = validate_lazy
         self.cur_token: Token = lexer.next_token()
         self.peek_token: Token = lexer.next_token()
         self.errors: list[str] = []
-        self.prefix_parsing_fns: dict[TokenType, prefix_parsing_fn] = {}
-        self.infix_parsing_fns: dict[TokenType, infix_parsing_fn] = {}
-        self.__register_paring_fns()
-
-    def __register_paring_fns(self):
-        self.prefix_parsing_fns[Constants.IDENT] = self.parse_identifier
-        self.prefix_parsing_fns[Constants.INT] = self.parse_integer_literal
-        self.prefix_parsing_fns[Constants.BANG] = self.parse_prefix_expression
-        self.prefix_parsing_fns[Constants.MINUS] = self.parse_prefix_expression
-        self.prefix_parsing_fns[Constants.TRUE] = self.parse_boolean_expression
-        self.prefix_parsing_fns[Constants.FALSE] = self.parse_boolean_expression
-        self.prefix_parsing_fns[Constants.LPAREN] = self.parse_grouped_expression
-        self.prefix_parsing_fns[Constants.IF] = self.parse_if_expression
-        self.prefix_parsing_fns[Constants.FUNCTION] = self.parse_function_literal
-        self.prefix_parsing_fns[Constants.STRING] = self.parse_string_literal
-        self.prefix_parsing_fns[Constants.LBRACKET] = self.parse_array_literal
-
-        infix_ops = ['+', '-', '==', '!=', '/', '*', '<', '>']
-        for infix_op in infix_ops:
-            self.infix_parsing_fns[infix_op] = self.parse_infix_expression
-        
-        self.infix_parsing_fns[Constants.LPAREN] = self.parse_lparen_infix
-        self.infix_parsing_fns[Constants.LBRACKET] = self.parse_lbracket_infix
-        self.infix_parsing_fns[Constants.ASSIGN] = self.parse_assignment_statment
+        self.line_index: LineIndex | None = None
+        # set by add_error, cleared once synchronize has skipped past the broken statement
+        self.panicking = False
+        # ( and [ opened up to cur_token and not closed, and how many were open when the
+        # current statement started, so synchronize can skip to the ';' that ends it
+        self.nesting = nesting_steps[self.cur_token.token_type]
+        self.statement_nesting = 0
+        self.error_keys: set[int | str] = set()
+        # closing brace of the last block parsed, so synchronize can tell it from an unconsumed one
+        self.last_block_end: Token | None = None
 
     def peek_precedence(self):
-        return precedences.get(self.peek_token.token_type, LOWEST)
+        return precedences[self.peek_token.token_type]
     
     def cur_precedence(self):
-        return precedences.get(self.cur_token.token_type, LOWEST)
+        return precedences[self.cur_token.token_type]
 
     def next_token(self):
-        self.cur_token = self.peek_token
+        self.cur_token = tok = self.peek_token
         self.peek_token = self.lexer.next_token()
+        self.nesting += nesting_steps[tok.token_type]
 
     def parse_program(self) -> Program :
         program = Program()
         stmts = []
 
         while self.cur_token.token_type != Constants.EOF:
+            self.start_statement()
             stmt = self.parse_statement()
             if stmt:
                 stmts.append(stmt)
+            if self.panicking:
+                self.synchronize()
             self.next_token()
         
         program.statements = stmts
@@ -103,7 +170,6 @@ class Parser:
         letstmt = LetStatement(token=self.cur_token, name = None, value = None)
         
         if not self.expect_peek(Constants.IDENT):
-            print(f"Expected {Constants.IDENT}. But Found {self.peek_token.token_type}")
             return None
         
         # stands at iden
@@ -144,7 +210,52 @@ class Parser:
     
     def peek_error(self, token_type: TokenType):
         msg = f"Expected '{token_type}'. But found '{self.peek_token.token_type}'"
-        self.errors.append(msg)
+        self.add_error(msg, self.peek_token)
+
+    def start_statement(self):
+        # cur_token starts a statement; what it opens belongs to the statement
+        self.statement_nesting = self.nesting - nesting_steps[self.cur_token.token_type]
+
+    def add_error(self, msg: str, tok: Token):
+        if self.panicking:
+            # the statement is broken already; anything else it reports is a follow-on error
+            return
+        self.panicking = True
+        # one error per token: anything else reported at the same place is a follow-on error
+        key = tok.start if tok.start >= 0 else msg
+        if key in self.error_keys:
+            return
+        self.error_keys.add(key)
+        self.errors.append(f'{msg}{self.position_suffix(tok)}')
+
+    def synchronize(self):
+        # Panic mode recovery: skips the rest of a broken statement. Stops on the ';' that
+        # ends it, or on a '}' that closes the enclosing block (which is left for the block
+        # to consume). Braces opened inside the skipped tokens are skipped as a whole, and a
+        # ';' inside a ( or [ the statement opened does not end it.
+        depth = 0
+        while self.cur_token.token_type != Constants.EOF:
+            token_type = self.cur_token.token_type
+            if depth == 0:
+                if token_type == Constants.SEMICOLON and self.nesting <= self.statement_nesting:
+                    break
+                if token_type == Constants.RBRACE and self.cur_token is not self.last_block_end:
+                    break
+            if token_type == Constants.LBRACE:
+                depth += 1
+            elif token_type == Constants.RBRACE and depth > 0:
+                depth -= 1
+            self.next_token()
+        self.panicking = False
+
+    def position_suffix(self, tok: Token) -> str:
+        source = getattr(self.lexer, 'input', None)
+        if tok.start < 0 or not isinstance(source, str):
+            return ''
+        if self.line_index is None:
+            self.line_index = LineIndex(source)
+        line, column = self.line_index.line_column(tok.start)
+        return f' (line {line}, column {column})'
 
 
     def parse_expression_statement(self) -> Statement:
@@ -163,24 +274,23 @@ class Parser:
         return exp_stmt
     
     def parse_expression(self, precedence: int) -> Expression:
-        prefix = self.prefix_parsing_fns.get(self.cur_token.token_type)
+        prefix = self.prefix_parsing_fns[self.cur_token.token_type]
 
         if prefix == None:
-            self.errors.append(f"no prefix parsing function found for {self.cur_token.token_type}")
+            self.add_error(f"no prefix parsing function found for {self.cur_token.token_type}", self.cur_token)
             return None
-        left_exp = prefix()
+        left_exp = prefix(self)
 
-        while self.peek_token != Constants.SEMICOLON and self.peek_precedence() > precedence:
-            infix = self.infix_parsing_fns[self.peek_token.token_type]
+        infix_parsing_fns = self.infix_parsing_fns
+        while True:
+            peek_precedence, infix = infix_parsing_fns[self.peek_token.token_type]
 
-            if infix == None:
+            if peek_precedence <= precedence or infix == None:
                 return left_exp
             
             self.next_token()
 
-            left_exp = infix(left_exp)
-        
-        return left_exp
+            left_exp = infix(self, left_exp)
     
     def parse_infix_expression(self, left: Expression) -> Expression:
         inf_exp = InfixExpression(token=self.cur_token, left= left, operator=self.cur_token.literal, right= None)
@@ -193,10 +303,13 @@ class Parser:
     
     def parse_identifier(self) -> Expression:
         if not self.ensure_identifier_naming_convention(self.cur_token.literal):
-            self.errors.append(f'{self.cur_token.literal} does not follow proper naming convention of an identifier')
+            self.add_error(f'{self.cur_token.literal} does not follow proper naming convention of an identifier', self.cur_token)
         return Identifier(token = self.cur_token, value = self.cur_token.literal)
     
     def parse_integer_literal(self) -> Expression:
+        value = self.cur_token.value
+        if value is not None:
+            return IntegerLiteral(token= self.cur_token, value=value)
         try:
             return IntegerLiteral(token= self.cur_token, value=int(self.cur_token.literal))
         except (ValueError, TypeError):
@@ -244,17 +357,26 @@ class Parser:
     def parse_block_statement(self) -> BlockStatement:
         block_stmt = BlockStatement(token=self.cur_token)
         self.next_token()
+        statement_nesting = self.statement_nesting
         
         while self.cur_token.token_type != Constants.RBRACE and self.cur_token.token_type != Constants.EOF:
+            self.start_statement()
             stmt = self.parse_statement()
             if stmt:
                 block_stmt.statements.append(stmt)
+            if self.panicking:
+                self.synchronize()
+                if self.cur_token.token_type == Constants.RBRACE:
+                    continue
             self.next_token() # move to the next statement (might be standing at semicolon or not)
 
+        # back in the statement holding the block
+        self.statement_nesting = statement_nesting
         if self.cur_token.token_type != Constants.RBRACE:
-            self.errors.append(f'Expected {Constants.RBRACE} at the end of block statment. But it is {self.cur_token}')
+            self.add_error(f'Expected {Constants.RBRACE} at the end of block statment. But it is {self.cur_token}', self.cur_token)
             return None
         
+        self.last_block_end = self.cur_token
         return block_stmt
 
     def parse_function_literal(self) -> FunctionLiteral:
@@ -263,41 +385,101 @@ class Parser:
         params: list[Identifier] = []
         self.expect_peek(Constants.LPAREN) # stands at Lparen
 
-        while self.cur_token.token_type not in  [Constants.EOF, Constants.RPAREN]:
+        while self.cur_token.token_type not in paren_end_types:
             self.next_token()
             # takes care for zero params or , after all params followed by ) while you are expecting an identifier
-            if self.cur_token.token_type in [Constants.RPAREN, Constants.EOF]: 
+            if self.cur_token.token_type in paren_end_types: 
                 break
             params.append(self.parse_identifier())
             self.next_token() # move to next , or )
-            if self.cur_token.token_type not in [Constants.COMMA, Constants.RPAREN]:
-                self.errors.append(f'Expected ")" or "," after parameter. Not {self.cur_token.token_type}')
+            if self.cur_token.token_type not in after_item_types:
+                self.add_error(f'Expected ")" or "," after parameter. Not {self.cur_token.token_type}', self.cur_token)
                 return None
             
         if self.cur_token.token_type != Constants.RPAREN:
-            self.errors.append("Expected ) after declaring parameters")
+            self.add_error("Expected ) after declaring parameters", self.cur_token)
             return None
 
         fn_lit.parameters = params
         if not self.expect_peek(Constants.LBRACE):
             return None
 
-        fn_lit.body = self.parse_block_statement()
+        if self.lazy_functions:
+            fn_lit.body = self.skip_block_statement()
+        else:
+            fn_lit.body = self.parse_block_statement()
 
         return fn_lit
 
+    def skip_block_statement(self) -> LazyBlockStatement:
+        lbrace = self.cur_token
+        # RegexLexer source is scanned for brackets directly, without lexing the other tokens
+        scan = type(self.lexer) is RegexLexer
+        tokens = bracket_tokens(self.lexer.input, lbrace.start + 1) if scan else self.remaining_tokens()
+        validating = self.validate_lazy
+        pairs = lazy_validation_pairs if validating else lazy_brace_pairs
+        expected = [Constants.RBRACE]
+        valid = True
+        for tok in tokens:
+            token_type = tok.token_type
+            if token_type in pairs:
+                expected.append(pairs[token_type])
+            elif token_type == expected[-1]:
+                expected.pop()
+                if not expected:
+                    break
+            elif token_type == Constants.EOF:
+                self.add_error(f'Expected {Constants.RBRACE} at the end of block statment. But it is {tok}', tok)
+                valid = False
+                break
+            elif validating and (token_type in lazy_closing_types or token_type == Constants.ILLEGAL):
+                self.add_error(f"Unexpected '{tok.literal}' in function body. Expected '{expected[-1]}'", tok)
+                # skips the rest of the body by its braces alone, so recovery resumes after it
+                valid = validating = False
+                pairs = lazy_brace_pairs
+                expected = [Constants.RBRACE] * expected.count(Constants.RBRACE)
+
+        if scan:
+            # continue lexing right after the last token the scan returned
+            self.lexer.position = tok.start + len(tok.literal)
+            self.cur_token = tok
+            self.peek_token = self.lexer.next_token()
+        self.last_block_end = tok
+        if not valid:
+            return None
+        return LazyBlockStatement(lbrace, self.lexer.input, tok.start, type(self))
+
+    def remaining_tokens(self):
+        while True:
+            self.next_token()
+            yield self.cur_token
+
+    def parse_block(self) -> BlockStatement:
+        return self.parse_block_statement()
+
+    @classmethod
+    def parse_block_at(cls, source: str, lbrace: Token) -> tuple[BlockStatement | None, list[str]]:
+        # parses the block starting at lbrace, a '{' token of source (a LazyBlockStatement)
+        lexer = RegexLexer(source)
+        lexer.position = lbrace.start
+        p = cls(lexer, lazy_functions=True)
+        block = p.parse_block()
+        return block, p.errors
+
     def parse_lparen_infix(self, left: Expression) -> CallExpression:
         call_exp = CallExpression(token=self.cur_token, function=left)
         
         args = []
         
-        while self.cur_token.token_type not in [Constants.RPAREN, Constants.EOF]:
+        while self.cur_token.token_type not in paren_end_types:
             self.next_token()
-            if self.cur_token.token_type in [Constants.RPAREN, Constants.EOF]: 
+            if self.cur_token.token_type in paren_end_types: 
                 break
             args.append(self.parse_expression(LOWEST))
-            if self.peek_token.token_type not in [Constants.RPAREN, Constants.COMMA]:
-                self.errors.append(f'Expected , or ) after each argument in the CallExpression')
+            if self.panicking:
+                return None
+            if self.peek_token.token_type not in after_item_types:
+                self.add_error(f'Expected , or ) after each argument in the CallExpression', self.peek_token)
                 return None
             self.next_token()
         
@@ -327,11 +509,13 @@ class Parser:
 
         elements: list[Expression] = []
 
-        while self.cur_token.token_type not in [Constants.RBRACKET, Constants.EOF]:
+        while self.cur_token.token_type not in bracket_end_types:
             self.next_token()
-            if self.cur_token.token_type in [Constants.RBRACKET, Constants.EOF]:
+            if self.cur_token.token_type in bracket_end_types:
                 break
             exp = self.parse_expression(LOWEST)
+            if self.panicking:
+                return None
             elements.append(exp)
             self.next_token()
         
@@ -400,4 +584,328 @@ class Parser:
 
 
 
-  
\ No newline at end of file
+  
+
+
+build_dispatch_tables(Parser)
+
+
+def trampoline(gen: Generator) -> object:
+    # Runs a generator based parse method. A generator yielding another generator is a
+    # recursive call: it is pushed on an explicit stack and its return value is sent
+    # back once it finishes. Anything else yielded is sent straight back.
+    stack = [gen]
+    send = gen.send
+    value = None
+    while True:
+        try:
+            res = send(value)
+        except StopIteration as stop:
+            stack.pop()
+            value = stop.value
+            if not stack:
+                return value
+            send = stack[-1].send
+            continue
+        if type(res) is GeneratorType:
+            stack.append(res)
+            send = res.send
+            value = None
+        else:
+            value = res
+
+
+class IterativeParser(Parser):
+    # Same grammar, ASTs and errors as Parser, but every method that can recurse is a
+    # generator that yields its sub-parses to trampoline instead of calling them, so
+    # nesting depth is limited by memory instead of by the Python recursion limit.
+    # The methods mirror their Parser counterparts line for line, so a change to the
+    # grammar goes into both (TestIterativeParser runs the Parser tests on this class).
+
+    def parse_program(self) -> Program:
+        program = Program()
+        stmts = []
+
+        while self.cur_token.token_type != Constants.EOF:
+            self.start_statement()
+            stmt = trampoline(self.parse_statement())
+            if stmt:
+                stmts.append(stmt)
+            if self.panicking:
+                self.synchronize()
+            self.next_token()
+
+        program.statements = stmts
+        return program
+
+    def parse_statement(self):
+        match self.cur_token.token_type:
+            case Constants.LET:
+                return (yield self.parse_let_statement())
+            case Constants.RETURN:
+                return (yield self.parse_return_statement())
+            case Constants.WHILE:
+                return (yield self.parse_while_statement())
+            case _:
+                return (yield self.parse_expression_statement())
+
+    def parse_let_statement(self):
+        letstmt = LetStatement(token=self.cur_token, name = None, value = None)
+
+        if not self.expect_peek(Constants.IDENT):
+            return None
+
+        name = Identifier(token = self.cur_token, value = self.cur_token.literal)
+        letstmt.name = name
+
+        if not self.expect_peek(Constants.ASSIGN):
+            return None
+
+        self.next_token()
+
+        letstmt.value = yield self.parse_expression(LOWEST)
+
+        if self.peek_token.token_type == Constants.SEMICOLON:
+            self.next_token()
+
+        return letstmt
+
+    def parse_return_statement(self):
+        rt_stmt = ReturnStatement(token = self.cur_token, value = None)
+
+        self.next_token()
+        rt_stmt.value = yield self.parse_expression(LOWEST)
+
+        if self.peek_token.token_type == Constants.SEMICOLON:
+            self.next_token()
+
+        return rt_stmt
+
+    def parse_expression_statement(self):
+        exp_stmt = ExpressionStatement(token = self.cur_token, expression = None)
+
+        expression = yield self.parse_expression(LOWEST)
+
+        if self.peek_token.token_type == Constants.SEMICOLON:
+            self.next_token()
+
+        if isinstance(expression, AssignmentStatement):
+            return expression
+
+        exp_stmt.expression = expression
+
+        return exp_stmt
+
+    def parse_expression(self, precedence: int):
+        prefix = self.prefix_parsing_fns[self.cur_token.token_type]
+
+        if prefix == None:
+            self.add_error(f"no prefix parsing function found for {self.cur_token.token_type}", self.cur_token)
+            return None
+        left_exp = yield prefix(self)
+
+        infix_parsing_fns = self.infix_parsing_fns
+        while True:
+            peek_precedence, infix = infix_parsing_fns[self.peek_token.token_type]
+
+            if peek_precedence <= precedence or infix == None:
+                return left_exp
+
+            self.next_token()
+
+            left_exp = yield infix(self, left_exp)
+
+    def parse_infix_expression(self, left: Expression):
+        inf_exp = InfixExpression(token=self.cur_token, left= left, operator=self.cur_token.literal, right= None)
+        cur_precedence = self.cur_precedence()
+        self.next_token()
+        right = yield self.parse_expression(precedence=cur_precedence)
+        inf_exp.right = right
+        return inf_exp
+
+    def parse_prefix_expression(self):
+        expression = PrefixExpression(token= self.cur_token, operator=self.cur_token.literal, right= None)
+        self.next_token()
+        expression.right = yield self.parse_expression(precedence=PREFIX)
+        return expression
+
+    def parse_grouped_expression(self):
+        self.next_token()
+        exp = yield self.parse_expression(LOWEST)
+        if not self.expect_peek(Constants.RPAREN):
+            return None
+        return exp
+
+    def parse_if_expression(self):
+        if_exp = IfExpression(token = self.cur_token, condition=None, consequence=None, alternative=None)
+        self.next_token()
+
+        if_exp.condition = yield self.parse_grouped_expression()
+
+        if not self.expect_peek(Constants.LBRACE):
+            return None
+
+        consequence: BlockStatement = yield self.parse_block_statement()
+        if_exp.consequence = consequence
+
+        if self.peek_token.token_type == Constants.ELSE:
+            self.next_token()
+            if not self.expect_peek(Constants.LBRACE):
+                return None
+            if_exp.alternative = yield self.parse_block_statement()
+
+        return if_exp
+
+    def parse_block_statement(self):
+        block_stmt = BlockStatement(token=self.cur_token)
+        self.next_token()
+        statement_nesting = self.statement_nesting
+
+        while self.cur_token.token_type != Constants.RBRACE and self.cur_token.token_type != Constants.EOF:
+            self.start_statement()
+            stmt = yield self.parse_statement()
+            if stmt:
+                block_stmt.statements.append(stmt)
+            if self.panicking:
+                self.synchronize()
+                if self.cur_token.token_type == Constants.RBRACE:
+                    continue
+            self.next_token()
+
+        # back in the statement holding the block
+        self.statement_nesting = statement_nesting
+        if self.cur_token.token_type != Constants.RBRACE:
+            self.add_error(f'Expected {Constants.RBRACE} at the end of block statment. But it is {self.cur_token}', self.cur_token)
+            return None
+
+        self.last_block_end = self.cur_token
+        return block_stmt
+
+    def parse_function_literal(self):
+        fn_lit = FunctionLiteral(token = self.cur_token)
+
+        params: list[Identifier] = []
+        self.expect_peek(Constants.LPAREN)
+
+        while self.cur_token.token_type not in paren_end_types:
+            self.next_token()
+            if self.cur_token.token_type in paren_end_types:
+                break
+            params.append(self.parse_identifier())
+            self.next_token()
+            if self.cur_token.token_type not in after_item_types:
+                self.add_error(f'Expected ")" or "," after parameter. Not {self.cur_token.token_type}', self.cur_token)
+                return None
+
+        if self.cur_token.token_type != Constants.RPAREN:
+            self.add_error("Expected ) after declaring parameters", self.cur_token)
+            return None
+
+        fn_lit.parameters = params
+        if not self.expect_peek(Constants.LBRACE):
+            return None
+
+        if self.lazy_functions:
+            fn_lit.body = self.skip_block_statement()
+        else:
+            fn_lit.body = yield self.parse_block_statement()
+
+        return fn_lit
+
+    def parse_block(self) -> BlockStatement:
+        return trampoline(self.parse_block_statement())
+
+    def parse_lparen_infix(self, left: Expression):
+        call_exp = CallExpression(token=self.cur_token, function=left)
+
+        args = []
+
+        while self.cur_token.token_type not in paren_end_types:
+            self.next_token()
+            if self.cur_token.token_type in paren_end_types:
+                break
+            args.append((yield self.parse_expression(LOWEST)))
+            if self.panicking:
+                return None
+            if self.peek_token.token_type not in after_item_types:
+                self.add_error(f'Expected , or ) after each argument in the CallExpression', self.peek_token)
+                return None
+            self.next_token()
+
+        if self.cur_token.token_type != Constants.RPAREN:
+            return None
+
+        call_exp.arguments = args
+        return call_exp
+
+    def parse_array_literal(self):
+        res = ArrayLiteral(self.cur_token, elements=None)
+
+        elements: list[Expression] = []
+
+        while self.cur_token.token_type not in bracket_end_types:
+            self.next_token()
+            if self.cur_token.token_type in bracket_end_types:
+                break
+            exp = yield self.parse_expression(LOWEST)
+            if self.panicking:
+                return None
+            elements.append(exp)
+            self.next_token()
+
+        res.elements = elements
+
+        if self.cur_token.token_type != Constants.RBRACKET:
+            return None
+
+        return res
+
+    def parse_lbracket_infix(self, left: Expression):
+        ie = IndexExpression(tok = self.cur_token, left=left, index=None)
+
+        self.next_token()
+
+        index = yield self.parse_expression(LOWEST)
+        ie.index = index
+
+        self.next_token()
+        if self.cur_token.token_type != Constants.RBRACKET:
+            return None
+
+        return ie
+
+    def parse_assignment_statment(self, left: Expression):
+        if not isinstance(left, Identifier):
+            return None
+
+        ass_stm = AssignmentStatement(token=self.cur_token, left = left, right = None)
+        self.next_token()
+
+        right = yield self.parse_expression(LOWEST)
+        if right == None:
+            return None
+        ass_stm.right = right
+
+        return ass_stm
+
+    def parse_while_statement(self):
+        stmt = WhileStatement(self.cur_token, condition = None, body=None)
+        self.next_token()
+        self.next_token()
+
+        condition = yield self.parse_expression(LOWEST)
+
+        if not self.expect_peek(Constants.RPAREN):
+            return None
+
+        if not self.expect_peek(Constants.LBRACE):
+            return None
+        blk_stmt = yield self.parse_block_statement()
+
+        if self.peek_token.token_type == Constants.SEMICOLON:
+            self.next_token()
+
+        stmt.condition = condition
+        stmt.body = blk_stmt
+
+        return stmt
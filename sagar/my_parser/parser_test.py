@@ -1,12 +1,16 @@
+import contextlib
+import inspect
+import io
 import unittest
 from sagar.lexer.Lexer import new_lexer
-from sagar.my_parser.parser import Parser
+from sagar.my_parser.parser import Parser, IterativeParser
 from sagar.my_ast.ast import *
-from sagar.my_token.token import Token, Constants
+from sagar.my_token.token import Token, Constants, LineIndex
 
 
 class TestParser(unittest.TestCase):
-    
+    parser_cls = Parser
+
     def test_let_statement(self):
         inp = '''
             maan_le five = 5;
@@ -15,7 +19,7 @@ class TestParser(unittest.TestCase):
         '''
 
         l = new_lexer(inp)
-        p = Parser(lexer= l)
+        p = self.parser_cls(lexer= l)
 
         identifiers = [('five', 5), ('t', True), ('foobar', 'y')]
 
@@ -45,7 +49,7 @@ class TestParser(unittest.TestCase):
         '''
 
         l = new_lexer(inp)
-        p = Parser(lexer=l)
+        p = self.parser_cls(lexer=l)
 
         program = p.parse_program()
         self.check_parse_errors(p)
@@ -62,7 +66,7 @@ class TestParser(unittest.TestCase):
         inp = 'foobar;'
 
         l = new_lexer(inp)
-        p = Parser(lexer=l)
+        p = self.parser_cls(lexer=l)
 
         program = p.parse_program()
         self.check_parse_errors(p)
@@ -91,7 +95,7 @@ class TestParser(unittest.TestCase):
         values = [5, 9379]
 
         l = new_lexer(input=inp)
-        p = Parser(l)
+        p = self.parser_cls(l)
 
         program = p.parse_program()
         self.check_parse_errors(p)
@@ -118,7 +122,7 @@ class TestParser(unittest.TestCase):
 
         for inp, op, val in prefix_exps:
             l = new_lexer(input=inp)
-            p = Parser(lexer= l)
+            p = self.parser_cls(lexer= l)
 
             program = p.parse_program()
             self.check_parse_errors(p)
@@ -150,7 +154,7 @@ class TestParser(unittest.TestCase):
         for i, tt in enumerate(infix_tests):
             inp, left, op, right = tt
             l = new_lexer(inp)
-            p = Parser(l)
+            p = self.parser_cls(l)
 
             program = p.parse_program()
             self.check_parse_errors(p)
@@ -190,7 +194,7 @@ class TestParser(unittest.TestCase):
 
         for inp, expexted in tests:
             l = new_lexer(inp)
-            p = Parser(l)
+            p = self.parser_cls(l)
             program = p.parse_program()
             self.check_parse_errors(p)
             self.assertTrue(str(program) == expexted, f"expected {expexted}. But got {str(program)}")
@@ -208,7 +212,7 @@ class TestParser(unittest.TestCase):
 
         for i, inp in enumerate(inputs):
             l = new_lexer(inp)
-            p = Parser(l)
+            p = self.parser_cls(l)
             program = p.parse_program()
             self.check_parse_errors(p)
 
@@ -232,7 +236,7 @@ class TestParser(unittest.TestCase):
     def test_if_expression(self):
         inp = 'if (x < y) { x }'
         l = new_lexer(inp)
-        p = Parser(l)
+        p = self.parser_cls(l)
 
         program = p.parse_program()
         self.check_parse_errors(p)
@@ -261,7 +265,7 @@ class TestParser(unittest.TestCase):
     def test_if_else_exp(self):
         inp = 'if (x < y) { x } else { y }'
         l = new_lexer(inp)
-        p = Parser(l)
+        p = self.parser_cls(l)
 
         program = p.parse_program()
         self.check_parse_errors(p)
@@ -299,7 +303,7 @@ class TestParser(unittest.TestCase):
     def test_function_literal(self):
         inp = 'golmaal(x, y){x + y;}'
         l = new_lexer(inp)
-        p = Parser(l)
+        p = self.parser_cls(l)
 
         program = p.parse_program()
         self.check_parse_errors(p)
@@ -329,7 +333,7 @@ class TestParser(unittest.TestCase):
         inps = [('golmaal(){}', []), ('golmaal(x,){x}', ['x']), ('golmaal(x, y, z,){x+y+z;}', ['x', 'y', 'z'])]
         for i, (inp, expected) in enumerate(inps):
             l = new_lexer(inp)
-            p = Parser(l)
+            p = self.parser_cls(l)
 
             program = p.parse_program()
             self.check_parse_errors(p)
@@ -355,7 +359,7 @@ class TestParser(unittest.TestCase):
         inps = ['add()', 'add(foobar)', 'add(2, golmaal(x, y){x+y}(2, 3))', 'add(2, 3*5, 4+8)']
         for i, inp in enumerate(inps):
             l = new_lexer(inp)
-            p = Parser(l)
+            p = self.parser_cls(l)
 
             program = p.parse_program()
             self.check_parse_errors(p)
@@ -396,7 +400,7 @@ class TestParser(unittest.TestCase):
         exp = ['foobar', 'sagar gupta', 'om sai ram']
         for i, inp in enumerate(inps):
             l = new_lexer(inp)
-            p = Parser(l)
+            p = self.parser_cls(l)
 
             program = p.parse_program()
             self.check_parse_errors(p)
@@ -421,7 +425,7 @@ class TestParser(unittest.TestCase):
 
         for i, inp in enumerate(inps):
             l = new_lexer(inp)
-            p = Parser(l)
+            p = self.parser_cls(l)
 
             program = p.parse_program()
             self.check_parse_errors(p)
@@ -449,7 +453,7 @@ class TestParser(unittest.TestCase):
         inp = 'myarray[1+2]'
 
         l = new_lexer(inp)
-        p = Parser(l)
+        p = self.parser_cls(l)
         program = p.parse_program()
         self.check_parse_errors(p)
 
@@ -478,7 +482,7 @@ class TestParser(unittest.TestCase):
 
         for i, inp in enumerate(inps):
             l = new_lexer(inp)
-            p = Parser(l)
+            p = self.parser_cls(l)
 
             program = p.parse_program()
             self.check_parse_errors(p)
@@ -544,7 +548,7 @@ class TestParser(unittest.TestCase):
 
         for i, test in enumerate(inps):
             l = new_lexer(test)
-            p = Parser(l)
+            p = self.parser_cls(l)
             program = p.parse_program()
             self.check_parse_errors(p)
 
@@ -610,6 +614,178 @@ class TestParser(unittest.TestCase):
                     self.validate_infix_expression(alt_stmt.right, 'b', '+', 1)
 
 
+    def test_error_positions(self):
+        tests = [
+            ('maan_le 5 = 3;', ["Expected 'IDENT'. But found 'INT' (line 1, column 9)"]),
+            ('maan_le a = 1;\n  maan_le b = ;', ['no prefix parsing function found for ; (line 2, column 15)']),
+            ('f(1 2)', ['Expected , or ) after each argument in the CallExpression (line 1, column 5)']),
+        ]
+        for i, (inp, exp) in enumerate(tests):
+            p = self.parser_cls(new_lexer(inp))
+            p.parse_program()
+            self.assertTrue(p.errors == exp, f'p.errors -> {i} = {p.errors} != {exp}')
+
+    def test_error_recovery(self):
+        inp = '''while (x) {
+    maan_le = 1;
+    print(2 3);
+    if (y) { maan_le 9 = 2; }
+    z = ;
+}
+maan_le ok = [1, 2 +];
+maan_le fine = 1;
+f(;'''
+        exp = [
+            "Expected 'IDENT'. But found '=' (line 2, column 13)",
+            'Expected , or ) after each argument in the CallExpression (line 3, column 13)',
+            "Expected 'IDENT'. But found 'INT' (line 4, column 22)",
+            'no prefix parsing function found for ; (line 5, column 9)',
+            'no prefix parsing function found for ] (line 7, column 21)',
+            'no prefix parsing function found for ; (line 9, column 3)',
+        ]
+        p = self.parser_cls(new_lexer(inp))
+        program = p.parse_program()
+        self.assertTrue(p.errors == exp, f'p.errors = {p.errors} != {exp}')
+
+        # the statements around the broken ones are still parsed
+        stmts = [str(stmt) for stmt in program.statements]
+        self.assertTrue('maan_le fine = 1' in stmts, f'stmts = {stmts}')
+        while_stmt: WhileStatement = program.statements[0]
+        body = [type(stmt.expression).__name__ for stmt in while_stmt.body.statements]
+        exp_body = ['NoneType', 'IfExpression', 'NoneType']  # print(2 3), the if, z = ;
+        self.assertTrue(body == exp_body, f'while body = {body} != {exp_body}')
+
+        # a ';' inside the brackets does not end the statement, and nothing else in it is
+        # reported after the first error
+        inps = [
+            ('[1, 2, ; 3];\nmaan_le fine = 1;', ['no prefix parsing function found for ; (line 1, column 8)']),
+            ('if (1 < ) { print(1); }\nmaan_le fine = 1;', ['no prefix parsing function found for ) (line 1, column 9)']),
+            ('f(golmaal() { g(1); }, [;]);\nmaan_le fine = 1;', ['no prefix parsing function found for ; (line 1, column 25)']),
+        ]
+        for inp, exp in inps:
+            p = self.parser_cls(new_lexer(inp))
+            program = p.parse_program()
+            self.assertTrue(p.errors == exp, f'{inp!r}: p.errors = {p.errors} != {exp}')
+            stmts = [str(stmt) for stmt in program.statements]
+            self.assertTrue(stmts[-1] == 'maan_le fine = 1', f'{inp!r}: stmts = {stmts}')
+
+    def test_errors_are_not_printed(self):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            p = self.parser_cls(new_lexer('maan_le = 5; maan_le 7 = 1;'))
+            p.parse_program()
+        self.assertTrue(len(p.errors) == 2 and out.getvalue() == '', f'p.errors = {p.errors}, printed {out.getvalue()!r}')
+
+    def test_duplicate_errors(self):
+        p = self.parser_cls(new_lexer('((((1'))
+        p.parse_program()
+        exp = ["Expected ')'. But found 'EOF' (line 1, column 6)"]
+        self.assertTrue(p.errors == exp, f'p.errors = {p.errors} != {exp}')
+
+    def test_token_positions(self):
+        inp = 'maan_le s = "ab";\nx'
+        l = new_lexer(inp)
+        starts = []
+        while True:
+            tok = l.next_token()
+            starts.append(tok.start)
+            if tok.token_type == Constants.EOF:
+                break
+        self.assertTrue(starts == [0, 8, 10, 12, 16, 18, 19], f'starts = {starts}')
+
+        index = LineIndex(inp)
+        positions = [index.line_column(offset) for offset in [0, 16, 17, 18, 19]]
+        exp = [(1, 1), (1, 17), (1, 18), (2, 1), (2, 2)]
+        self.assertTrue(positions == exp, f'positions = {positions} != {exp}')
+
+    def test_comments(self):
+        inp = '''
+            // the answer
+            maan_le a = 40 /* plus */ + 2; // trailing
+            /* unterminated
+            maan_le b = 1;
+        '''
+        for engine in ['classic', 'regex']:
+            p = self.parser_cls(new_lexer(inp, engine=engine))
+            program = p.parse_program()
+            self.check_parse_errors(p)
+            self.assertTrue(str(program) == 'maan_le a = (40 + 2)', f'{engine}: str(program) = {str(program)}')
+
+    def test_dispatch_tables(self):
+        class DoublingParser(Parser):
+            def parse_integer_literal(self):
+                return IntegerLiteral(token=self.cur_token, value=self.cur_token.value * 2)
+
+        self.assertTrue(Parser.prefix_parsing_fns is Parser(new_lexer('1')).prefix_parsing_fns, 'Parser builds its prefix table per instance')
+        self.assertTrue(DoublingParser.infix_parsing_fns is not Parser.infix_parsing_fns, 'subclass shares the tables of Parser')
+
+        for parser_cls, exp in [(DoublingParser, [2, 4, 6]), (Parser, [1, 2, 3])]:
+            p = parser_cls(new_lexer('1 + 2 * 3'))
+            program = p.parse_program()
+            self.check_parse_errors(p)
+            exp_stmt: ExpressionStatement = program.statements[0]
+            self.assertTrue(str(exp_stmt) == '(1 + (2 * 3))', f'{parser_cls.__name__}: str(program) = {str(program)}')
+            infix: InfixExpression = exp_stmt.expression
+            values = [infix.left.value, infix.right.left.value, infix.right.right.value]
+            self.assertTrue(values == exp, f'{parser_cls.__name__}: values = {values} != {exp}')
+
+    def test_lazy_functions(self):
+        inp = '''maan_le add = golmaal(x, y) { maan_le f = golmaal() { ye_lo x; }; ye_lo f() + [y][0]; };
+maan_le mul = golmaal(a, b) { if (a > 0) { ye_lo a * b; } else { ye_lo "no {" + b; } };'''
+        for engine in ['classic', 'regex']:
+            p = self.parser_cls(new_lexer(inp, engine=engine), lazy_functions=True)
+            program = p.parse_program()
+            self.check_parse_errors(p)
+            eager = self.parser_cls(new_lexer(inp, engine=engine)).parse_program()
+
+            add: FunctionLiteral = program.statements[0].value
+            mul: FunctionLiteral = program.statements[1].value
+            self.assertTrue(isinstance(add.body, LazyBlockStatement) and add.body.errors is None, f'{engine}: add.body was parsed eagerly')
+            self.assertTrue(add.body.end == inp.index('\n') - 2, f'{engine}: add.body.end = {add.body.end}')
+            self.assertTrue(flatten(mul.body.parse()) == flatten(eager.statements[1].value.body), f'{engine}: lazily parsed body differs')
+            self.assertTrue(isinstance(add.body.statements[0].value.body, LazyBlockStatement) and add.body.errors == [], f'{engine}: nested body was parsed eagerly')
+            self.assertTrue(str(program) == str(eager), f'{engine}: str(program) = {str(program)} != {str(eager)}')
+
+        # syntax errors inside a body are found when it is parsed, at their position in the source
+        p = self.parser_cls(new_lexer('maan_le ok = 1;\nmaan_le bad = golmaal() { maan_le = 5; };'), lazy_functions=True)
+        program = p.parse_program()
+        self.check_parse_errors(p)
+        body: LazyBlockStatement = program.statements[1].value.body
+        exp = ["Expected 'IDENT'. But found '=' (line 2, column 35)"]
+        self.assertTrue(body.parse() is None and body.statements == [], f'body = {body.block}')
+        self.assertTrue(body.errors == exp, f'body.errors = {body.errors} != {exp}')
+
+        # cached programs are shared between threads: once errors is set, block is too
+        class RecordingBody(LazyBlockStatement):
+            __slots__ = ()
+
+            def __setattr__(self, name, value):
+                if name == 'errors' and value is not None:
+                    seen.append(self.block)
+                super().__setattr__(name, value)
+
+        seen = []
+        add: LazyBlockStatement = self.parser_cls(new_lexer(inp), lazy_functions=True).parse_program().statements[0].value.body
+        body = RecordingBody(add.token, add.source, add.end, add.parser_cls)
+        block = body.parse()
+        self.assertTrue(block is not None and seen == [block], f'seen = {seen}')
+
+        # unbalanced brackets and illegal tokens are still reported up front
+        tests = [
+            ('maan_le f = golmaal() { print(1]; }; maan_le g = 1 +;', True,
+             ["Unexpected ']' in function body. Expected ')' (line 1, column 32)", 'no prefix parsing function found for ; (line 1, column 53)']),
+            ('maan_le f = golmaal() { 1 @ 2; }; 3;', True, ["Unexpected '@' in function body. Expected '}' (line 1, column 27)"]),
+            ('maan_le f = golmaal() { "a ( @" + 1abc; }; 3;', True, ["Unexpected '1abc' in function body. Expected '}' (line 1, column 35)"]),
+            ('maan_le f = golmaal() { /* } */ ye_lo [x, 10] // ]\n }; f == 3;', True, []),
+            ('maan_le f = golmaal() { print(1]; };', False, []),
+            ('maan_le f = golmaal() { [1, 2;', False, ["Expected } at the end of block statment. But it is Token(token_type='EOF', literal='') (line 1, column 31)"]),
+        ]
+        for engine in ['classic', 'regex']:
+            for i, (inp, validate, exp) in enumerate(tests):
+                p = self.parser_cls(new_lexer(inp, engine=engine), lazy_functions=True, validate_lazy=validate)
+                program = p.parse_program()
+                self.assertTrue(p.errors == exp, f'{engine}: p.errors -> {i} = {p.errors} != {exp}')
+
     def check_parse_errors(self, p: Parser):
         errors = p.errors
 
@@ -626,5 +802,100 @@ class TestParser(unittest.TestCase):
 
 
 
+def flatten(node) -> list:
+    # pre-order (type, token, primitive fields) listing of a tree, without recursion
+    res = []
+    stack = [node]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, list):
+            res.append(('list', len(obj)))
+            stack.extend(reversed(obj))
+        elif isinstance(obj, Token):
+            res.append((obj.token_type, obj.literal, obj.start))
+        elif isinstance(obj, Node):
+            res.append(type(obj).__name__)
+            stack.extend(getattr(obj, slot) for slot in reversed(type(obj).__slots__))
+        else:
+            res.append(obj)
+    return res
+
+
+class TestIterativeParser(TestParser):
+    # runs every TestParser test against IterativeParser, plus deep nesting stress tests
+    parser_cls = IterativeParser
+
+    DEPTH = 100_000
+
+    NESTINGS = {
+        'parens': lambda d: '(' * d + '1' + ' + 1)' * d,
+        'prefix': lambda d: '-' * d + '1',
+        'arrays': lambda d: '[' * d + '1' + ']' * d,
+        'calls': lambda d: 'f(' * d + '1' + ')' * d,
+        'index': lambda d: 'a' + '[0' * d + ']' * d,
+        'infix': lambda d: '1 + (' * d + '1' + ')' * d,
+        'ifs': lambda d: 'if (true) { ' * d + '1' + ' }' * d,
+        'functions': lambda d: 'golmaal(x) { ' * d + 'x' + ' }' * d,
+        'assignments': lambda d: 'a = ' * d + '1',
+        'whiles': lambda d: 'while (true) { ' * d + '1;' + ' }' * d,
+    }
+
+    def test_generator_methods(self):
+        # every method overridden here, except the entry points, yields its sub-parses
+        # and takes the same arguments as the Parser method it mirrors
+        entry_methods = {'parse_program', 'parse_block'}
+        for name, method in vars(IterativeParser).items():
+            if not inspect.isfunction(method):
+                continue
+            self.assertTrue(inspect.isgeneratorfunction(method) == (name not in entry_methods), f'{name}: isgeneratorfunction = {inspect.isgeneratorfunction(method)}')
+            parameters = list(inspect.signature(method).parameters)
+            self.assertTrue(parameters == list(inspect.signature(getattr(Parser, name)).parameters), f'{name}: parameters = {parameters}')
+
+    def parse_both(self, inp: str):
+        p = Parser(new_lexer(inp))
+        recursive = p.parse_program()
+        ip = IterativeParser(new_lexer(inp))
+        iterative = ip.parse_program()
+        return (recursive, p.errors), (iterative, ip.errors)
+
+    def test_matches_recursive_parser(self):
+        inps = [nest(50) for nest in self.NESTINGS.values()]
+        inps += [
+            'maan_le f = golmaal(a, b) { ye_lo a * (b + [1, 2][0]); }; while (f(1, 2) < 10) { print("x"); }',
+            'if (a) { 1 } else { maan_le b = -!c; b[1 + 2](3) }',
+            # malformed input has to produce the same partial trees and errors
+            'maan_le = 5; f(1 2); [1, 2; golmaal(a b) { }; if (x { }',
+            '((1 + 2) * 3',
+            'while (x) { x = x - 1; ',
+        ]
+        for i, inp in enumerate(inps):
+            (recursive, errors), (iterative, iterative_errors) = self.parse_both(inp)
+            self.assertTrue(flatten(recursive) == flatten(iterative), f'ASTs differ for input {i} = {inp[:60]!r}')
+            self.assertTrue(errors == iterative_errors, f'errors differ for input {i}: {errors} != {iterative_errors}')
+
+    def test_beyond_recursion_limit(self):
+        depth = 5000  # well past the default recursion limit of 1000
+        for name, nest in self.NESTINGS.items():
+            p = IterativeParser(new_lexer(nest(depth), engine='regex'))
+            program = p.parse_program()
+            self.check_parse_errors(p)
+            self.assertTrue(len(program.statements) == 1, f'{name}: expected 1 statement, got {len(program.statements)}')
+            self.assertTrue(len(flatten(program)) > depth, f'{name}: tree is shallower than {depth}')
+
+    def test_deep_nesting(self):
+        for name in ['parens', 'prefix', 'functions', 'ifs']:
+            p = IterativeParser(new_lexer(self.NESTINGS[name](self.DEPTH), engine='regex'))
+            program = p.parse_program()
+            self.check_parse_errors(p)
+            self.assertTrue(len(p.errors) == 0, f'{name}: {len(p.errors)} errors')
+            self.assertTrue(len(program.statements) == 1, f'{name}: expected 1 statement, got {len(program.statements)}')
+
+    def test_deep_nesting_errors(self):
+        # an unbalanced deep input reports its error instead of raising
+        p = IterativeParser(new_lexer('(' * self.DEPTH + '1', engine='regex'))
+        p.parse_program()
+        self.assertTrue(p.errors == ["Expected ')'. But found 'EOF' (line 1, column 100002)"], f'p.errors = {p.errors[:3]}')
+
+
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
@@ -1,12 +1,14 @@
 from sagar.my_token.token import Token, Constants
 from sagar.lexer import Lexer
 from sagar.my_parser.parser import Parser
-from sagar.my_evaluator.evaluator import eval
+from sagar.my_evaluator.backends import get_backend, TREE_BACKEND
+from sagar.my_optimizer.passes import optimize as optimize_program
 from sagar.my_object.object import Environment, ErrorObj
 
 PROMPT = ">>"
 
-def start():
+def start(optimize: bool = True, backend: str = TREE_BACKEND):
+    evaluate = get_backend(backend)
     env = Environment(print_statements=[])
     while True:
         line = input(PROMPT)
@@ -20,9 +22,13 @@ def start():
             for error in p.errors:
                 print(error)
             continue
+
+        if optimize:
+            # globals are resolved by name, so env carries over between lines
+            program = optimize_program(program)
         
         try:
-            evaluated = eval(program, env)
+            evaluated = evaluate(program, env)
         except Exception as e:
             print(e)
             env = Environment(print_statements=[])
@@ -1,53 +1,136 @@
-from dataclasses import dataclass
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from enum import IntEnum
 
-TokenType = str
 
-@dataclass
+class TokenType(IntEnum):
+    # Small ints so token types can index the parser's dispatch tables directly.
+    # Each member keeps the label the parser used to print in its error messages.
+    def __new__(cls, value: int, label: str):
+        obj = int.__new__(cls, value)
+        obj._value_ = value
+        obj.label = label
+        return obj
+
+    def __str__(self):
+        return self.label
+
+    def __format__(self, format_spec):
+        return format(self.label, format_spec)
+
+    def __repr__(self):
+        # keeps repr(Token) (used in parser errors) identical to the old string types
+        return repr(self.label)
+
+    ILLEGAL = 0, "ILLEGAL"
+    EOF = 1, "EOF"
+
+    #Identifiers + literals
+    IDENT = 2, "IDENT" # add, foobar, x, y, ...
+    INT = 3, "INT" # 1343456
+    STRING = 4, 'STRING'
+
+    # Operators
+    ASSIGN = 5, "="
+    PLUS = 6, "+"
+    ASTERISK = 7, "*"
+    GT = 8, ">"
+    LT = 9, "<"
+    SLASH = 10, "/"
+    MINUS = 11, "-"
+    BANG = 12, "!"
+    EQ = 13, "=="
+    NOT_EQ = 14, "!="
+
+    # Delimiters
+    COMMA = 15, ","
+    SEMICOLON = 16, ";"
+    LPAREN = 17, "("
+    RPAREN = 18, ")"
+    LBRACE = 19, "{"
+    RBRACE = 20, "}"
+    LBRACKET = 21, '['
+    RBRACKET = 22, ']'
+
+    # Keywords
+    FUNCTION = 23, "GOLMAAL"
+    LET = 24, "MAAN_LE"
+    RETURN = 25, "YE_LO"
+    TRUE = 26, "TRUE"
+    FALSE = 27, "FALSE"
+    IF = 28, "IF"
+    ELSE = 29, "ELSE"
+    WHILE = 30, 'WHILE'
+
+
+@dataclass(slots=True)
 class Token:
     token_type: TokenType
     literal: str
+    # offset of the first character of the token in the source (-1 if unknown)
+    start: int = field(default=-1, compare=False, repr=False)
+    # INT tokens carry their value so the parser does not re-parse the literal
+    value: int | None = field(default=None, compare=False, repr=False)
+
+
+class LineIndex:
+    # Built once per source and only when a position has to be rendered;
+    # tokens themselves only carry their start offset.
+    def __init__(self, source: str):
+        self.line_starts: list[int] = [0]
+        pos = source.find('\n')
+        while pos != -1:
+            self.line_starts.append(pos + 1)
+            pos = source.find('\n', pos + 1)
+
+    def line_column(self, offset: int) -> tuple[int, int]:
+        line = bisect_right(self.line_starts, offset)
+        return line, offset - self.line_starts[line - 1] + 1
 
 @dataclass(frozen=True)
 class Constants:
-    ILLEGAL = "ILLEGAL"
-    EOF = "EOF"
+    ILLEGAL = TokenType.ILLEGAL
+    EOF = TokenType.EOF
 
     #Identifiers + literals
-    IDENT = "IDENT" # add, foobar, x, y, ...
-    INT = "INT" # 1343456
+    IDENT = TokenType.IDENT
+    INT = TokenType.INT
 
     # Operators
-    ASSIGN = "="
-    PLUS = "+"
-    ASTERISK = "*"
-    GT = ">"
-    LT = "<"
-    SLASH = "/"
-    MINUS = "-"
-    BANG = "!"
-    EQ = "=="
-    NOT_EQ = "!="
+    ASSIGN = TokenType.ASSIGN
+    PLUS = TokenType.PLUS
+    ASTERISK = TokenType.ASTERISK
+    GT = TokenType.GT
+    LT = TokenType.LT
+    SLASH = TokenType.SLASH
+    MINUS = TokenType.MINUS
+    BANG = TokenType.BANG
+    EQ = TokenType.EQ
+    NOT_EQ = TokenType.NOT_EQ
 
     # Delimiters
-    COMMA = ","
-    SEMICOLON = ";"
-    LPAREN = "("
-    RPAREN = ")"
-    LBRACE = "{"
-    RBRACE = "}"
-    LBRACKET = '['
-    RBRACKET = ']'
+    COMMA = TokenType.COMMA
+    SEMICOLON = TokenType.SEMICOLON
+    LPAREN = TokenType.LPAREN
+    RPAREN = TokenType.RPAREN
+    LBRACE = TokenType.LBRACE
+    RBRACE = TokenType.RBRACE
+    LBRACKET = TokenType.LBRACKET
+    RBRACKET = TokenType.RBRACKET
 
     # Keywords
-    FUNCTION = "GOLMAAL"
-    LET = "MAAN_LE"
-    RETURN = "YE_LO"
-    TRUE = "TRUE"
-    FALSE = "FALSE"
-    IF = "IF"
-    ELSE = "ELSE"
-    STRING = 'STRING'
-    WHILE = 'WHILE'
+    FUNCTION = TokenType.FUNCTION
+    LET = TokenType.LET
+    RETURN = TokenType.RETURN
+    TRUE = TokenType.TRUE
+    FALSE = TokenType.FALSE
+    IF = TokenType.IF
+    ELSE = TokenType.ELSE
+    STRING = TokenType.STRING
+    WHILE = TokenType.WHILE
+
+# indexable by type id, for compact (array backed) token streams
+token_types: list[TokenType] = list(TokenType)
 
 two_char_ops = {
     '==': Constants.EQ,
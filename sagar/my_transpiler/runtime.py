@@ -0,0 +1,183 @@
+from sagar.my_ast.ast import LazyBlockStatement
+from sagar.my_evaluator.evaluator import *
+from sagar.my_object.object import *
+
+# What the Python code made by transpiler.py runs against. The generated code is executed
+# with namespace() as its globals and no Python builtins, so it can only reach the names
+# below and the Environment it is given.
+
+
+class Halt(Exception):
+    # an ErrorObj ends the whole program in eval, so generated code raises it instead of
+    # returning it through every caller
+    def __init__(self, error: ErrorObj):
+        super().__init__(error.message)
+        self.error = error
+
+
+class TranspiledFunctionObj(FunctionObj):
+    # a function made by a transpiled function literal; prints as any other function
+    def __init__(self, compiled, env: Environment):
+        super().__init__(compiled.params, compiled.body, env, compiled.scope)
+        self.compiled = compiled
+
+
+def halt(message: str):
+    raise Halt(ErrorObj(message))
+
+
+def checked(res: Object) -> Object:
+    if isinstance(res, ErrorObj):
+        raise Halt(res)
+    return res
+
+
+def name_fallback(name: str) -> Object:
+    # a name the environments do not have
+    res = builtins.get(name, None)
+    if res:
+        return res
+    halt(f'identifier not found: {name}')
+
+
+def local_fallback(env: Environment, name: str) -> Object:
+    # a slot declared by the current call but not set yet is looked up further out
+    return env.outer.get(name) or name_fallback(name)
+
+
+def resolved(env: Environment, iden: ResolvedIdentifier) -> Object:
+    return checked(eval_resolved_identifier(iden, env))
+
+
+def infix(operator: str, left: Object, right: Object) -> Object:
+    return checked(eval_infix_expression(operator, left, right))
+
+
+def prefix(operator: str, right: Object) -> Object:
+    return checked(eval_prefix_expression(operator, right))
+
+
+def truth(condition: Object) -> BooleanObj:
+    return checked(get_truthy(condition))
+
+
+def if_test(condition: Object) -> bool:
+    # a non boolean if condition: it needs a truth value, but its own value decides, as
+    # in eval_if_expression
+    truth(condition)
+    return condition.value
+
+
+def check_array(arr: Object) -> ArrayObj:
+    if not isinstance(arr, ArrayObj):
+        halt(f'{arr.get_type()} cannot be subscripted')
+    return arr
+
+
+def index(arr: ArrayObj, i: Object) -> Object:
+    if not isinstance(i, IntegerObj):
+        halt(f'cannot index an array with non-integer types: {i.get_type()}')
+    elements = arr.elements
+    if i.value < 0 or i.value >= len(elements):
+        halt(f'Array index out of bounds for length {len(elements)}: {i.value}')
+    return elements[i.value]
+
+
+def assign_name(env: Environment, name: str, value: Object):
+    if not env.get(name):
+        halt(f'identifier not declared: {name}')
+    env.put(name, value)
+
+
+def assign_resolved(env: Environment, iden: ResolvedIdentifier, value: Object):
+    if not lookup_resolved(iden, env):
+        halt(f'identifier not declared: {iden.value}')
+    # written to the current environment, as eval_assignment does
+    if iden.slot == GLOBAL_SLOT:
+        env.put(iden.value, value)
+    else:
+        env.slots[iden.slot] = value
+
+
+def assign_other(env: Environment, left: Node, value: Object) -> Object:
+    return checked(eval_assignment(AssignmentObj(left, value), env))
+
+
+def shared_store(env: Environment, name: str, value: Object) -> Object:
+    env.store[name] = value
+    return value
+
+
+def fallback(node: Node, env: Environment) -> Object:
+    # a node the transpiler leaves to eval
+    return checked(eval(node, env))
+
+
+def call(fun: Object, args: list[Object], env: Environment) -> Object:
+    if type(fun) is TranspiledFunctionObj:
+        code = fun.compiled.code
+        if code is None:
+            code = fun.compiled.load()
+            if code is None:
+                halt(f"syntax error in function body: {'; '.join(fun.body.errors)}")
+        params = fun.params
+        if len(params) != len(args):
+            halt(f'expected {len(params)} arguments. but passed {len(args)}.')
+        extended_env = Environment(outer=fun.env, scope=fun.scope)
+        if fun.scope is not None:
+            slots = extended_env.slots
+            for param, arg in zip(params, args):
+                slots[param.slot] = arg
+        else:
+            for param, arg in zip(params, args):
+                extended_env.put(param.value, arg)
+        res = code(extended_env)
+        if type(res) is ReturnObj:
+            return res.value
+        return res
+
+    if isinstance(fun, Builtin):
+        return checked(fun.fn(args, env = env))
+
+    if isinstance(fun, FunctionObj):
+        # made by eval (a fallback node, or an earlier REPL line)
+        if isinstance(fun.body, LazyBlockStatement) and fun.body.parse() is None:
+            halt(f"syntax error in function body: {'; '.join(fun.body.errors)}")
+        extended_env = checked(get_extended_env(fun, args))
+        return checked(unwrap_return_value(eval_block_statements(fun.body.statements, env = extended_env)))
+
+    halt(f'not a function: {str(fun)}')
+
+
+def namespace() -> dict:
+    # globals of a transpiled module
+    return {
+        '__builtins__': {},
+        'type': type,
+        'IntegerObj': IntegerObj,
+        'BooleanObj': BooleanObj,
+        'ReturnObj': ReturnObj,
+        'ArrayObj': ArrayObj,
+        'BuiltinKeywordFunction': BuiltinKeywordFunction,
+        'TranspiledFunctionObj': TranspiledFunctionObj,
+        'integer_obj': integer_obj,
+        'TRUE_OBJ': TRUE_OBJ,
+        'FALSE_OBJ': FALSE_OBJ,
+        'NULL': NULL_OBJ,
+        'halt': halt,
+        'name_fallback': name_fallback,
+        'local_fallback': local_fallback,
+        'resolved': resolved,
+        'infix': infix,
+        'prefix': prefix,
+        'truth': truth,
+        'if_test': if_test,
+        'check_array': check_array,
+        'index': index,
+        'assign_name': assign_name,
+        'assign_resolved': assign_resolved,
+        'assign_other': assign_other,
+        'shared_store': shared_store,
+        'fallback': fallback,
+        'call': call,
+    }
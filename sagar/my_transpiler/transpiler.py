@@ -0,0 +1,434 @@
+import threading
+from collections import OrderedDict
+from sagar.my_ast.ast import *
+from sagar.my_ast.hashing import fingerprint
+from sagar.my_evaluator.evaluator import EvalConstants, builtins, eval
+from sagar.my_object.object import Environment, Object, ReturnObj, literal_obj
+from sagar.my_transpiler.runtime import Halt, namespace
+from typing import Callable
+
+# Transpiles a parsed (optionally optimized) program to Python source, compiles it with
+# compile() and runs the code object. Every Golmaal function body and every if branch of
+# more than one statement becomes a Python function of the Environment; expressions become
+# Python expressions with the integer fast paths written out, and everything else goes
+# through runtime.py, which uses the evaluator's functions. ye_lo, break and continue stay
+# values checked by the statements around them, as in eval. An ErrorObj is raised as Halt
+# and returned by run, since the first error ends the program.
+#
+# Golmaal names and strings only reach the source as Python string literals (repr), and
+# the code runs with runtime.namespace() as its globals, without Python's builtins.
+
+Code = Callable[[Environment], Object]
+
+# operator -> (Python operator on the two int values, format of the result object)
+int_operators = {
+    '+': ('+', 'integer_obj({})'),
+    '-': ('-', 'integer_obj({})'),
+    '*': ('*', 'integer_obj({})'),
+    '/': ('//', 'integer_obj({})'),
+    '<': ('<', '(TRUE_OBJ if {} else FALSE_OBJ)'),
+    '>': ('>', '(TRUE_OBJ if {} else FALSE_OBJ)'),
+    '==': ('==', '(TRUE_OBJ if {} else FALSE_OBJ)'),
+    '!=': ('!=', '(TRUE_OBJ if {} else FALSE_OBJ)'),
+}
+
+# expressions whose value is never a ReturnObj or a break or continue, so the statements
+# around them do not have to check it
+plain_values = (IntegerLiteral, StringExpression, Boolean, PrefixExpression, InfixExpression, ArrayLiteral, FunctionLiteral)
+
+LOOP_LIMIT_ERROR = 'Can only perform 1000 iterations currently'
+LOOP_RETURN_ERROR = 'cannot have a return statement inside a while function'
+
+
+class TranspiledBody:
+    # the Python function of a function literal's body, shared by every function object
+    # made from the literal; a lazily parsed body is parsed and transpiled on its first call
+    __slots__ = ('params', 'body', 'scope', 'code', 'name')
+
+    def __init__(self, literal: FunctionLiteral):
+        self.params = literal.parameters
+        self.body = literal.body
+        self.scope = literal.scope if isinstance(literal, ResolvedFunctionLiteral) else None
+        self.code: Code | None = None
+        # name of the function in the transpiled module, set once it is transpiled
+        self.name: str | None = None
+
+    def load(self) -> Code | None:
+        if self.code is None:
+            block = self.body.parse()
+            if block is None:
+                return None
+            transpiler = Transpiler()
+            name = transpiler.function(block.statements, 'f', block)
+            self.code = transpiler.load()[name]
+        return self.code
+
+
+class Transpiler:
+    def __init__(self):
+        # the module: one def per function, in no particular order
+        self.lines: list[str] = []
+        # name in the module -> constant object (literals, nodes left to eval, bodies)
+        self.constants: dict[str, object] = {}
+        self.constant_names: dict[tuple, str] = {}
+        self.bodies: list[TranspiledBody] = []
+        self.count = 0
+
+    def fresh(self, prefix: str) -> str:
+        self.count += 1
+        return f'{prefix}{self.count}'
+
+    def constant(self, kind: str, value, obj=None) -> str:
+        key = (kind, value) if kind != 'node' else (kind, id(value))
+        name = self.constant_names.get(key)
+        if name is None:
+            name = self.constant_names[key] = f'k{len(self.constants)}'
+            self.constants[name] = value if obj is None else obj
+        return name
+
+    def node_constant(self, node) -> str:
+        return self.constant('node', node)
+
+    def source(self) -> str:
+        return '\n'.join(self.lines) + '\n'
+
+    def load(self) -> dict:
+        # compile and run the module in a fresh namespace, which is returned
+        module = namespace()
+        module.update(self.constants)
+        exec(compile(self.source(), '<golmaal>', 'exec'), module)
+        for body in self.bodies:
+            body.code = module[body.name]
+        return module
+
+    def program(self, node: Program) -> str:
+        return self.function(node.statements, 'program', node)
+
+    def function(self, statements: list[Statement], prefix: str, node: Node | None = None) -> str:
+        # def of a function returning what eval_block_statements does for statements. eval
+        # of an empty block or program (node) fails; so does the function.
+        name = prefix if prefix == 'program' else self.fresh(prefix)
+        body: list[str] = []
+        if statements:
+            self.statements(statements, body, '    ')
+        else:
+            body.append(f'    return {self.fallback(node)}')
+        self.lines.append(f'def {name}(env):')
+        self.lines.extend(body)
+        return name
+
+    def statements(self, statements: list[Statement], lines: list[str], indent: str):
+        for statement in statements[:-1]:
+            if isinstance(statement, ReturnStatement):
+                # nothing after it runs
+                lines.append(f'{indent}return ReturnObj({self.expression(statement.value)})')
+                return
+            if isinstance(statement, ExpressionStatement) and isinstance(statement.expression, plain_values):
+                lines.append(f'{indent}{self.expression(statement.expression)}')
+            elif isinstance(statement, ExpressionStatement) or not self.statement(statement, lines, indent):
+                lines.append(f'{indent}r = {self.expression(statement)}')
+                lines.append(f'{indent}if type(r) is ReturnObj: return r')
+        last = statements[-1]
+        if isinstance(last, ReturnStatement):
+            lines.append(f'{indent}return ReturnObj({self.expression(last.value)})')
+        elif not isinstance(last, ExpressionStatement) and self.statement(last, lines, indent):
+            lines.append(f'{indent}return NULL')
+        else:
+            lines.append(f'{indent}return {self.expression(last)}')
+
+    def statement(self, node: Statement, lines: list[str], indent: str) -> bool:
+        # writes a let, assignment or while statement, whose value is null; False for
+        # anything else
+        if isinstance(node, LetStatement):
+            self.let_statement(node, lines, indent)
+        elif isinstance(node, AssignmentStatement):
+            self.assignment_statement(node, lines, indent)
+        elif isinstance(node, WhileStatement):
+            self.while_statement(node, lines, indent)
+        else:
+            return False
+        return True
+
+    def let_statement(self, node: LetStatement, lines: list[str], indent: str):
+        name = node.name
+        if name.value in builtins or not isinstance(node.value, Expression):
+            # errors only when it runs
+            lines.append(f'{indent}fallback({self.node_constant(node)}, env)')
+        elif isinstance(name, ResolvedIdentifier) and name.slot != GLOBAL_SLOT:
+            lines.append(f'{indent}env.slots[{name.slot}] = {self.expression(node.value)}')
+        else:
+            lines.append(f'{indent}env.put({name.value!r}, {self.expression(node.value)})')
+
+    def assignment_statement(self, node: AssignmentStatement, lines: list[str], indent: str):
+        left = node.left
+        right = self.expression(node.right)
+        if isinstance(left, ResolvedIdentifier) and left.depth == 0 and left.slot != GLOBAL_SLOT:
+            # declared by this call: set, or set further out (see lookup_resolved)
+            value = self.fresh('t')
+            lines.append(f'{indent}{value} = {right}')
+            lines.append(f'{indent}if env.slots[{left.slot}] is None and not env.outer.get({left.value!r}): halt({"identifier not declared: " + left.value!r})')
+            lines.append(f'{indent}env.slots[{left.slot}] = {value}')
+        elif isinstance(left, ResolvedIdentifier) and left.depth > 0:
+            lines.append(f'{indent}assign_resolved(env, {self.node_constant(left)}, {right})')
+        elif isinstance(left, Identifier):
+            # an unresolved identifier, or a global one used where it is declared
+            value = self.fresh('t')
+            lines.append(f'{indent}{value} = {right}')
+            lines.append(f'{indent}if not env.get({left.value!r}): halt({"identifier not declared: " + left.value!r})')
+            lines.append(f'{indent}env.put({left.value!r}, {value})')
+        else:
+            lines.append(f'{indent}assign_other(env, {self.node_constant(left)}, {right})')
+
+    def while_statement(self, node: WhileStatement, lines: list[str], indent: str):
+        # the condition is tested at the top, so continue tests it again; the counter is
+        # taken before the body, which eval does after it, to the same effect
+        left = self.fresh('n')
+        test = self.fresh('t')
+        inner = indent + '    '
+        lines.append(f'{indent}{left} = 1000')
+        lines.append(f'{indent}while True:')
+        lines.append(f'{inner}if not ({test}.value if type({test} := {self.expression(node.condition)}) is BooleanObj else truth({test}).value): break')
+        lines.append(f'{inner}if {left} == 0: halt({LOOP_LIMIT_ERROR!r})')
+        lines.append(f'{inner}{left} -= 1')
+        for statement in node.body.statements:
+            if isinstance(statement, ReturnStatement):
+                lines.append(f'{inner}{self.expression(statement.value)}')
+                lines.append(f'{inner}halt({LOOP_RETURN_ERROR!r})')
+                # nothing after it runs
+                return
+            if isinstance(statement, ExpressionStatement) and isinstance(statement.expression, plain_values):
+                lines.append(f'{inner}{self.expression(statement.expression)}')
+            elif isinstance(statement, ExpressionStatement) or not self.statement(statement, lines, inner):
+                lines.append(f'{inner}s = {self.expression(statement)}')
+                lines.append(f'{inner}if type(s) is ReturnObj: halt({LOOP_RETURN_ERROR!r})')
+                lines.append(f'{inner}if type(s) is BuiltinKeywordFunction:')
+                lines.append(f"{inner}    if s.name == 'break': break")
+                lines.append(f'{inner}    continue')
+
+    def expression(self, node: Node) -> str:
+        method = methods.get(type(node))
+        if method is None:
+            method = method_for(type(node))
+        return method(self, node)
+
+    def fallback(self, node: Node) -> str:
+        return f'fallback({self.node_constant(node)}, env)'
+
+    def expression_statement(self, node: ExpressionStatement) -> str:
+        return self.expression(node.expression)
+
+    def block(self, node: BlockStatement) -> str:
+        statements = node.statements
+        if not statements:
+            # eval of an empty block fails; so does this
+            return self.fallback(node)
+        if len(statements) == 1 and isinstance(statements[0], ExpressionStatement):
+            return self.expression(statements[0].expression)
+        if len(statements) == 1 and isinstance(statements[0], ReturnStatement):
+            return f'ReturnObj({self.expression(statements[0].value)})'
+        return f"{self.function(statements, 'b')}(env)"
+
+    def integer_literal(self, node: IntegerLiteral) -> str:
+        return self.constant('int', node.value, literal_obj(node))
+
+    def string_expression(self, node: StringExpression) -> str:
+        return self.constant('string', node.value, literal_obj(node))
+
+    def boolean(self, node: Boolean) -> str:
+        obj = EvalConstants.TRUE_BOOLEAN_OBJ if node.value else EvalConstants.FALSE_BOOLEAN_OBJ
+        return self.constant('bool', node.value, obj)
+
+    def prefix(self, node: PrefixExpression) -> str:
+        right = self.expression(node.right)
+        if node.operator == '-':
+            value = self.fresh('t')
+            return f"(integer_obj(-{value}.value) if type({value} := {right}) is IntegerObj else prefix('-', {value}))"
+        return f'prefix({node.operator!r}, {right})'
+
+    def infix(self, node: InfixExpression) -> str:
+        left = self.expression(node.left)
+        right = self.expression(node.right)
+        operator = int_operators.get(node.operator)
+        if operator is None:
+            return f'infix({node.operator!r}, {left}, {right})'
+        op, result = operator
+        a = self.fresh('t')
+        if isinstance(node.right, IntegerLiteral):
+            # the right side is a constant: only the left one needs a type test
+            value = result.format(f'{a}.value {op} {node.right.value!r}')
+            return f'({value} if type({a} := {left}) is IntegerObj else infix({node.operator!r}, {a}, {right}))'
+        b = self.fresh('t')
+        value = result.format(f'{a}.value {op} {b}.value')
+        # & rather than and: both sides are evaluated, in order, whatever their types
+        return f'({value} if (type({a} := {left}) is IntegerObj) & (type({b} := {right}) is IntegerObj) else infix({node.operator!r}, {a}, {b}))'
+
+    def if_expression(self, node: IfExpression) -> str:
+        condition = self.fresh('t')
+        # an if decides on its condition's own value once it has a truth value (if_test)
+        test = f'({condition}.value if type({condition} := {self.expression(node.condition)}) is BooleanObj else if_test({condition}))'
+        alternative = self.expression(node.alternative) if node.alternative else 'NULL'
+        return f'({self.expression(node.consequence)} if {test} else {alternative})'
+
+    def return_statement(self, node: ReturnStatement) -> str:
+        return f'ReturnObj({self.expression(node.value)})'
+
+    def identifier(self, node: Identifier) -> str:
+        return f'(env.get({node.value!r}) or name_fallback({node.value!r}))'
+
+    def resolved_identifier(self, node: ResolvedIdentifier) -> str:
+        if node.slot == GLOBAL_SLOT:
+            env = 'env' + '.outer' * node.depth
+            return f'({env}.get({node.value!r}) or name_fallback({node.value!r}))'
+        if node.depth == 0:
+            return f'(env.slots[{node.slot}] or local_fallback(env, {node.value!r}))'
+        return f'resolved(env, {self.node_constant(node)})'
+
+    def function_literal(self, node: FunctionLiteral) -> str:
+        body = TranspiledBody(node)
+        if not isinstance(node.body, LazyBlockStatement):
+            body.name = self.function(node.body.statements, 'f', node.body)
+            self.bodies.append(body)
+        return f'TranspiledFunctionObj({self.node_constant(body)}, env)'
+
+    def call_expression(self, node: CallExpression) -> str:
+        arguments = ', '.join(self.expression(argument) for argument in node.arguments)
+        return f'call({self.expression(node.function)}, [{arguments}], env)'
+
+    def array_literal(self, node: ArrayLiteral) -> str:
+        return f"ArrayObj([{', '.join(self.expression(element) for element in node.elements)}])"
+
+    def index_expression(self, node: IndexExpression) -> str:
+        # the left side is checked before the index is evaluated, as in eval_index_operation
+        return f'index(check_array({self.expression(node.left)}), {self.expression(node.index)})'
+
+    def shared_expression(self, node: SharedExpression) -> str:
+        if node.first:
+            return f'shared_store(env, {node.name!r}, {self.expression(node.value)})'
+        # the first occurrence may not have run in this environment
+        return f'(env.store.get({node.name!r}) or {self.expression(node.value)})'
+
+
+def method_for(cls: type) -> Callable[[Transpiler, Node], str]:
+    # the nearest base class with a method, cached; eval runs anything else
+    method = Transpiler.fallback
+    for base in cls.__mro__:
+        if base in methods:
+            method = methods[base]
+            break
+    methods[cls] = method
+    return method
+
+
+# node class -> Transpiler method writing the Python expression for it
+methods: dict[type, Callable[[Transpiler, Node], str]] = {
+    ExpressionStatement: Transpiler.expression_statement,
+    IntegerLiteral: Transpiler.integer_literal,
+    Boolean: Transpiler.boolean,
+    PrefixExpression: Transpiler.prefix,
+    InfixExpression: Transpiler.infix,
+    BlockStatement: Transpiler.block,
+    IfExpression: Transpiler.if_expression,
+    ReturnStatement: Transpiler.return_statement,
+    ResolvedIdentifier: Transpiler.resolved_identifier,
+    Identifier: Transpiler.identifier,
+    FunctionLiteral: Transpiler.function_literal,
+    CallExpression: Transpiler.call_expression,
+    StringExpression: Transpiler.string_expression,
+    ArrayLiteral: Transpiler.array_literal,
+    IndexExpression: Transpiler.index_expression,
+    SharedExpression: Transpiler.shared_expression,
+}
+
+
+class CodeCache:
+    # LRU cache of transpiled programs keyed by program fingerprint, so a program is only
+    # transpiled and compiled once, however it is formatted. Resolved and optimized
+    # programs share the fingerprint of the program they were made from, and run the same.
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.entries: OrderedDict[str, Code] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Code | None:
+        with self.lock:
+            res = self.entries.get(key)
+            if res is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return res
+
+    def put(self, key: str, code: Code):
+        if self.max_entries <= 0:
+            return
+        with self.lock:
+            self.entries[key] = code
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+            }
+
+
+code_cache = CodeCache()
+
+
+def transpile(program: Program) -> str:
+    # the Python source of a program, for reading
+    transpiler = Transpiler()
+    transpiler.program(program)
+    return transpiler.source()
+
+
+def compile_program(program: Program, cache: CodeCache | None = code_cache) -> Code:
+    # the program's Python function, from the cache if it has been transpiled before
+    key = None
+    if cache is not None:
+        try:
+            key = fingerprint(program)
+        except ValueError:
+            # a node the hash does not know; transpiled every time
+            pass
+    if key is not None:
+        code = cache.get(key)
+        if code is not None:
+            return code
+    transpiler = Transpiler()
+    name = transpiler.program(program)
+    code = transpiler.load()[name]
+    if key is not None:
+        cache.put(key, code)
+    return code
+
+
+def run(program: Node, env: Environment) -> Object:
+    # the python backend: transpile, then run, returning what eval(program, env) would
+    if not isinstance(program, Program):
+        return eval(program, env)
+    try:
+        code = compile_program(program)
+    except (RecursionError, SyntaxError, MemoryError):
+        # too deeply nested to transpile or for Python to compile (it limits nested
+        # blocks and parentheses); eval reports it the way it always has
+        return eval(program, env)
+    try:
+        res = code(env)
+    except Halt as halt:
+        return halt.error
+    if type(res) is ReturnObj:
+        return res.value
+    return res
@@ -0,0 +1,117 @@
+import unittest
+from sagar.my_ast.ast import *
+from sagar.my_evaluator import evaluator_test
+from sagar.my_evaluator.backends import get_backend, PYTHON_BACKEND
+from sagar.my_evaluator.closures_test import outcome
+from sagar.my_evaluator.evaluator import eval
+from sagar.my_object.object import *
+from sagar.my_optimizer.passes import optimize
+from sagar.my_optimizer.resolver_test import parse
+from sagar.my_parser.parser import IterativeParser
+from sagar.my_transpiler.runtime import TranspiledFunctionObj
+from sagar.my_transpiler.transpiler import run, transpile, compile_program, CodeCache
+
+
+class TestTranspiledEvaluator(evaluator_test.TestEvaluator):
+    # the whole evaluator suite, run as Python code
+
+    def evaluate(self, program: Node, env: Environment) -> Object:
+        return run(program, env)
+
+
+class TestTranspiler(unittest.TestCase):
+
+    def test_value_quirks(self):
+        # ye_lo, break and continue are values the surrounding statements look at
+        inps = [
+            ('maan_le x = if (true) { ye_lo 5; }; print(x); x + 1;', 'type mismatch: RETURN_VALUE + INTEGER', ['5']),
+            ('maan_le b = break; maan_le i = 0; while (i < 5) { i = i + 1; b; } print(i);', None, ['1']),
+            ('maan_le f = golmaal() { continue }; maan_le i = 0; while (i < 3) { i = i + 1; f(); print(i); } print(i);', None, ['3']),
+            ('maan_le i = 0; while (i < 3) { if (i == 1) { ye_lo i; } i = i + 1; }', 'cannot have a return statement inside a while function', []),
+            ('print(if (true) { ye_lo 1; 2 }, break);', None, ['1Builtin Keyword Function: break']),
+            ('maan_le f = golmaal() { maan_le x = 1; x; ye_lo 2; }; maan_le g = golmaal() { maan_le y = if (true) { ye_lo 3; }; y; 4 }; print(f(), g());', None, ['23']),
+        ]
+        for i, (inp, error, exp) in enumerate(inps):
+            for program in [parse(inp), optimize(parse(inp))]:
+                env = Environment(print_statements=[])
+                res = run(program, env)
+                if error is None:
+                    self.assertTrue(not isinstance(res, ErrorObj), f'{i}: res = {res}')
+                else:
+                    self.assertTrue(isinstance(res, ErrorObj) and res.message == error, f'{i}: res = {res}')
+                self.assertTrue(env.print_statements == exp, f'{i}: env.print_statements = {env.print_statements} != {exp}')
+
+    def test_exceptions(self):
+        inps = [
+            ('1 / 0', 'ZeroDivisionError'),
+            ('maan_le z = 0; 1 / z', 'ZeroDivisionError'),
+            ('', 'UnboundLocalError'),
+            ('if (true) { }', 'UnboundLocalError'),
+            ('maan_le f = golmaal() { }; f();', 'UnboundLocalError'),
+            ('maan_le n = if (false) { 1 }; if (n) { 2 }', 'AttributeError'),
+        ]
+        for i, (inp, exp) in enumerate(inps):
+            res = outcome(run, parse(inp))
+            self.assertTrue(res[0] == exp and res == outcome(eval, parse(inp)), f'{i}: {res}')
+
+    def test_sandbox(self):
+        # names and strings of the program only reach the generated code as literals
+        source = 'maan_le env = "\')\\nhalt(\'x"; maan_le type = golmaal(env, halt) { ye_lo halt + env; }; print(type(1, env));'
+        for program in [parse(source), optimize(parse(source))]:
+            res = outcome(run, program)
+            self.assertTrue(res == outcome(eval, program) and res[2] == ["')\\nhalt('x1"], f'res = {res}')
+        code = compile_program(parse('1;'), cache=None)
+        self.assertTrue(code.__globals__['__builtins__'] == {}, 'the generated code can reach Python builtins')
+
+    def test_cache(self):
+        cache = CodeCache(max_entries=2)
+        first = compile_program(parse('maan_le a = 1; print(a + 2);'), cache=cache)
+        again = compile_program(parse('maan_le a = 1;\nprint((a + 2));'), cache=cache)
+        self.assertTrue(first is again, 'the same program formatted differently was transpiled twice')
+        compile_program(parse('1;'), cache=cache)
+        compile_program(parse('2;'), cache=cache)
+        stats = cache.stats()
+        self.assertTrue(stats['hits'] == 1 and stats['misses'] == 3 and stats['entries'] == 2, f'stats = {stats}')
+        env = Environment(print_statements=[])
+        again(env)
+        self.assertTrue(env.print_statements == ['3'], f'env.print_statements = {env.print_statements}')
+
+        # the same values, printed differently as part of a function
+        for source, exp in [('print(golmaal() { 007 });', ['golmaal (  ) { 007 }']), ('print(golmaal() { 7 });', ['golmaal (  ) { 7 }'])]:
+            env = Environment(print_statements=[])
+            compile_program(optimize(parse(source)), cache=cache)(env)
+            self.assertTrue(env.print_statements == exp, f'{source}: env.print_statements = {env.print_statements}')
+
+    def test_recursion(self):
+        source = 'maan_le fib = golmaal(n) { if (n < 2) { ye_lo n; } ye_lo fib(n - 1) + fib(n - 2); }; fib(15);'
+        for program in [parse(source), optimize(parse(source))]:
+            res = run(program, Environment(print_statements=[]))
+            self.assertTrue(isinstance(res, IntegerObj) and res.value == 610, f'res = {res}')
+
+    def test_functions_between_backends(self):
+        env = Environment(print_statements=[])
+        eval(parse('maan_le f = golmaal(x) { ye_lo x + 1; };'), env)
+        run(parse('maan_le g = golmaal(x) { ye_lo f(x) * 2; }; print(g(1));'), env)
+        self.assertTrue(isinstance(env.get('g'), TranspiledFunctionObj), f'g is a {type(env.get("g"))}')
+        eval(parse('print(g(2));'), env)
+        self.assertTrue(env.print_statements == ['4', '6'], f'env.print_statements = {env.print_statements}')
+
+    def test_lazy_bodies(self):
+        source = 'maan_le bad = golmaal(a) { maan_le = 1; }; maan_le ok = golmaal(a) { ye_lo a * 2; }; print(ok(2)); bad(1, 2);'
+        program = parse(source, lazy_functions=True)
+        res = outcome(run, program)
+        self.assertTrue(res == outcome(eval, program) and res[1].startswith('Error: syntax error in function body'), f'res = {res}')
+
+    def test_deep_program(self):
+        # too deep to transpile, or for Python to compile: eval runs it
+        deep_loops = 'maan_le i = 0; ' + 'while (i < 1) { ' * 25 + 'i = 1;' + ' }' * 25
+        for source in ['-' * 5000 + '1;', '(1 + ' * 300 + '1' + ')' * 300 + ';', deep_loops]:
+            program = parse(source, parser_cls=IterativeParser)
+            self.assertTrue(outcome(run, program) == outcome(eval, program), f'a program too deep to compile behaved differently: {source[:20]}')
+
+    def test_backend(self):
+        self.assertTrue(get_backend(PYTHON_BACKEND) is run, 'python backend not registered')
+
+
+if __name__ == '__main__':
+    unittest.main()
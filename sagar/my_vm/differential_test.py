@@ -0,0 +1,202 @@
+import random
+import unittest
+from sagar.my_ast.ast import Node
+from sagar.my_evaluator.closures_test import outcome
+from sagar.my_evaluator.backends import BACKENDS, TREE_BACKEND
+from sagar.my_optimizer.cse_test import PROGRAMS
+from sagar.my_optimizer.passes import optimize
+from sagar.my_optimizer.resolver_test import parse
+
+# Differential tests: every backend has to return and print what eval does, on the
+# programs of the optimizer tests and on generated ones. The evaluator's own tests run
+# on every backend through TestEvaluator subclasses (closures_test, vm_test).
+
+OPERATORS = ['+', '-', '*', '/', '<', '>', '==', '!=']
+
+
+class ProgramGenerator:
+    # Random Golmaal programs mixing every construct, including runtime errors and the
+    # evaluator's odd corners (ye_lo, break and continue used as values, assignments to
+    # outer names from a function). Most expressions are built to be integers, so most
+    # programs run a while before an error, if any. Functions only call functions defined
+    # before them, so nothing recurses deeper than the evaluator can.
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.count = 0
+        # (name, holds an integer) visible where code is being generated, innermost last
+        self.scopes: list[list[tuple[str, bool]]] = [[]]
+        self.functions: list[tuple[str, int]] = []
+        self.arrays: list[str] = []
+
+    def fresh(self, prefix: str) -> str:
+        self.count += 1
+        return f'{prefix}{self.count}'
+
+    def names(self, integers: bool = False) -> list[str]:
+        return [name for scope in self.scopes for name, integer in scope if integer or not integers]
+
+    def declare(self, name: str, integer: bool):
+        self.scopes[-1].append((name, integer))
+
+    def program(self, statements: int) -> str:
+        return '\n'.join(self.statement(0, False) for _ in range(statements))
+
+    def statement(self, depth: int, in_loop: bool) -> str:
+        rng = self.rng
+        kind = rng.choice(['let', 'let', 'assign', 'assign', 'print', 'print', 'if', 'while', 'function', 'array', 'expression'])
+        if depth >= 2 and kind in ('if', 'while', 'function'):
+            kind = 'print'
+        if kind == 'assign' and self.names(integers=True) and rng.random() < 0.8:
+            return f'{rng.choice(self.names(integers=True))} = {self.number(0)};'
+        if kind == 'assign' and self.names():
+            return f'{rng.choice(self.names())} = {self.expression(0)};'
+        if kind in ('let', 'assign'):
+            name = self.fresh('v')
+            integer = rng.random() < 0.7
+            res = f'maan_le {name} = {self.number(0) if integer else self.expression(0)};'
+            self.declare(name, integer)
+            return res
+        if kind == 'print':
+            return f"print({', '.join(self.expression(0) for _ in range(rng.randint(1, 3)))});"
+        if kind == 'if':
+            res = f'if ({self.condition()}) {{ {self.block(depth + 1, in_loop)} }}'
+            if rng.random() < 0.5:
+                res += f' else {{ {self.block(depth + 1, in_loop)} }}'
+            # without the semicolon a following [ or ( would index or call the if
+            return res + ';'
+        if kind == 'while':
+            counter = self.fresh('c')
+            self.declare(counter, True)
+            limit = rng.randint(0, 6) if rng.random() < 0.97 else 2000
+            body = self.block(depth + 1, True)
+            stop = f'if ({self.condition()}) {{ {rng.choice(["break;", "continue;", "print(" + counter + ");"])} }};'
+            return f'maan_le {counter} = 0; while ({counter} < {limit}) {{ {counter} = {counter} + 1; {body} {stop} }}'
+        if kind == 'function':
+            name = self.fresh('f')
+            params = [self.fresh('p') for _ in range(rng.randint(0, 2))]
+            self.scopes.append([(param, True) for param in params])
+            body = self.block(depth + 1, False)
+            returned = self.number(0) if rng.random() < 0.8 else self.expression(0)
+            self.scopes.pop()
+            self.functions.append((name, len(params)))
+            self.declare(name, False)
+            return f"maan_le {name} = golmaal({', '.join(params)}) {{ {body} ye_lo {returned}; }};"
+        if kind == 'array':
+            name = self.fresh('a')
+            elements = ', '.join(self.number(1) if rng.random() < 0.7 else self.expression(1) for _ in range(rng.randint(0, 4)))
+            self.declare(name, False)
+            self.arrays.append(name)
+            return f'maan_le {name} = [{elements}];'
+        return f'{self.expression(0)};'
+
+    def block(self, depth: int, in_loop: bool) -> str:
+        statements = [self.statement(depth, in_loop) for _ in range(self.rng.randint(0, 3))]
+        if in_loop and self.rng.random() < 0.2:
+            statements.append(self.rng.choice(['break;', 'continue;']))
+        if self.rng.random() < 0.05:
+            statements.append(f'ye_lo {self.number(1)};')
+        # an empty block is an error in the evaluator; keep most blocks from being one
+        return ' '.join(statements) or '0;'
+
+    def condition(self) -> str:
+        if self.rng.random() < 0.85:
+            return f"({self.number(1)} {self.rng.choice(['<', '>', '==', '!='])} {self.number(1)})"
+        return self.expression(1)
+
+    def number(self, depth: int) -> str:
+        # an expression that is an integer, unless a name was assigned something else
+        rng = self.rng
+        if depth >= 3:
+            names = self.names(integers=True)
+            return rng.choice(names) if names and rng.random() < 0.6 else str(rng.randint(0, 12))
+        kind = rng.choice(['atom', 'atom', 'arithmetic', 'arithmetic', 'divide', 'minus', 'call', 'len', 'index', 'if'])
+        if kind == 'arithmetic':
+            return f"({self.number(depth + 1)} {rng.choice(['+', '-', '*'])} {self.number(depth + 1)})"
+        if kind == 'divide':
+            return f'({self.number(depth + 1)} / {rng.randint(1, 4)})'
+        if kind == 'minus':
+            return f'-{self.number(depth + 1)}'
+        if kind == 'call' and self.functions:
+            name, arity = rng.choice(self.functions)
+            return f"{name}({', '.join(self.number(depth + 1) for _ in range(arity))})"
+        if kind == 'len' and self.arrays:
+            return f'len({rng.choice(self.arrays)})'
+        if kind == 'index' and self.arrays:
+            array = rng.choice(self.arrays)
+            return f'{array}[{rng.randint(0, 2)}]'
+        if kind == 'if':
+            return f'if ({self.condition()}) {{ {self.number(depth + 1)} }} else {{ {self.number(depth + 1)} }}'
+        return self.number(3)
+
+    def expression(self, depth: int) -> str:
+        rng = self.rng
+        if depth >= 3:
+            return self.atom()
+        kind = rng.choice(['number', 'number', 'atom', 'atom', 'infix', 'infix', 'prefix', 'call', 'index', 'len', 'if', 'array'])
+        if kind == 'number':
+            return self.number(depth)
+        if kind == 'infix':
+            return f'({self.expression(depth + 1)} {rng.choice(OPERATORS)} {self.expression(depth + 1)})'
+        if kind == 'prefix':
+            return f"{rng.choice(['-', '!'])}{self.expression(depth + 1)}"
+        if kind == 'call' and self.functions:
+            name, arity = rng.choice(self.functions)
+            if rng.random() < 0.05:
+                arity += 1
+            return f"{name}({', '.join(self.expression(depth + 1) for _ in range(arity))})"
+        if kind == 'index' and self.arrays:
+            return f'{rng.choice(self.arrays)}[{self.expression(depth + 1)}]'
+        if kind == 'len':
+            target = rng.choice(self.arrays) if self.arrays and rng.random() < 0.7 else rng.choice(['"a"', '"bc"', self.expression(depth + 1)])
+            return f'len({target})'
+        if kind == 'if':
+            consequence = rng.choice([self.expression(depth + 1), f'ye_lo {self.expression(depth + 1)};', 'break', 'continue'])
+            return f'if ({self.condition()}) {{ {consequence} }} else {{ {self.expression(depth + 1)} }}'
+        if kind == 'array':
+            return f"[{', '.join(self.expression(depth + 1) for _ in range(rng.randint(0, 3)))}]"
+        return self.atom()
+
+    def atom(self) -> str:
+        rng = self.rng
+        names = self.names()
+        kind = rng.random()
+        if kind < 0.45 and names:
+            return rng.choice(names)
+        if kind < 0.8:
+            return str(rng.randint(0, 12))
+        if kind < 0.88:
+            return rng.choice(['"a"', '"bc"', '""'])
+        if kind < 0.98:
+            return rng.choice(['true', 'false'])
+        return 'undeclared'
+
+
+def variants(source: str) -> list[tuple[str, Node]]:
+    # the program as parsed, optimized, and with lazily parsed function bodies
+    program = parse(source)
+    return [('parsed', program), ('optimized', optimize(program)), ('lazy', optimize(parse(source, lazy_functions=True)))]
+
+
+class TestDifferential(unittest.TestCase):
+
+    def check(self, source: str, label: str):
+        tree = BACKENDS[TREE_BACKEND]
+        for variant, program in variants(source):
+            expected = outcome(tree, program)
+            for name, backend in BACKENDS.items():
+                res = outcome(backend, program)
+                self.assertTrue(res == expected, f'{label} {variant} on {name}: {source!r}\n{res}\n!= {expected}')
+
+    def test_optimizer_programs(self):
+        for i, source in enumerate(PROGRAMS):
+            self.check(source, f'program {i}')
+
+    def test_generated_programs(self):
+        rng = random.Random(2024)
+        for i in range(250):
+            source = ProgramGenerator(rng).program(rng.randint(3, 10))
+            self.check(source, f'generated {i}')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,390 @@
+from operator import add, sub, mul, floordiv, lt, gt, eq, ne
+from sagar.my_ast.ast import *
+from sagar.my_compiler.code import Opcode, Bytecode
+from sagar.my_compiler.compiler import FunctionCode, compile_program
+from sagar.my_evaluator.evaluator import *
+from sagar.my_object.object import *
+
+# Stack VM for the bytecode of sagar/my_compiler. Frames keep the evaluator's
+# Environment objects, so names, slots, shadowing assignments and print capture work as
+# they do in eval. An error ends the program in the evaluator (every node hands an error
+# straight back), so the VM stops at the first ErrorObj and returns it.
+
+# Golmaal calls no deeper than this; eval is limited by Python's recursion limit, which
+# it reaches after about a hundred calls
+MAX_FRAMES = 1000
+
+CONSTANT = Opcode.CONSTANT.value
+NULL = Opcode.NULL.value
+POP = Opcode.POP.value
+GET_NAME = Opcode.GET_NAME.value
+GET_LOCAL = Opcode.GET_LOCAL.value
+GET_RESOLVED = Opcode.GET_RESOLVED.value
+LET_NAME = Opcode.LET_NAME.value
+LET_SLOT = Opcode.LET_SLOT.value
+ASSIGN_NAME = Opcode.ASSIGN_NAME.value
+ASSIGN_RESOLVED = Opcode.ASSIGN_RESOLVED.value
+ASSIGN_OTHER = Opcode.ASSIGN_OTHER.value
+ADD = Opcode.ADD.value
+NOT_EQ = Opcode.NOT_EQ.value
+INFIX = Opcode.INFIX.value
+MINUS = Opcode.MINUS.value
+BANG = Opcode.BANG.value
+PREFIX = Opcode.PREFIX.value
+JUMP = Opcode.JUMP.value
+JUMP_IF_FALSE = Opcode.JUMP_IF_FALSE.value
+JUMP_IF_RETURN = Opcode.JUMP_IF_RETURN.value
+LOOP_START = Opcode.LOOP_START.value
+LOOP_TEST = Opcode.LOOP_TEST.value
+LOOP_BODY = Opcode.LOOP_BODY.value
+LOOP_NEXT = Opcode.LOOP_NEXT.value
+LOOP_END = Opcode.LOOP_END.value
+MAKE_FUNCTION = Opcode.MAKE_FUNCTION.value
+CALL = Opcode.CALL.value
+RETURN_OBJ = Opcode.RETURN_OBJ.value
+RETURN = Opcode.RETURN.value
+ARRAY = Opcode.ARRAY.value
+CHECK_INDEXABLE = Opcode.CHECK_INDEXABLE.value
+INDEX = Opcode.INDEX.value
+SHARED_STORE = Opcode.SHARED_STORE.value
+SHARED_LOAD = Opcode.SHARED_LOAD.value
+EVAL = Opcode.EVAL.value
+
+# ADD .. NOT_EQ - ADD -> (function on the int values, function making the result, operator)
+binary_operations = (
+    (add, integer_obj, '+'),
+    (sub, integer_obj, '-'),
+    (mul, integer_obj, '*'),
+    (floordiv, integer_obj, '/'),
+    (lt, boolean_obj, '<'),
+    (gt, boolean_obj, '>'),
+    (eq, boolean_obj, '=='),
+    (ne, boolean_obj, '!='),
+)
+
+
+class VMFunctionObj(FunctionObj):
+    # a function made by MAKE_FUNCTION; prints as any other function
+    def __init__(self, code: FunctionCode, env: Environment):
+        super().__init__(code.params, code.body, env, code.scope)
+        self.code = code
+
+
+def run(program: Node, env: Environment) -> Object:
+    # the VM backend: compile, then execute, returning what eval(program, env) would
+    try:
+        bytecode = compile_program(program)
+    except RecursionError:
+        # too deeply nested to compile; eval reports it the way it always has
+        return eval(program, env)
+    return execute(bytecode, env)
+
+
+def execute(bytecode: Bytecode, env: Environment, max_frames: int = MAX_FRAMES) -> Object:
+    code = bytecode.instructions
+    constants = bytecode.constants
+    ip = 0
+    stack: list = []
+    push = stack.append
+    pop = stack.pop
+    # (instructions, constants, return position, environment) of the callers
+    frames: list[tuple] = []
+
+    while True:
+        op = code[ip]
+
+        if op == CONSTANT:
+            push(constants[code[ip + 1]])
+            ip += 2
+
+        elif op == GET_LOCAL:
+            res = env.slots[code[ip + 1]]
+            if res is None:
+                # declared in this scope but not set yet, so it is looked up further out
+                name = constants[code[ip + 2]]
+                res = env.outer.get(name)
+                if not res:
+                    res = builtins.get(name, None)
+                    if not res:
+                        return ErrorObj(f'identifier not found: {name}')
+            push(res)
+            ip += 3
+
+        elif ADD <= op <= NOT_EQ:
+            right = pop()
+            left = stack[-1]
+            fn, result, operator = binary_operations[op - ADD]
+            if type(left) is IntegerObj and type(right) is IntegerObj:
+                stack[-1] = result(fn(left.value, right.value))
+            else:
+                res = eval_infix_expression(operator, left, right)
+                if isinstance(res, ErrorObj):
+                    return res
+                stack[-1] = res
+            ip += 1
+
+        elif op == JUMP_IF_RETURN:
+            if isinstance(stack[-1], ReturnObj):
+                ip = code[ip + 1]
+            else:
+                pop()
+                ip += 2
+
+        elif op == GET_NAME:
+            name = constants[code[ip + 1]]
+            res = env.get(name)
+            if not res:
+                res = builtins.get(name, None)
+                if not res:
+                    return ErrorObj(f'identifier not found: {name}')
+            push(res)
+            ip += 2
+
+        elif op == JUMP_IF_FALSE:
+            condition = pop()
+            if type(condition) is not BooleanObj:
+                truthy = get_truthy(condition)
+                if isinstance(truthy, ErrorObj):
+                    return truthy
+            # the condition's own value decides, as in eval_if_expression
+            if condition.value:
+                ip += 2
+            else:
+                ip = code[ip + 1]
+
+        elif op == JUMP:
+            ip = code[ip + 1]
+
+        elif op == CALL:
+            argc = code[ip + 1]
+            if argc:
+                args = stack[-argc:]
+                del stack[-argc:]
+            else:
+                args = []
+            fun = pop()
+            if type(fun) is VMFunctionObj:
+                body = fun.code.bytecode
+                if body is None:
+                    body = fun.code.load()
+                    if body is None:
+                        return ErrorObj(f"syntax error in function body: {'; '.join(fun.body.errors)}")
+                params = fun.params
+                if len(params) != len(args):
+                    return ErrorObj(f'expected {len(params)} arguments. but passed {len(args)}.')
+                extended_env = Environment(outer=fun.env, scope=fun.scope)
+                if fun.scope is not None:
+                    slots = extended_env.slots
+                    for param, arg in zip(params, args):
+                        slots[param.slot] = arg
+                else:
+                    for param, arg in zip(params, args):
+                        extended_env.put(param.value, arg)
+                if len(frames) >= max_frames:
+                    raise RecursionError('maximum recursion depth exceeded')
+                frames.append((code, constants, ip + 2, env))
+                code = body.instructions
+                constants = body.constants
+                env = extended_env
+                ip = 0
+                continue
+            res = call_other(fun, args, env)
+            if isinstance(res, ErrorObj):
+                return res
+            push(res)
+            ip += 2
+
+        elif op == RETURN:
+            res = pop()
+            if isinstance(res, ReturnObj):
+                res = res.value
+            if not frames:
+                return res
+            code, constants, ip, env = frames.pop()
+            push(res)
+
+        elif op == LET_SLOT:
+            env.slots[code[ip + 1]] = pop()
+            push(NULL_OBJ)
+            ip += 2
+
+        elif op == LET_NAME:
+            env.put(constants[code[ip + 1]], pop())
+            push(NULL_OBJ)
+            ip += 2
+
+        elif op == ASSIGN_RESOLVED:
+            iden = constants[code[ip + 1]]
+            value = pop()
+            if not lookup_resolved(iden, env):
+                return ErrorObj(f'identifier not declared: {iden.value}')
+            # written to the current environment, as eval_assignment does
+            if iden.slot == GLOBAL_SLOT:
+                env.put(iden.value, value)
+            else:
+                env.slots[iden.slot] = value
+            push(EvalConstants.NULL_OBJ)
+            ip += 2
+
+        elif op == ASSIGN_NAME:
+            name = constants[code[ip + 1]]
+            value = pop()
+            if not env.get(name):
+                return ErrorObj(f'identifier not declared: {name}')
+            env.put(name, value)
+            push(EvalConstants.NULL_OBJ)
+            ip += 2
+
+        elif op == LOOP_TEST:
+            truthy = get_truthy(pop())
+            if isinstance(truthy, ErrorObj):
+                return truthy
+            if not truthy.value:
+                ip = code[ip + 1]
+            elif stack[-1] == 0:
+                return ErrorObj('Can only perform 1000 iterations currently')
+            else:
+                ip += 2
+
+        elif op == LOOP_BODY:
+            res = pop()
+            if isinstance(res, ReturnObj):
+                return ErrorObj('cannot have a return statement inside a while function')
+            if isinstance(res, BuiltinKeywordFunction):
+                ip = code[ip + 1] if res.name == 'break' else code[ip + 2]
+            else:
+                ip += 3
+
+        elif op == LOOP_NEXT:
+            stack[-1] -= 1
+            ip = code[ip + 1]
+
+        elif op == LOOP_START:
+            push(1000)
+            ip += 1
+
+        elif op == LOOP_END:
+            stack[-1] = EvalConstants.NULL_OBJ
+            ip += 1
+
+        elif op == MINUS:
+            right = stack[-1]
+            if type(right) is IntegerObj:
+                stack[-1] = integer_obj(-right.value)
+            else:
+                res = eval_minus_operator(right)
+                if isinstance(res, ErrorObj):
+                    return res
+                stack[-1] = res
+            ip += 1
+
+        elif op == BANG or op == PREFIX:
+            operator = '!' if op == BANG else constants[code[ip + 1]]
+            res = eval_prefix_expression(operator, stack[-1])
+            if isinstance(res, ErrorObj):
+                return res
+            stack[-1] = res
+            ip += 1 if op == BANG else 2
+
+        elif op == INFIX:
+            right = pop()
+            res = eval_infix_expression(constants[code[ip + 1]], stack[-1], right)
+            if isinstance(res, ErrorObj):
+                return res
+            stack[-1] = res
+            ip += 2
+
+        elif op == RETURN_OBJ:
+            stack[-1] = ReturnObj(value=stack[-1])
+            ip += 1
+
+        elif op == MAKE_FUNCTION:
+            push(VMFunctionObj(constants[code[ip + 1]], env))
+            ip += 2
+
+        elif op == GET_RESOLVED:
+            res = eval_resolved_identifier(constants[code[ip + 1]], env)
+            if isinstance(res, ErrorObj):
+                return res
+            push(res)
+            ip += 2
+
+        elif op == CHECK_INDEXABLE:
+            arr = stack[-1]
+            if not isinstance(arr, ArrayObj):
+                return ErrorObj(f'{arr.get_type()} cannot be subscripted')
+            ip += 1
+
+        elif op == INDEX:
+            index = pop()
+            arr = pop()
+            if not isinstance(index, IntegerObj):
+                return ErrorObj(f'cannot index an array with non-integer types: {index.get_type()}')
+            elements = arr.elements
+            if index.value < 0 or index.value >= len(elements):
+                return ErrorObj(f'Array index out of bounds for length {len(elements)}: {index.value}')
+            push(elements[index.value])
+            ip += 1
+
+        elif op == ARRAY:
+            count = code[ip + 1]
+            if count:
+                elements = stack[-count:]
+                del stack[-count:]
+            else:
+                elements = []
+            push(ArrayObj(elements=elements))
+            ip += 2
+
+        elif op == SHARED_STORE:
+            env.store[constants[code[ip + 1]]] = stack[-1]
+            ip += 2
+
+        elif op == SHARED_LOAD:
+            res = env.store.get(constants[code[ip + 1]])
+            if res is None:
+                # the first occurrence did not run in this environment
+                ip += 3
+            else:
+                push(res)
+                ip = code[ip + 2]
+
+        elif op == NULL:
+            push(EvalConstants.NULL_OBJ)
+            ip += 1
+
+        elif op == POP:
+            pop()
+            ip += 1
+
+        elif op == ASSIGN_OTHER:
+            res = eval_assignment(AssignmentObj(constants[code[ip + 1]], pop()), env)
+            if isinstance(res, ErrorObj):
+                return res
+            push(res)
+            ip += 2
+
+        elif op == EVAL:
+            res = eval(constants[code[ip + 1]], env)
+            if isinstance(res, ErrorObj):
+                return res
+            push(res)
+            ip += 2
+
+        else:
+            raise ValueError(f'unknown opcode {op} at {ip}')
+
+
+def call_other(fun: Object, args: list[Object], env: Environment) -> Object:
+    # builtins, functions made by eval (for a node run with EVAL, or on an earlier REPL
+    # line), and anything that is not a function
+    if isinstance(fun, Builtin):
+        return fun.fn(args, env = env)
+    if isinstance(fun, FunctionObj):
+        if isinstance(fun.body, LazyBlockStatement) and fun.body.parse() is None:
+            return ErrorObj(f"syntax error in function body: {'; '.join(fun.body.errors)}")
+        extended_env = get_extended_env(fun, args)
+        if is_error(extended_env):
+            return extended_env
+        return unwrap_return_value(eval_block_statements(fun.body.statements, env = extended_env))
+    return ErrorObj(f'not a function: {str(fun)}')
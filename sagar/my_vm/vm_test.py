@@ -0,0 +1,86 @@
+import unittest
+from sagar.my_ast.ast import *
+from sagar.my_compiler.compiler import compile_program
+from sagar.my_evaluator import evaluator_test
+from sagar.my_evaluator.backends import get_backend, VM_BACKEND
+from sagar.my_evaluator.closures_test import outcome
+from sagar.my_evaluator.evaluator import eval
+from sagar.my_object.object import *
+from sagar.my_optimizer.passes import optimize
+from sagar.my_optimizer.resolver_test import parse
+from sagar.my_parser.parser import IterativeParser
+from sagar.my_vm.vm import run, execute, VMFunctionObj
+
+
+class TestVMEvaluator(evaluator_test.TestEvaluator):
+    # the whole evaluator suite, run on the VM
+
+    def evaluate(self, program: Node, env: Environment) -> Object:
+        return run(program, env)
+
+
+class TestVM(unittest.TestCase):
+
+    def test_value_quirks(self):
+        # ye_lo, break and continue are values the surrounding statements look at
+        inps = [
+            ('maan_le x = if (true) { ye_lo 5; }; print(x); x + 1;', 'type mismatch: RETURN_VALUE + INTEGER', ['5']),
+            ('maan_le b = break; maan_le i = 0; while (i < 5) { i = i + 1; b; } print(i);', None, ['1']),
+            ('maan_le f = golmaal() { continue }; maan_le i = 0; while (i < 3) { i = i + 1; f(); print(i); } print(i);', None, ['3']),
+            ('maan_le i = 0; while (i < 3) { if (i == 1) { ye_lo i; } i = i + 1; }', 'cannot have a return statement inside a while function', []),
+            ('print(if (true) { ye_lo 1; 2 }, break);', None, ['1Builtin Keyword Function: break']),
+        ]
+        for i, (inp, error, exp) in enumerate(inps):
+            for program in [parse(inp), optimize(parse(inp))]:
+                env = Environment(print_statements=[])
+                res = run(program, env)
+                if error is None:
+                    self.assertTrue(not isinstance(res, ErrorObj), f'{i}: res = {res}')
+                else:
+                    self.assertTrue(isinstance(res, ErrorObj) and res.message == error, f'{i}: res = {res}')
+                self.assertTrue(env.print_statements == exp, f'{i}: env.print_statements = {env.print_statements} != {exp}')
+
+    def test_exceptions(self):
+        inps = [
+            ('1 / 0', 'ZeroDivisionError'),
+            ('if (true) { }', 'UnboundLocalError'),
+            ('maan_le f = golmaal() { }; f();', 'UnboundLocalError'),
+            ('maan_le n = if (false) { 1 }; if (n) { 2 }', 'AttributeError'),
+        ]
+        for i, (inp, exp) in enumerate(inps):
+            res = outcome(run, parse(inp))
+            self.assertTrue(res[0] == exp and res == outcome(eval, parse(inp)), f'{i}: {res}')
+
+    def test_frames(self):
+        source = 'maan_le f = golmaal(n) { if (n == 0) { ye_lo 0; } ye_lo f(n - 1) + 1; }; f(%d);'
+        for program in [parse(source % 500), optimize(parse(source % 500))]:
+            res = run(program, Environment(print_statements=[]))
+            self.assertTrue(isinstance(res, IntegerObj) and res.value == 500, f'res = {res}')
+        program = optimize(parse(source % 500))
+        with self.assertRaises(RecursionError):
+            execute(compile_program(program), Environment(print_statements=[]), max_frames=100)
+
+    def test_functions_between_backends(self):
+        env = Environment(print_statements=[])
+        eval(parse('maan_le f = golmaal(x) { ye_lo x + 1; };'), env)
+        run(parse('maan_le g = golmaal(x) { ye_lo f(x) * 2; }; print(g(1));'), env)
+        self.assertTrue(isinstance(env.get('g'), VMFunctionObj), f'g is a {type(env.get("g"))}')
+        eval(parse('print(g(2));'), env)
+        self.assertTrue(env.print_statements == ['4', '6'], f'env.print_statements = {env.print_statements}')
+
+    def test_lazy_bodies(self):
+        source = 'maan_le bad = golmaal(a) { maan_le = 1; }; print("before"); bad(1, 2);'
+        program = parse(source, lazy_functions=True)
+        res = outcome(run, program)
+        self.assertTrue(res == outcome(eval, program) and res[1].startswith('Error: syntax error in function body'), f'res = {res}')
+
+    def test_deep_program(self):
+        program = parse('-' * 5000 + '1;', parser_cls=IterativeParser)
+        self.assertTrue(outcome(run, program) == outcome(eval, program), 'a program too deep to compile behaved differently')
+
+    def test_backend(self):
+        self.assertTrue(get_backend(VM_BACKEND) is run, 'vm backend not registered')
+
+
+if __name__ == '__main__':
+    unittest.main()